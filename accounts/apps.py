@@ -4,3 +4,11 @@ from django.apps import AppConfig
 class AccountsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'accounts'
+
+    def ready(self):
+        """Register signals and the trigram username lookup."""
+        from django.db.models import CharField
+        from .search import TrigramWordSimilar
+        import accounts.signals  # noqa
+
+        CharField.register_lookup(TrigramWordSimilar)
@@ -0,0 +1,28 @@
+"""Asynchronous views for accounts application
+
+Coroutine versions of the profile views, served in place of the views in
+accounts.views when the ASYNC_VIEWS setting is on (it is turned on by
+support_hub.asgi). See common.mixins.AsyncViewMixin.
+"""
+
+
+from common.mixins import AsyncViewMixin
+from .views import ProfileDetailView, ProfileListView, ProfileUpdateView
+
+
+class AsyncProfileDetailView(AsyncViewMixin, ProfileDetailView):
+    """DetailView - Coroutine version of ProfileDetailView"""
+
+    pass
+
+
+class AsyncProfileUpdateView(AsyncViewMixin, ProfileUpdateView):
+    """UpdateView - Coroutine version of ProfileUpdateView"""
+
+    pass
+
+
+class AsyncProfileListView(AsyncViewMixin, ProfileListView):
+    """ListView - Coroutine version of ProfileListView"""
+
+    pass
@@ -0,0 +1,31 @@
+from django.db import migrations
+
+
+def create_trigram_index(apps, schema_editor):
+    """Create a GIN trigram index on usernames for the fuzzy username filters
+    (see accounts.search). PostgreSQL only.
+    """
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    schema_editor.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    schema_editor.execute(
+        "CREATE INDEX accounts_username_trgm_idx ON accounts_customuser "
+        "USING GIN (username gin_trgm_ops)"
+    )
+
+
+def drop_trigram_index(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    schema_editor.execute("DROP INDEX IF EXISTS accounts_username_trgm_idx")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0004_alter_customuser_role'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_trigram_index, drop_trigram_index),
+    ]
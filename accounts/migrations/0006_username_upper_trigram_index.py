@@ -0,0 +1,34 @@
+from django.db import migrations
+
+
+def create_trigram_index(apps, schema_editor):
+    """Create a GIN trigram index on upper case usernames, serving the
+    'username__icontains' substring match of the fuzzy username filters
+    (UPPER(username::text) LIKE UPPER(...), see accounts.search).
+    PostgreSQL only.
+    """
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    schema_editor.execute(
+        "CREATE INDEX accounts_username_upper_trgm_idx ON accounts_customuser "
+        "USING GIN (UPPER(username::text) gin_trgm_ops)"
+    )
+
+
+def drop_trigram_index(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    schema_editor.execute(
+        "DROP INDEX IF EXISTS accounts_username_upper_trgm_idx"
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0005_username_trigram_index'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_trigram_index, drop_trigram_index),
+    ]
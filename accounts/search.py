@@ -0,0 +1,210 @@
+"""Fuzzy username matching for accounts application
+
+Resolves (possibly misspelled) usernames entered in the ticket filters to
+user ids using trigram similarity, so tickets can then be filtered by foreign
+key instead of joining and scanning the user table:
+
+    PostgreSQL - Substrings, served by a GIN trigram index on
+                 'UPPER(accounts_customuser.username)', and pg_trgm word
+                 similarity, served by a GIN trigram index on
+                 'accounts_customuser.username'.
+    Others     - An in-process trigram index of usernames, kept up to date
+                 by the accounts signals and rebuilt periodically.
+"""
+
+
+import re
+import threading
+import time
+from collections import Counter
+from django.db import connection
+from django.db.models import Case, F, FloatField, Func, Q, Value, When
+from django.db.models.lookups import PostgresOperatorLookup
+from .models import CustomUser
+
+
+# Minimum similarity (0 - 1) for a username to be considered a match. Same
+# default as pg_trgm's 'word_similarity_threshold'.
+SIMILARITY_THRESHOLD = 0.6
+
+# Seconds after which the in-process index is rebuilt, picking up changes
+# made by other processes
+INDEX_MAX_AGE = 300
+
+
+class TrigramWordSimilar(PostgresOperatorLookup):
+    """'field__trigram_word_similar=value' lookup - true when value is similar
+    to a word (or continuous part) of field. Can use a GIN 'gin_trgm_ops'
+    index.
+    """
+
+    lookup_name = "trigram_word_similar"
+    postgres_operator = "%%>"
+
+
+def trigrams(text):
+    """Return the set of trigrams of text, computed like pg_trgm: lower case,
+    split into alphanumeric words, each padded with two spaces before and one
+    after.
+
+    Args:
+        text (str): Text to split
+
+    Returns:
+        set: Trigrams of text
+    """
+    grams = set()
+    for word in re.findall(r"[^\W_]+", text.lower()):
+        padded = f"  {word} "
+        grams.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return grams
+
+
+class UsernameTrigramIndex:
+    """In-process inverted index of username trigrams to user ids.
+
+    Candidate users are gathered from the posting lists of the search term's
+    trigrams, so the cost of a lookup depends on how many usernames share
+    trigrams with the term rather than on the size of the user table.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.postings = {}
+        self.usernames = {}
+        self.built_at = None
+
+    def build(self):
+        postings = {}
+        usernames = dict(CustomUser.objects.values_list("id", "username"))
+        for user_id, username in usernames.items():
+            for gram in trigrams(username):
+                postings.setdefault(gram, set()).add(user_id)
+        with self.lock:
+            self.postings, self.usernames = postings, usernames
+            self.built_at = time.monotonic()
+
+    def ensure_built(self):
+        if (
+            self.built_at is None or
+            time.monotonic() - self.built_at > INDEX_MAX_AGE
+        ):
+            self.build()
+
+    def add(self, user_id, username):
+        """Add or update a single user in the index."""
+        if self.built_at is None:
+            return
+        with self.lock:
+            self._discard(user_id)
+            self.usernames[user_id] = username
+            for gram in trigrams(username):
+                self.postings.setdefault(gram, set()).add(user_id)
+
+    def remove(self, user_id):
+        """Remove a single user from the index."""
+        if self.built_at is None:
+            return
+        with self.lock:
+            self._discard(user_id)
+
+    def _discard(self, user_id):
+        username = self.usernames.pop(user_id, None)
+        if username is None:
+            return
+        for gram in trigrams(username):
+            self.postings.get(gram, set()).discard(user_id)
+
+    def search(self, term):
+        """Return the ids of users whose username contains term or has a word
+        similar to it, best matches first.
+        """
+        self.ensure_built()
+        term_grams = trigrams(term)
+        if not term_grams:
+            return []
+        with self.lock:
+            shared = Counter()
+            for gram in term_grams:
+                shared.update(self.postings.get(gram, ()))
+            if len(term) < 3:
+                # Terms too short to contain a trigram from inside a word can
+                # only be matched as substrings, checked against every
+                # username
+                shared.update(
+                    user_id
+                    for user_id, username in self.usernames.items()
+                    if term.lower() in username.lower()
+                )
+            scores = {}
+            for user_id in shared:
+                username = self.usernames[user_id]
+                if term.lower() in username.lower():
+                    scores[user_id] = 1.0
+                    continue
+                # Word similarity (as pg_trgm) - the share of the term's
+                # trigrams found in the username, so long usernames are not
+                # penalised
+                scores[user_id] = shared[user_id] / len(term_grams)
+        matches = [
+            user_id
+            for user_id, score in scores.items()
+            if score >= SIMILARITY_THRESHOLD
+        ]
+        matches.sort(key=lambda user_id: -scores[user_id])
+        return matches
+
+
+username_index = UsernameTrigramIndex()
+
+
+def match_user_ids(term, roles=None, limit=None):
+    """Return the ids of users whose username contains term or has a word
+    similar to it, allowing for typos.
+
+    Args:
+        term (str): Username (or part of one) entered by the user
+        roles (iterable, optional): Only return users with one of these roles
+        limit (int, optional): Maximum number of ids returned, all of them
+        by default
+
+    Returns:
+        list: Matching user ids, usernames containing term first, then by
+        similarity
+    """
+    term = term.strip()
+    if not term:
+        return []
+    if connection.vendor == "postgresql":
+        # Either branch can use its own trigram index (see the accounts
+        # migrations), combined with a bitmap OR
+        users = CustomUser.objects.filter(
+            Q(username__icontains=term) |
+            Q(username__trigram_word_similar=term)
+        )
+        if roles:
+            users = users.filter(role__in=roles)
+        return list(
+            users.annotate(
+                similarity=Case(
+                    When(username__icontains=term, then=Value(1.0)),
+                    default=Func(
+                        Value(term),
+                        F("username"),
+                        function="WORD_SIMILARITY",
+                    ),
+                    output_field=FloatField(),
+                )
+            )
+            .order_by("-similarity", "username")
+            .values_list("id", flat=True)[:limit]
+        )
+    user_ids = username_index.search(term)
+    if roles:
+        allowed = set(
+            CustomUser.objects.filter(
+                id__in=user_ids, role__in=roles
+            ).values_list("id", flat=True)
+        )
+        user_ids = [user_id for user_id in user_ids if user_id in allowed]
+    return user_ids[:limit]
@@ -0,0 +1,23 @@
+"""Signals for accounts application"""
+
+
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from .models import CustomUser
+from .search import username_index
+
+
+@receiver(post_save, sender=CustomUser)
+def index_username(sender, instance, **kwargs):
+    """Receiver function to keep the in-process username trigram index up to
+    date when a user is saved.
+    """
+    username_index.add(instance.pk, instance.username)
+
+
+@receiver(post_delete, sender=CustomUser)
+def remove_username(sender, instance, **kwargs):
+    """Receiver function to remove a deleted user from the in-process
+    username trigram index.
+    """
+    username_index.remove(instance.pk)
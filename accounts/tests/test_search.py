@@ -0,0 +1,108 @@
+"""Test Accounts Application Username Search"""
+
+
+from django.test import TestCase
+from django.contrib.auth import get_user_model
+from django.http import QueryDict
+from tickets.filters import ElevatedUserTicketFilter
+from tickets.models import Ticket
+from ..search import match_user_ids, username_index
+
+
+class TestUsernameMatching(TestCase):
+    def setUp(self):
+        """Create test users with the customer and technician roles.
+
+        customer_account: (accounts.models.CustomUser)
+        technician_account: (accounts.models.CustomUser)
+        """
+        self.customer_account = get_user_model().objects.create_user(
+            username="jonathan_customer",
+            role=get_user_model().ROLES.customer,
+        )
+        self.technician_account = get_user_model().objects.create_user(
+            username="margaret_technician",
+            role=get_user_model().ROLES.technician,
+        )
+        username_index.build()
+
+    def test_misspelled_username_matches(self):
+        """
+        Test usernames match despite typos
+        """
+        self.assertEqual(
+            match_user_ids("jonathon"), [self.customer_account.id]
+        )
+        self.assertEqual(
+            match_user_ids("margret"), [self.technician_account.id]
+        )
+        self.assertEqual(match_user_ids("unrelated"), [])
+
+    def test_partial_username_matches(self):
+        """
+        Test part of a username (including very short terms) matches
+        """
+        self.assertEqual(match_user_ids("custom"), [self.customer_account.id])
+        self.assertEqual(match_user_ids("na"), [self.customer_account.id])
+        self.assertEqual(match_user_ids("garet"), [self.technician_account.id])
+
+    def test_every_match_is_returned(self):
+        """
+        Test all the matching users are returned, not only the best ones
+        """
+        get_user_model().objects.bulk_create(
+            get_user_model()(username=f"jonathan_{number}")
+            for number in range(150)
+        )
+        username_index.build()
+        self.assertEqual(len(match_user_ids("jonathan")), 151)
+        self.assertEqual(len(match_user_ids("jonathan", limit=10)), 10)
+
+    def test_role_restriction(self):
+        """
+        Test matches can be restricted to users with given roles
+        """
+        self.assertEqual(
+            match_user_ids("jonathan", roles=("technician",)), []
+        )
+
+    def test_index_updated_on_save_and_delete(self):
+        """
+        Test the username index follows username changes and deletions
+        """
+        self.customer_account.username = "christopher_customer"
+        self.customer_account.save()
+        self.assertEqual(match_user_ids("jonathan"), [])
+        self.assertEqual(
+            match_user_ids("christofer"), [self.customer_account.id]
+        )
+        self.customer_account.delete()
+        self.assertEqual(match_user_ids("christofer"), [])
+
+    def test_ticket_filter_uses_fuzzy_usernames(self):
+        """
+        Test the ticket filters match tickets by misspelled usernames
+        """
+        ticket = Ticket.objects.create(
+            author=self.customer_account,
+            assigned_technician=self.technician_account,
+            title="Test Customer Ticket",
+            description="Non excepteur voluptate incididunt id cupidatat.",
+        )
+
+        def filter_tickets(query_string):
+            return list(
+                ElevatedUserTicketFilter(
+                    QueryDict(query_string),
+                    user=self.technician_account,
+                    queryset=Ticket.objects.all(),
+                ).qs
+            )
+
+        self.assertEqual(filter_tickets("author__username=jonathon"), [ticket])
+        self.assertEqual(
+            filter_tickets("assigned_technician__username=margret"), [ticket]
+        )
+        self.assertEqual(
+            filter_tickets("assigned_technician__username=jonathan"), []
+        )
@@ -1,7 +1,13 @@
 """URLs for accounts application"""
 
 
+from django.conf import settings
 from django.urls import path
+from .async_views import (
+    AsyncProfileDetailView,
+    AsyncProfileListView,
+    AsyncProfileUpdateView,
+)
 from .views import (
     demo_home_page_view,
     ProfileDetailView,
@@ -10,21 +16,31 @@ from .views import (
 )
 
 
+# The coroutine versions of the profile pages are served under ASGI
+if settings.ASYNC_VIEWS:
+    profile_detail_view = AsyncProfileDetailView.as_view()
+    profile_update_view = AsyncProfileUpdateView.as_view()
+    profile_list_view = AsyncProfileListView.as_view()
+else:
+    profile_detail_view = ProfileDetailView.as_view()
+    profile_update_view = ProfileUpdateView.as_view()
+    profile_list_view = ProfileListView.as_view()
+
 urlpatterns = [
     path("", demo_home_page_view, name="home"),
     path(
         "accounts/profile/<slug:pk>/",
-        ProfileDetailView.as_view(),
+        profile_detail_view,
         name="profile_detail",
     ),
     path(
         "accounts/profile/<slug:pk>/edit",
-        ProfileUpdateView.as_view(),
+        profile_update_view,
         name="profile_update",
     ),
     path(
         "accounts/profile/search",
-        ProfileListView.as_view(),
+        profile_list_view,
         name="profile_list",
     ),
 ]
@@ -6,6 +6,7 @@ from django.contrib import messages
 from django.contrib.messages.views import SuccessMessageMixin
 from django.shortcuts import redirect, render
 from django.views import generic
+from common.mixins import MemoizedObjectMixin
 from common.utils import is_slug_a_number
 from .forms import AdminProfileUpdateForm, ProfileUpdateForm
 from .models import CustomUser
@@ -31,7 +32,10 @@ def demo_home_page_view(request):
 
 
 class ProfileDetailView(
-    LoginRequiredMixin, UserPassesTestMixin, generic.DetailView
+    LoginRequiredMixin,
+    UserPassesTestMixin,
+    MemoizedObjectMixin,
+    generic.DetailView,
 ):
     """DetailView - Used to display individual profiles."""
 
@@ -84,6 +88,7 @@ class ProfileUpdateView(
     LoginRequiredMixin,
     UserPassesTestMixin,
     SuccessMessageMixin,
+    MemoizedObjectMixin,
     generic.UpdateView,
 ):
     """UpdateView - Used to update a the profile"""
@@ -121,6 +126,7 @@ class ProfileUpdateView(
         """
 
         context = super().get_context_data(**kwargs)
+        # Memoized, the profile fetched for test_func is reused
         current_profile_owner = self.get_object()
         context["current_profile_owner_id"] = current_profile_owner.id
         context[
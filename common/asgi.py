@@ -0,0 +1,86 @@
+"""Common ASGI Handler"""
+
+
+import django
+from asgiref.sync import sync_to_async
+from django.core.handlers.asgi import ASGIHandler
+
+
+class StreamingASGIHandler(ASGIHandler):
+    """ASGIHandler reading the content of streaming responses in the thread
+    of the request.
+
+    Django 3.2 iterates StreamingHttpResponse and FileResponse content in the
+    event loop, so generators reading the database (such as the ticket
+    export) raise SynchronousOnlyOperation, and file reads block every other
+    request of the process. The content is read with sync_to_async instead,
+    up to 'chunk_size' bytes per call, in the thread sensitive context of
+    the request (see common.utils.thread_per_request), where its database
+    connection is.
+    """
+
+    async def send_response(self, response, send):
+        """Encode and send a response out over ASGI."""
+        if not response.streaming:
+            return await super().send_response(response, send)
+        # Headers and cookies as ASGIHandler.send_response
+        response_headers = []
+        for header, value in response.items():
+            if isinstance(header, str):
+                header = header.encode("ascii")
+            if isinstance(value, str):
+                value = value.encode("latin1")
+            response_headers.append((bytes(header), bytes(value)))
+        for cookie in response.cookies.values():
+            response_headers.append(
+                (
+                    b"Set-Cookie",
+                    cookie.output(header="").encode("ascii").strip(),
+                )
+            )
+        await send(
+            {
+                "type": "http.response.start",
+                "status": response.status_code,
+                "headers": response_headers,
+            }
+        )
+        read_parts = sync_to_async(self.read_parts, thread_sensitive=True)
+        # Access '__iter__' and not 'streaming_content', as Django does
+        parts = iter(response)
+        while True:
+            content = await read_parts(parts)
+            if not content:
+                break
+            for chunk, _ in self.chunk_bytes(content):
+                await send(
+                    {
+                        "type": "http.response.body",
+                        "body": chunk,
+                        "more_body": True,
+                    }
+                )
+        await send({"type": "http.response.body"})
+        await sync_to_async(response.close, thread_sensitive=True)()
+
+    def read_parts(self, parts):
+        """Return the next parts of a streaming response, joined, reading up
+        to 'chunk_size' bytes. Empty once the content is exhausted.
+        """
+        content = []
+        size = 0
+        for part in parts:
+            content.append(part)
+            size += len(part)
+            if size >= self.chunk_size:
+                break
+        return b"".join(content)
+
+
+def get_asgi_application():
+    """Set up Django and return its ASGI application, as
+    django.core.asgi.get_asgi_application does, served by
+    StreamingASGIHandler.
+    """
+    django.setup(set_prefix=False)
+    return StreamingASGIHandler()
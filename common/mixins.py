@@ -0,0 +1,121 @@
+"""Common Mixins"""
+
+
+import asyncio
+from asgiref.sync import sync_to_async
+from django.contrib import messages
+from django.middleware.csrf import get_token
+from django.utils.cache import (
+    get_conditional_response,
+    patch_cache_control,
+    patch_vary_headers,
+)
+from django.utils.http import http_date
+from .utils import make_etag
+
+
+class MemoizedObjectMixin:
+    """Mixin for single object views (DetailView, UpdateView, DeleteView)
+    that fetches the object once per request.
+
+    UserPassesTestMixin.test_func, get_context_data and the generic view
+    methods can all call 'get_object()' and share the object fetched by the
+    first call, instead of querying the database each time. A view instance
+    only lives for a single request, so the object is never shared between
+    requests.
+    """
+
+    def get_object(self, queryset=None):
+        """Return the object the view is displaying, fetching it on the first
+        call only. Calls with an explicit queryset are not memoized.
+
+        Returns:
+            Model: Object the view is displaying
+        """
+        if queryset is not None:
+            return super().get_object(queryset)
+        if not hasattr(self, "_memoized_object"):
+            self._memoized_object = super().get_object()
+        return self._memoized_object
+
+
+class AsyncViewMixin:
+    """Mixin serving a class-based view as a coroutine under ASGI.
+
+    Django 3.2 only treats a view as asynchronous when the function returned
+    by 'as_view' is a coroutine function, and has no asynchronous ORM
+    interface. The view's synchronous 'dispatch' (the login and permission
+    checks and the handler, which read the database) therefore runs with
+    sync_to_async in the thread of the request (see
+    common.utils.thread_per_request), leaving the event loop free to serve
+    other requests. Handlers may also be coroutines, awaited in the event
+    loop. TemplateResponses are returned unrendered and rendered by Django in
+    the thread of the request as well.
+    """
+
+    @classmethod
+    def as_view(cls, **initkwargs):
+        view = super().as_view(**initkwargs)
+        # Marks the view as a coroutine function for the request handler
+        view._is_coroutine = asyncio.coroutines._is_coroutine
+        return view
+
+    async def dispatch(self, request, *args, **kwargs):
+        response = await sync_to_async(super().dispatch)(
+            request, *args, **kwargs
+        )
+        if asyncio.iscoroutine(response):
+            response = await response
+        return response
+
+
+class ConditionalGetMixin:
+    """Mixin for views answering GET requests with a 304 Not Modified
+    response when the page the client already has is still current.
+
+    Views override 'get_validators', returning the values the page depends
+    on (made into an ETag) and its last modification time, using queries
+    cheaper than rendering the page. Pages of views that do not are always
+    rendered. Responses are marked private and must
+    be revalidated, so browsers send If-None-Match with every request for
+    the page.
+
+    Pages showing a flash message are always rendered, as the message is not
+    part of the validators.
+    """
+
+    def get_validators(self):
+        """Return the (etag parts, last modified datetime) of the page, or
+        None to always render it.
+        """
+        return None
+
+    def get(self, request, *args, **kwargs):
+        if len(messages.get_messages(request)):
+            return super().get(request, *args, **kwargs)
+        validators = self.get_validators()
+        if validators is None:
+            return super().get(request, *args, **kwargs)
+        parts, last_modified = validators
+        # Forms on the page embed a token derived from the CSRF cookie, which
+        # is set here if the client does not have one yet
+        get_token(request)
+        etag = make_etag(
+            request.user.pk,
+            request.META["CSRF_COOKIE"],
+            request.get_full_path(),
+            *parts,
+        )
+        if last_modified is not None:
+            last_modified = int(last_modified.timestamp())
+        response = get_conditional_response(
+            request, etag=etag, last_modified=last_modified
+        )
+        if response is None:
+            response = super().get(request, *args, **kwargs)
+        response["ETag"] = etag
+        if last_modified is not None:
+            response["Last-Modified"] = http_date(last_modified)
+        patch_cache_control(response, private=True, no_cache=True)
+        patch_vary_headers(response, ["Cookie"])
+        return response
@@ -1,6 +1,9 @@
 """Common Utils"""
 
 
+import asyncio
+import hashlib
+from asgiref.sync import ThreadSensitiveContext
 from django.contrib import messages
 
 
@@ -36,3 +39,102 @@ def is_slug_a_number(request, slug):
         )
         return False
     return True
+
+
+def parse_byte_range(header, size):
+    """
+    Parse the HTTP Range header of a request for a single range of a file.
+
+    Only single ranges are supported. Headers asking for several ranges, or
+    that are malformed, are ignored so the whole file is served, as allowed
+    by RFC 7233.
+
+    Args:
+        header (str): Range header of the request, or None
+        size (int): Size of the file in bytes
+
+    Returns:
+        tuple: First and last byte (inclusive) of the range, or None to serve
+        the whole file
+
+    Raises:
+        ValueError: If the range starts beyond the end of the file
+    """
+    if not header or not header.startswith("bytes=") or "," in header:
+        return None
+    first, _, last = header[len("bytes="):].strip().partition("-")
+    try:
+        if first:
+            start = int(first)
+            end = min(int(last), size - 1) if last else size - 1
+        else:
+            # Suffix range, the last N bytes
+            start = max(size - int(last), 0)
+            end = size - 1
+    except ValueError:
+        return None
+    if start > end and start < size:
+        return None
+    if start >= size:
+        raise ValueError("Range not satisfiable")
+    return start, end
+
+
+def iter_file_range(file, start, length, chunk_size=64 * 1024):
+    """
+    Yield 'length' bytes of a file from 'start' in chunks, closing the file
+    once done.
+    """
+    try:
+        file.seek(start)
+        while length > 0:
+            chunk = file.read(min(chunk_size, length))
+            if not chunk:
+                break
+            length -= len(chunk)
+            yield chunk
+    finally:
+        file.close()
+
+
+def make_etag(*parts):
+    """
+    Return a strong ETag for a response built from the given values.
+
+    Args:
+        *parts: Values the response depends on, with stable reprs
+
+    Returns:
+        str: Quoted ETag
+    """
+    digest = hashlib.sha1(repr(parts).encode()).hexdigest()
+    return f'"{digest}"'
+
+
+def thread_per_request(application, max_threads):
+    """
+    Wrap an ASGI application so the synchronous code of each request runs in
+    a thread of its own.
+
+    Django 3.2 runs the synchronous parts of every request served with ASGI
+    (middleware, synchronous views, template rendering) in a single thread
+    shared by the whole process, so one slow query or outbound call holds up
+    every other request. Each request is given its own thread instead, as
+    later Django versions do, with its own database connection (closed when
+    the request finishes). Requests beyond 'max_threads' wait for a thread to
+    be released, bounding the database connections of the process.
+
+    Args:
+        application (callable): ASGI application
+        max_threads (int): Most requests served at once
+
+    Returns:
+        callable: ASGI application
+    """
+    semaphore = asyncio.Semaphore(max_threads)
+
+    async def wrapped_application(scope, receive, send):
+        async with semaphore, ThreadSensitiveContext():
+            await application(scope, receive, send)
+
+    return wrapped_application
@@ -0,0 +1,10 @@
+from django.apps import AppConfig
+
+
+class MetricsConfig(AppConfig):
+    default_auto_field = "django.db.models.BigAutoField"
+    name = "metrics"
+
+    def ready(self):
+        """Register signals."""
+        import metrics.signals  # noqa
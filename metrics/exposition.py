@@ -0,0 +1,78 @@
+"""Prometheus text format for metrics application"""
+
+
+from collections import defaultdict
+from .recording import BUCKETS, METRICS
+
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def escape(value):
+    return (
+        value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+    )
+
+
+def format_labels(labels):
+    if not labels:
+        return ""
+    pairs = ",".join(f'{name}="{escape(value)}"' for name, value in labels)
+    return f"{{{pairs}}}"
+
+
+def format_value(value):
+    return str(int(value)) if float(value).is_integer() else repr(value)
+
+
+def histogram_lines(name, samples):
+    """Return the sample lines of a histogram, with the bucket counts (kept
+    per bucket in the registry) made cumulative.
+    """
+    buckets = defaultdict(dict)
+    for (sample, labels), value in samples.items():
+        if sample == f"{name}_bucket":
+            bound = dict(labels)["le"]
+            series = tuple(label for label in labels if label[0] != "le")
+            buckets[series][bound] = buckets[series].get(bound, 0) + value
+    lines = []
+    for series in sorted(buckets):
+        count = 0
+        for bound in [str(bound) for bound in BUCKETS] + ["+Inf"]:
+            count += buckets[series].get(bound, 0)
+            lines.append(
+                f"{name}_bucket{format_labels(series + (('le', bound),))} "
+                f"{format_value(count)}"
+            )
+        for suffix in ("sum", "count"):
+            value = samples.get((f"{name}_{suffix}", series), 0)
+            lines.append(
+                f"{name}_{suffix}{format_labels(series)} "
+                f"{format_value(value)}"
+            )
+    return lines
+
+
+def render(samples):
+    """Return counters collected from the registry in the Prometheus text
+    exposition format.
+
+    Args:
+        samples (dict): {(sample name, labels): value}
+
+    Returns:
+        str: Metrics text
+    """
+    lines = []
+    for name, (kind, help_text) in METRICS.items():
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} {kind}")
+        if kind == "histogram":
+            lines.extend(histogram_lines(name, samples))
+            continue
+        for (sample, labels), value in sorted(samples.items()):
+            if sample == name:
+                lines.append(
+                    f"{name}{format_labels(labels)} {format_value(value)}"
+                )
+    return "\n".join(lines) + "\n"
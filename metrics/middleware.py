@@ -0,0 +1,89 @@
+"""Middleware for metrics application"""
+
+
+import asyncio
+import time
+from .recording import (
+    UNRESOLVED_VIEW,
+    RequestStats,
+    current_stats,
+    record_request,
+)
+
+
+class MetricsMiddleware:
+    """Record the latency, database queries, template rendering and outside
+    service calls of every request, by URL pattern name (see
+    metrics.recording).
+
+    Listed first in MIDDLEWARE, so the latency covers the other middleware
+    and 'process_template_response' runs right before the response is
+    rendered. Streaming responses are timed until the response is returned,
+    not until the last of the content is sent.
+
+    Both synchronous and asynchronous, as MiddlewareMixin, so that under
+    ASGI the request is not handed to a thread and back just for it. The
+    stats are kept in a context variable, which follows the request into the
+    threads its synchronous code runs in.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if asyncio.iscoroutinefunction(self.get_response):
+            # Mark the class as async-capable, but do the actual switch
+            # inside __call__ to avoid swapping out dunder methods
+            self._is_coroutine = asyncio.coroutines._is_coroutine
+
+    def __call__(self, request):
+        if asyncio.iscoroutinefunction(self.get_response):
+            return self.__acall__(request)
+        stats = RequestStats()
+        token = current_stats.set(stats)
+        start = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            current_stats.reset(token)
+        self.record(request, response, start, stats)
+        return response
+
+    async def __acall__(self, request):
+        """Async version of __call__ that is swapped in when an async
+        request is running.
+        """
+        stats = RequestStats()
+        token = current_stats.set(stats)
+        start = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            current_stats.reset(token)
+        self.record(request, response, start, stats)
+        return response
+
+    def record(self, request, response, start, stats):
+        match = getattr(request, "resolver_match", None)
+        record_request(
+            match.view_name if match else UNRESOLVED_VIEW,
+            request.method,
+            response.status_code,
+            time.perf_counter() - start,
+            stats,
+        )
+
+    def process_template_response(self, request, response):
+        """Time the rendering of a TemplateResponse, which happens right
+        after this returns.
+        """
+        stats = current_stats.get()
+        if stats is not None:
+            start = time.perf_counter()
+
+            def rendered(response):
+                stats.render_time += time.perf_counter() - start
+
+            response.add_post_render_callback(rendered)
+        return response
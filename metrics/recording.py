@@ -0,0 +1,189 @@
+"""Recording of request metrics for metrics application
+
+MetricsMiddleware (see metrics.middleware) records every request under the
+name of the URL pattern it resolved to ('ticket_list', 'ticket_detail',
+'profile_list', ...):
+
+    supporthub_requests_total                  - Requests by view, method
+                                                 and status
+    supporthub_request_duration_seconds        - Latency histogram by view
+                                                 and method
+    supporthub_db_queries_total                - Database queries by view
+    supporthub_db_query_duration_seconds_total - Database time by view
+    supporthub_template_render_duration_seconds_total
+                                               - TemplateResponse rendering
+                                                 time by view
+    supporthub_outbound_calls_total            - Calls to outside services
+                                                 by view and service
+    supporthub_outbound_duration_seconds_total - Time spent calling outside
+                                                 services by view and service
+
+Calls to outside services are timed with 'timed', e.g.
+'with timed("cloudinary"):' around an upload. Calls made outside of a
+request (by the worker commands) are recorded under the view '<none>'.
+"""
+
+
+import bisect
+import contextvars
+import time
+from contextlib import contextmanager
+from .registry import registry
+
+
+# Upper bounds in seconds of the request latency histogram buckets
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Metric name: (type, help text)
+METRICS = {
+    "supporthub_requests_total": (
+        "counter",
+        "Requests served, by view, method and status.",
+    ),
+    "supporthub_request_duration_seconds": (
+        "histogram",
+        "Request latency in seconds, by view and method.",
+    ),
+    "supporthub_db_queries_total": (
+        "counter",
+        "Database queries run by requests, by view.",
+    ),
+    "supporthub_db_query_duration_seconds_total": (
+        "counter",
+        "Seconds requests spent running database queries, by view.",
+    ),
+    "supporthub_template_render_duration_seconds_total": (
+        "counter",
+        "Seconds spent rendering template responses, by view.",
+    ),
+    "supporthub_outbound_calls_total": (
+        "counter",
+        "Calls to outside services, by view and service.",
+    ),
+    "supporthub_outbound_duration_seconds_total": (
+        "counter",
+        "Seconds spent calling outside services, by view and service.",
+    ),
+}
+
+# View label of requests that did not resolve to a URL pattern, and of
+# outside service calls made outside of a request
+UNRESOLVED_VIEW = "<unresolved>"
+NO_VIEW = "<none>"
+
+
+class RequestStats:
+    """Database, rendering and outside service time of the current request,
+    added up while it is served and recorded once it is done.
+    """
+
+    __slots__ = ("queries", "query_time", "render_time", "outbound")
+
+    def __init__(self):
+        self.queries = 0
+        self.query_time = 0.0
+        self.render_time = 0.0
+        # {service: [calls, seconds]}
+        self.outbound = {}
+
+    def execute_wrapper(self, execute, sql, params, many, context):
+        """Database execute wrapper timing the queries of the request."""
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries += 1
+            self.query_time += time.perf_counter() - start
+
+    def add_outbound(self, service, seconds):
+        calls = self.outbound.setdefault(service, [0, 0.0])
+        calls[0] += 1
+        calls[1] += seconds
+
+
+# Stats of the request being served in the current context
+current_stats = contextvars.ContextVar("current_stats", default=None)
+
+
+def record_query(execute, sql, params, many, context):
+    """Database execute wrapper, installed on every connection (see
+    metrics.signals), timing the queries of the request being served in
+    the current context, in whichever thread they run.
+    """
+    stats = current_stats.get()
+    if stats is None:
+        return execute(sql, params, many, context)
+    return stats.execute_wrapper(execute, sql, params, many, context)
+
+
+def bucket_bound(seconds):
+    """Return the 'le' label of the histogram bucket of a duration."""
+    index = bisect.bisect_left(BUCKETS, seconds)
+    return str(BUCKETS[index]) if index < len(BUCKETS) else "+Inf"
+
+
+def outbound_samples(view, service, calls, seconds):
+    labels = (("view", view), ("service", service))
+    return {
+        ("supporthub_outbound_calls_total", labels): calls,
+        ("supporthub_outbound_duration_seconds_total", labels): seconds,
+    }
+
+
+def record_request(view, method, status, duration, stats):
+    """Add a served request to the registry.
+
+    Args:
+        view (str): Name of the URL pattern of the request
+        method (str): HTTP method
+        status (int): Response status code
+        duration (float): Seconds taken to serve the request
+        stats (RequestStats): Database, rendering and outside service time
+        of the request
+    """
+    labels = (("view", view), ("method", method))
+    view_labels = (("view", view),)
+    samples = {
+        (
+            "supporthub_requests_total",
+            labels + (("status", str(status)),),
+        ): 1,
+        (
+            "supporthub_request_duration_seconds_bucket",
+            labels + (("le", bucket_bound(duration)),),
+        ): 1,
+        ("supporthub_request_duration_seconds_sum", labels): duration,
+        ("supporthub_request_duration_seconds_count", labels): 1,
+    }
+    if stats.queries:
+        samples[("supporthub_db_queries_total", view_labels)] = stats.queries
+        samples[
+            ("supporthub_db_query_duration_seconds_total", view_labels)
+        ] = stats.query_time
+    if stats.render_time:
+        samples[
+            ("supporthub_template_render_duration_seconds_total", view_labels)
+        ] = stats.render_time
+    for service, (calls, seconds) in stats.outbound.items():
+        samples.update(outbound_samples(view, service, calls, seconds))
+    registry.add(samples)
+
+
+@contextmanager
+def timed(service):
+    """Context manager timing a call to an outside service, recorded with
+    the request it is made for.
+
+    Args:
+        service (str): Service label, e.g. 'mail' or 'cloudinary'
+    """
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        seconds = time.perf_counter() - start
+        stats = current_stats.get()
+        if stats is not None:
+            stats.add_outbound(service, seconds)
+        else:
+            registry.add(outbound_samples(NO_VIEW, service, 1, seconds))
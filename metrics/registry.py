@@ -0,0 +1,160 @@
+"""Metrics registry for metrics application
+
+Each process adds up its metrics in memory, as counters keyed by sample name
+and labels, so recording a request only takes a lock and a few dictionary
+updates. Every FLUSH_INTERVAL seconds (checked when a request is recorded,
+and when the process exits) the counters are written to a file of their own
+in METRICS_DIR, replaced atomically.
+
+The /metrics endpoint adds up the files of every process, including workers
+that have since exited so counters never go backwards, with the live
+counters of the process serving it. The directory is emptied when gunicorn
+starts (see support_hub/gunicorn_asgi.py). Without METRICS_DIR each process
+only reports its own counters.
+"""
+
+
+import atexit
+import json
+import logging
+import os
+import threading
+import time
+from collections import defaultdict
+from django.conf import settings
+
+
+logger = logging.getLogger(__name__)
+
+# Seconds between writes of a process's counters to METRICS_DIR
+FLUSH_INTERVAL = 5
+
+FILE_PREFIX = "metrics-"
+
+
+def metrics_file(directory, pid):
+    return os.path.join(directory, f"{FILE_PREFIX}{pid}.json")
+
+
+def read_metrics_file(path):
+    """Return the counters written to a metrics file.
+
+    Returns:
+        dict: {(sample name, labels): value}
+    """
+    with open(path) as file:
+        return {
+            (name, tuple(tuple(label) for label in labels)): value
+            for name, labels, value in json.load(file)
+        }
+
+
+def clear_directory(directory):
+    """Remove the metrics files of the processes of a previous run."""
+    if not os.path.isdir(directory):
+        return
+    for name in os.listdir(directory):
+        if name.startswith(FILE_PREFIX):
+            try:
+                os.remove(os.path.join(directory, name))
+            except FileNotFoundError:
+                pass
+
+
+class Registry:
+    """Counters of the current process, written to METRICS_DIR."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._reset()
+
+    def _reset(self):
+        self.pid = os.getpid()
+        self.samples = defaultdict(float)
+        self.flushed_on = time.monotonic()
+
+    def _check_fork(self):
+        # A forked process starts from zero, its parent reports the counters
+        # it inherited
+        if self.pid != os.getpid():
+            self._reset()
+
+    def add(self, samples):
+        """Add to the counters, writing them to METRICS_DIR when they were
+        last written more than FLUSH_INTERVAL seconds ago.
+
+        Args:
+            samples (dict): {(sample name, labels): value} to add, labels
+            being a tuple of (name, value) pairs
+        """
+        with self._lock:
+            self._check_fork()
+            for key, value in samples.items():
+                self.samples[key] += value
+            due = time.monotonic() - self.flushed_on >= FLUSH_INTERVAL
+        if due:
+            self.flush()
+
+    def flush(self):
+        """Write the counters to the file of this process in METRICS_DIR.
+        A flush already in progress in another thread is not waited for.
+        """
+        directory = getattr(settings, "METRICS_DIR", None)
+        if not directory or not self._flush_lock.acquire(blocking=False):
+            return
+        try:
+            with self._lock:
+                self._check_fork()
+                self.flushed_on = time.monotonic()
+                samples = list(self.samples.items())
+                path = metrics_file(directory, self.pid)
+            os.makedirs(directory, exist_ok=True)
+            temporary = f"{path}.tmp"
+            with open(temporary, "w") as file:
+                json.dump(
+                    [
+                        [name, labels, value]
+                        for (name, labels), value in samples
+                    ],
+                    file,
+                )
+            os.replace(temporary, path)
+        except OSError:
+            logger.warning("Could not write metrics to %s", directory)
+        finally:
+            self._flush_lock.release()
+
+    def collect(self):
+        """Return the counters of every process, added up.
+
+        Returns:
+            dict: {(sample name, labels): value}
+        """
+        totals = defaultdict(float)
+        directory = getattr(settings, "METRICS_DIR", None)
+        if directory and os.path.isdir(directory):
+            own_file = os.path.basename(metrics_file(directory, os.getpid()))
+            for name in os.listdir(directory):
+                if (
+                    not name.startswith(FILE_PREFIX) or
+                    not name.endswith(".json") or
+                    name == own_file
+                ):
+                    continue
+                try:
+                    samples = read_metrics_file(os.path.join(directory, name))
+                except (OSError, ValueError):
+                    # Removed since listed, or not a metrics file
+                    continue
+                for key, value in samples.items():
+                    totals[key] += value
+        with self._lock:
+            self._check_fork()
+            for key, value in self.samples.items():
+                totals[key] += value
+        return totals
+
+
+registry = Registry()
+atexit.register(registry.flush)
@@ -0,0 +1,20 @@
+"""Signals for metrics application"""
+
+
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+from .recording import record_query
+
+
+@receiver(connection_created)
+def install_query_recorder(sender, connection, **kwargs):
+    """Time the queries of every database connection with the request they
+    are run for.
+
+    Connections are created per thread, and the queries of a request served
+    under ASGI run in another thread than its middleware, so the recorder
+    is installed on every connection and finds the request in the context
+    (see metrics.recording.current_stats).
+    """
+    if record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(record_query)
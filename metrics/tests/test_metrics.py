@@ -0,0 +1,275 @@
+"""Test Metrics Application"""
+
+
+import json
+import os
+import tempfile
+from asgiref.sync import sync_to_async
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from ..exposition import render
+from ..recording import NO_VIEW, bucket_bound, timed
+from ..registry import Registry, registry
+
+
+def total(samples, name, **labels):
+    """Return the value of the samples of a metric with the given labels,
+    added up over any other labels.
+    """
+    return sum(
+        value
+        for (sample, sample_labels), value in samples.items()
+        if sample == name and labels.items() <= dict(sample_labels).items()
+    )
+
+
+class TestMetrics(TestCase):
+    def setUp(self):
+        """Create a customer and an administrator.
+
+        customer_account: (accounts.models.CustomUser)
+        administrator_account: (accounts.models.CustomUser)
+        """
+        self.customer_account = get_user_model().objects.create_user(
+            username="customer_account",
+            email="customer@example.com",
+            role=get_user_model().ROLES.customer,
+        )
+        self.administrator_account = get_user_model().objects.create_user(
+            username="administrator_account",
+            role=get_user_model().ROLES.administrator,
+        )
+
+    def test_requests_are_recorded_by_url_name(self):
+        """
+        Test a request is recorded under its URL name with its latency,
+        database queries and template rendering time
+        """
+        before = registry.collect()
+        self.client.force_login(self.customer_account)
+        self.client.get(reverse("ticket_list"))
+        after = registry.collect()
+
+        def delta(name, **labels):
+            return total(after, name, **labels) - total(
+                before, name, **labels
+            )
+
+        self.assertEqual(
+            delta(
+                "supporthub_requests_total",
+                view="ticket_list",
+                method="GET",
+                status="200",
+            ),
+            1,
+        )
+        self.assertEqual(
+            delta(
+                "supporthub_request_duration_seconds_count",
+                view="ticket_list",
+            ),
+            1,
+        )
+        self.assertEqual(
+            delta(
+                "supporthub_request_duration_seconds_bucket",
+                view="ticket_list",
+            ),
+            1,
+        )
+        self.assertGreater(
+            delta("supporthub_db_queries_total", view="ticket_list"), 0
+        )
+        self.assertGreater(
+            delta(
+                "supporthub_db_query_duration_seconds_total",
+                view="ticket_list",
+            ),
+            0,
+        )
+        self.assertGreater(
+            delta(
+                "supporthub_template_render_duration_seconds_total",
+                view="ticket_list",
+            ),
+            0,
+        )
+
+    async def test_async_requests_are_recorded(self):
+        """
+        Test a request served by the asynchronous handler is recorded with
+        the database queries run in the thread of its view
+        """
+        await sync_to_async(self.async_client.force_login)(
+            self.customer_account
+        )
+        before = registry.collect()
+        await self.async_client.get(reverse("ticket_list"))
+        after = registry.collect()
+
+        def delta(name, **labels):
+            return total(after, name, **labels) - total(
+                before, name, **labels
+            )
+
+        self.assertEqual(
+            delta(
+                "supporthub_requests_total",
+                view="ticket_list",
+                method="GET",
+                status="200",
+            ),
+            1,
+        )
+        self.assertGreater(
+            delta("supporthub_db_queries_total", view="ticket_list"), 0
+        )
+
+    @override_settings(
+        EMAIL_BACKEND="outbox.backends.OutboxEmailBackend",
+        DEFAULT_FROM_EMAIL="support@example.com",
+    )
+    def test_mail_is_recorded_with_the_request(self):
+        """
+        Test mail sent while serving a request is recorded as an outside
+        service call of the request's view, and calls made outside of a
+        request under no view
+        """
+        before = registry.collect()
+        self.client.post(
+            reverse("account_reset_password"),
+            {"email": "customer@example.com"},
+        )
+        with timed("cloudinary"):
+            pass
+        after = registry.collect()
+
+        def delta(name, **labels):
+            return total(after, name, **labels) - total(
+                before, name, **labels
+            )
+
+        self.assertEqual(
+            delta(
+                "supporthub_outbound_calls_total",
+                view="account_reset_password",
+                service="mail",
+            ),
+            1,
+        )
+        self.assertEqual(
+            delta(
+                "supporthub_outbound_calls_total",
+                view=NO_VIEW,
+                service="cloudinary",
+            ),
+            1,
+        )
+
+    @override_settings(METRICS_TOKEN="scraper-token")
+    def test_metrics_endpoint_access(self):
+        """
+        Test the metrics endpoint is only served to the scraper's token and
+        to administrators
+        """
+        url = reverse("metrics")
+        self.assertEqual(self.client.get(url).status_code, 403)
+        response = self.client.get(
+            url, HTTP_AUTHORIZATION="Bearer wrong-token"
+        )
+        self.assertEqual(response.status_code, 403)
+
+        response = self.client.get(
+            url, HTTP_AUTHORIZATION="Bearer scraper-token"
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response["Content-Type"].startswith("text/plain"))
+        self.assertContains(
+            response, "# TYPE supporthub_request_duration_seconds histogram"
+        )
+
+        self.client.force_login(self.customer_account)
+        self.assertEqual(self.client.get(url).status_code, 403)
+        self.client.force_login(self.administrator_account)
+        self.assertEqual(self.client.get(url).status_code, 200)
+
+
+class TestMetricsAggregation(TestCase):
+    def setUp(self):
+        """Use a temporary metrics directory.
+
+        directory: (str) - METRICS_DIR
+        """
+        temporary_directory = tempfile.TemporaryDirectory()
+        self.addCleanup(temporary_directory.cleanup)
+        self.directory = temporary_directory.name
+        metrics_settings = override_settings(METRICS_DIR=self.directory)
+        metrics_settings.enable()
+        self.addCleanup(metrics_settings.disable)
+
+    def test_counters_are_added_up_across_processes(self):
+        """
+        Test the counters written by other processes are added to the live
+        counters of the current process, which are not counted twice
+        """
+        labels = (("view", "ticket_list"), ("method", "GET"))
+        with open(
+            os.path.join(self.directory, "metrics-999999.json"), "w"
+        ) as file:
+            json.dump(
+                [["supporthub_request_duration_seconds_count", labels, 2]],
+                file,
+            )
+        process_registry = Registry()
+        process_registry.add(
+            {("supporthub_request_duration_seconds_count", labels): 1}
+        )
+        process_registry.flush()
+        self.assertTrue(
+            os.path.exists(
+                os.path.join(self.directory, f"metrics-{os.getpid()}.json")
+            )
+        )
+        samples = process_registry.collect()
+        self.assertEqual(
+            samples[("supporthub_request_duration_seconds_count", labels)], 3
+        )
+
+    def test_histogram_is_rendered_cumulatively(self):
+        """
+        Test the latency histogram, kept per bucket, is rendered with
+        cumulative buckets in the Prometheus text format
+        """
+        labels = (("view", "ticket_detail"), ("method", "GET"))
+        samples = {
+            ("supporthub_request_duration_seconds_sum", labels): 30.203,
+            ("supporthub_request_duration_seconds_count", labels): 3,
+        }
+        for seconds in (0.003, 0.2, 30):
+            key = (
+                "supporthub_request_duration_seconds_bucket",
+                labels + (("le", bucket_bound(seconds)),),
+            )
+            samples[key] = samples.get(key, 0) + 1
+        lines = render(samples).splitlines()
+        series = 'view="ticket_detail",method="GET"'
+        for bound, count in (("0.005", 1), ("0.1", 1), ("0.25", 2)):
+            self.assertIn(
+                "supporthub_request_duration_seconds_bucket"
+                f'{{{series},le="{bound}"}} {count}',
+                lines,
+            )
+        self.assertIn(
+            f'supporthub_request_duration_seconds_bucket{{{series},le="+Inf"}}'
+            " 3",
+            lines,
+        )
+        self.assertIn(
+            f"supporthub_request_duration_seconds_count{{{series}}} 3", lines
+        )
+        self.assertIn(
+            f"supporthub_request_duration_seconds_sum{{{series}}} 30.203",
+            lines,
+        )
@@ -0,0 +1,33 @@
+"""Views for metrics application"""
+
+
+from django.conf import settings
+from django.http import HttpResponse
+from django.utils.crypto import constant_time_compare
+from .exposition import CONTENT_TYPE, render
+from .registry import registry
+
+
+def can_read_metrics(request):
+    """Return True if the request carries the METRICS_TOKEN bearer token, or
+    comes from a logged in administrator.
+    """
+    token = getattr(settings, "METRICS_TOKEN", None)
+    if token and constant_time_compare(
+        request.META.get("HTTP_AUTHORIZATION", ""), f"Bearer {token}"
+    ):
+        return True
+    return (
+        request.user.is_authenticated and
+        request.user.role == "administrator"
+    )
+
+
+def metrics_view(request):
+    """View - Request metrics of every web process, in the Prometheus text
+    format, for the scraper (authenticated with METRICS_TOKEN) or
+    administrators.
+    """
+    if not can_read_metrics(request):
+        return HttpResponse("Forbidden", status=403, content_type="text/plain")
+    return HttpResponse(render(registry.collect()), content_type=CONTENT_TYPE)
@@ -0,0 +1,25 @@
+"""Admin for outbox application"""
+
+
+from django.contrib import admin
+from .models import OutboxMessage
+
+
+class OutboxMessageAdmin(admin.ModelAdmin):
+    """Set fields to display on the outbox pages of the admin portal."""
+
+    list_display = (
+        "id",
+        "subject",
+        "to",
+        "status",
+        "attempts",
+        "created_on",
+        "sent_on",
+    )
+    list_filter = ("status",)
+    readonly_fields = ("created_on", "sent_on", "last_error")
+
+
+# register models with admin site so they can be managed
+admin.site.register(OutboxMessage, OutboxMessageAdmin)
@@ -0,0 +1,43 @@
+"""Email backend for outbox application"""
+
+
+from django.core.mail.backends.base import BaseEmailBackend
+from django.db import transaction
+from metrics.recording import timed
+from .models import OutboxMessage
+
+
+class OutboxEmailBackend(BaseEmailBackend):
+    """Email backend that queues messages in the outbox instead of sending
+    them, so requests never wait on the SMTP server.
+
+    Messages are saved with the database connection of the request, so when
+    they are sent from inside a transaction that is rolled back they are
+    never delivered. The 'drain_outbox' worker command delivers the queued
+    messages with the backend set in OUTBOX_DELIVERY_BACKEND.
+    """
+
+    def send_messages(self, email_messages):
+        """Queue messages for delivery.
+
+        Args:
+            email_messages (list): EmailMessage objects to queue
+
+        Returns:
+            int: Number of messages queued
+        """
+        messages = [
+            OutboxMessage.from_email_message(message)
+            for message in email_messages
+            if message.recipients()
+        ]
+        if not messages:
+            return 0
+        try:
+            with timed("mail"), transaction.atomic():
+                OutboxMessage.objects.bulk_create(messages)
+        except Exception:
+            if not self.fail_silently:
+                raise
+            return 0
+        return len(messages)
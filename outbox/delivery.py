@@ -0,0 +1,132 @@
+"""Delivery of queued messages for outbox application"""
+
+
+import logging
+import smtplib
+from django.conf import settings
+from django.core.mail import get_connection
+from django.db import transaction
+from django.utils import timezone
+from metrics.recording import timed
+from .models import OutboxMessage
+
+
+logger = logging.getLogger(__name__)
+
+# Errors that mean the connection to the mail server is unusable, so it is
+# closed and opened again before the next message
+CONNECTION_ERRORS = (smtplib.SMTPServerDisconnected, ConnectionError)
+
+
+def get_delivery_connection():
+    """Return a connection of the backend that actually delivers mail."""
+    return get_connection(
+        getattr(
+            settings,
+            "OUTBOX_DELIVERY_BACKEND",
+            "django.core.mail.backends.smtp.EmailBackend",
+        )
+    )
+
+
+def due_messages():
+    """Return the queryset of messages due for delivery, oldest first."""
+    return OutboxMessage.objects.filter(
+        status=OutboxMessage.STATUS.pending,
+        next_attempt_on__lte=timezone.now(),
+    ).order_by("next_attempt_on", "id")
+
+
+def claim_due_messages(batch_size):
+    """Return the next batch of messages due for delivery.
+
+    On databases supporting it the rows are locked (skipping rows already
+    locked), so several workers can drain the outbox without sending a
+    message twice.
+    """
+    messages = due_messages().select_for_update(skip_locked=True)
+    return list(messages[:batch_size])
+
+
+def deliver_batch(connection, batch_size=50):
+    """Deliver a batch of due messages over an open connection.
+
+    Each message is sent and marked individually, so one rejected message
+    does not hold back the rest of the batch. Failed messages are scheduled
+    for a retry (see OutboxMessage.mark_failed_attempt). If the connection
+    is lost and cannot be opened again the rest of the batch is left for the
+    next run.
+
+    Delivery is at least once: a worker stopped between sending a message
+    and committing the batch sends it again on the next run.
+
+    Args:
+        connection (BaseEmailBackend): Open delivery connection, reused for
+        every message of the batch
+        batch_size (int, optional): Maximum number of messages delivered
+
+    Returns:
+        tuple: Number of messages sent, number of failed attempts and
+        whether the connection is still usable
+    """
+    sent = failed = 0
+    with transaction.atomic():
+        for outbox_message in claim_due_messages(batch_size):
+            try:
+                with timed("mail"):
+                    connection.send_messages(
+                        [outbox_message.to_email_message(connection)]
+                    )
+            except Exception as error:
+                logger.warning(
+                    "Delivering outbox message %s failed: %s",
+                    outbox_message.pk,
+                    error,
+                )
+                outbox_message.mark_failed_attempt(error)
+                failed += 1
+                if isinstance(error, CONNECTION_ERRORS):
+                    try:
+                        connection.close()
+                        connection.open()
+                    except Exception as reconnect_error:
+                        logger.error(
+                            "Could not reconnect to the mail server: %s",
+                            reconnect_error,
+                        )
+                        return sent, failed, False
+            else:
+                outbox_message.mark_sent()
+                sent += 1
+    return sent, failed, True
+
+
+def drain(batch_size=50, connection=None):
+    """Deliver every message currently due, in batches, over a single
+    connection opened for the whole run.
+
+    Args:
+        batch_size (int, optional): Number of messages claimed at a time
+        connection (BaseEmailBackend, optional): Delivery connection,
+        defaults to OUTBOX_DELIVERY_BACKEND
+
+    Returns:
+        tuple: Total number of messages sent and of failed attempts
+    """
+    total_sent = total_failed = 0
+    # Only connect to the mail server when there is something to send
+    if not due_messages().exists():
+        return total_sent, total_failed
+    connection = connection or get_delivery_connection()
+    connection.fail_silently = False
+    connection.open()
+    try:
+        while True:
+            sent, failed, connected = deliver_batch(connection, batch_size)
+            total_sent += sent
+            total_failed += failed
+            if not connected or sent + failed < batch_size:
+                break
+    finally:
+        connection.close()
+    return total_sent, total_failed
@@ -0,0 +1,74 @@
+"""Worker delivering the emails queued in the outbox (see
+outbox.backends.OutboxEmailBackend).
+
+Before each delivery run the functions listed in OUTBOX_WORKER_HOOKS are
+called, so they can queue mail that has become due (such as comment
+digests). A hook that fails is logged and the worker carries on with the
+other hooks and the delivery run.
+
+Runs until stopped, checking for due messages every --interval seconds, or
+delivers the messages currently due and exits with --once (e.g. from a
+scheduler).
+
+Usage:
+    python manage.py drain_outbox [--once] [--interval 5] [--batch-size 50]
+"""
+
+
+import logging
+import time
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils.module_loading import import_string
+from outbox import delivery
+
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = "Deliver the emails queued in the outbox."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--once",
+            action="store_true",
+            help="Deliver the messages currently due and exit.",
+        )
+        parser.add_argument(
+            "--interval",
+            type=float,
+            default=5,
+            help="Seconds between checks for due messages (default 5).",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=50,
+            help="Number of messages claimed at a time (default 50).",
+        )
+
+    def handle(self, *args, **options):
+        hooks = [
+            import_string(hook)
+            for hook in getattr(settings, "OUTBOX_WORKER_HOOKS", [])
+        ]
+        try:
+            while True:
+                for hook in hooks:
+                    try:
+                        hook()
+                    except Exception:
+                        logger.exception(
+                            "Outbox worker hook %s failed", hook.__name__
+                        )
+                sent, failed = delivery.drain(options["batch_size"])
+                if sent or failed:
+                    self.stdout.write(
+                        f"Sent {sent} message(s), {failed} failed attempt(s)."
+                    )
+                if options["once"]:
+                    break
+                time.sleep(options["interval"])
+        except KeyboardInterrupt:
+            self.stdout.write("Outbox worker stopped.")
@@ -0,0 +1,178 @@
+"""Models for outbox application"""
+
+
+import base64
+import datetime as dt
+from django.core.mail import EmailMultiAlternatives
+from django.db import models
+from django.db.models import Q
+from django.utils import timezone
+from model_utils import Choices
+
+
+class OutboxMessage(models.Model):
+    """Outbox Message model - An email queued by the OutboxEmailBackend and
+    delivered by the 'drain_outbox' worker command.
+
+    Stores the parts of a django.core.mail.EmailMessage needed to rebuild it
+    for delivery, along with the delivery state. Failed deliveries are
+    retried with an exponential backoff until MAX_ATTEMPTS is reached.
+    """
+
+    STATUS = Choices(
+        ("pending", ("Pending")),
+        ("sent", ("Sent")),
+        ("failed", ("Failed")),
+    )
+
+    # Number of delivery attempts before a message is marked as failed
+    MAX_ATTEMPTS = 8
+    # Delay before the first retry, doubled after each failed attempt
+    RETRY_DELAY = dt.timedelta(seconds=30)
+    MAX_RETRY_DELAY = dt.timedelta(hours=1)
+
+    status = models.CharField(
+        max_length=7,
+        choices=STATUS,
+        default=STATUS.pending,
+    )
+    subject = models.TextField(blank=True)
+    body = models.TextField(blank=True)
+    content_subtype = models.CharField(max_length=20, default="plain")
+    from_email = models.CharField(max_length=254, blank=True)
+    to = models.JSONField(default=list)
+    cc = models.JSONField(default=list)
+    bcc = models.JSONField(default=list)
+    reply_to = models.JSONField(default=list)
+    headers = models.JSONField(default=dict)
+    # [content, mimetype] pairs of EmailMultiAlternatives.alternatives
+    alternatives = models.JSONField(default=list)
+    # [filename, base64 content, mimetype] of each attachment
+    attachments = models.JSONField(default=list)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    last_error = models.TextField(blank=True)
+    created_on = models.DateTimeField(auto_now_add=True)
+    next_attempt_on = models.DateTimeField(default=timezone.now)
+    sent_on = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ("id",)
+        indexes = [
+            # Messages due for delivery, read by the worker
+            models.Index(
+                fields=["next_attempt_on", "id"],
+                name="outbox_pending_due_idx",
+                condition=Q(status="pending"),
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.subject} ({', '.join(self.to)})"
+
+    @classmethod
+    def from_email_message(cls, message):
+        """Return an unsaved OutboxMessage for an EmailMessage.
+
+        Args:
+            message (EmailMessage): Message to queue
+
+        Returns:
+            OutboxMessage: Message ready to be saved
+
+        Raises:
+            ValueError: If the message has no sender (DEFAULT_FROM_EMAIL is
+            not set), or has an attachment given as a MIME object, which
+            cannot be stored
+        """
+        if not message.from_email:
+            raise ValueError(
+                "Messages without a sender cannot be queued in the outbox, "
+                "set DEFAULT_FROM_EMAIL or pass 'from_email'."
+            )
+        attachments = []
+        for attachment in message.attachments:
+            if not isinstance(attachment, tuple):
+                raise ValueError(
+                    "MIME attachments cannot be queued in the outbox, attach "
+                    "files as (filename, content, mimetype) instead."
+                )
+            filename, content, mimetype = attachment
+            if isinstance(content, str):
+                content = content.encode()
+            attachments.append(
+                [filename, base64.b64encode(content).decode(), mimetype]
+            )
+        return cls(
+            subject=message.subject,
+            body=message.body,
+            content_subtype=message.content_subtype,
+            from_email=message.from_email,
+            to=list(message.to),
+            cc=list(message.cc),
+            bcc=list(message.bcc),
+            reply_to=list(message.reply_to),
+            headers=dict(message.extra_headers),
+            alternatives=[
+                list(alternative)
+                for alternative in getattr(message, "alternatives", [])
+            ],
+            attachments=attachments,
+        )
+
+    def to_email_message(self, connection=None):
+        """Rebuild the queued EmailMessage.
+
+        Args:
+            connection (BaseEmailBackend, optional): Backend used to deliver
+            the message
+
+        Returns:
+            EmailMultiAlternatives: Message to deliver
+        """
+        message = EmailMultiAlternatives(
+            subject=self.subject,
+            body=self.body,
+            from_email=self.from_email,
+            to=self.to,
+            cc=self.cc,
+            bcc=self.bcc,
+            reply_to=self.reply_to,
+            headers=self.headers,
+            alternatives=[
+                tuple(alternative) for alternative in self.alternatives
+            ],
+            connection=connection,
+        )
+        message.content_subtype = self.content_subtype
+        for filename, content, mimetype in self.attachments:
+            message.attach(filename, base64.b64decode(content), mimetype)
+        return message
+
+    def mark_sent(self):
+        self.status = self.STATUS.sent
+        self.sent_on = timezone.now()
+        self.attempts += 1
+        self.last_error = ""
+        self.save(
+            update_fields=["status", "sent_on", "attempts", "last_error"]
+        )
+
+    def mark_failed_attempt(self, error):
+        """Record a failed delivery, scheduling a retry with an exponential
+        backoff or marking the message as failed after MAX_ATTEMPTS.
+        """
+        self.attempts += 1
+        self.last_error = str(error)
+        if self.attempts >= self.MAX_ATTEMPTS:
+            self.status = self.STATUS.failed
+        else:
+            delay = min(
+                self.RETRY_DELAY * 2 ** (self.attempts - 1),
+                self.MAX_RETRY_DELAY,
+            )
+            self.next_attempt_on = timezone.now() + delay
+        self.save(
+            update_fields=[
+                "attempts", "last_error", "status", "next_attempt_on"
+            ]
+        )
@@ -0,0 +1,239 @@
+"""Test Outbox Application"""
+
+
+import socketserver
+import threading
+from io import StringIO
+from django.contrib.auth import get_user_model
+from django.core import mail
+from django.core.management import call_command
+from django.db import transaction
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from ..models import OutboxMessage
+
+
+class SMTPStandInHandler(socketserver.StreamRequestHandler):
+    """Minimal SMTP server conversation, recording the messages received on
+    the server and rejecting the recipients in 'server.rejected'.
+    """
+
+    def reply(self, line):
+        self.wfile.write(f"{line}\r\n".encode())
+
+    def handle(self):
+        self.server.connections += 1
+        self.reply("220 localhost SMTP stand-in")
+        recipients = []
+        for line in self.rfile:
+            command = line.decode().strip()
+            verb = command[:4].upper()
+            if verb in ("EHLO", "HELO"):
+                self.reply("250 localhost")
+            elif verb == "MAIL":
+                recipients = []
+                self.reply("250 OK")
+            elif verb == "RCPT":
+                address = command.split(":", 1)[1].strip("<> ")
+                if address in self.server.rejected:
+                    self.reply("550 No such user")
+                else:
+                    recipients.append(address)
+                    self.reply("250 OK")
+            elif verb == "DATA":
+                self.reply("354 End data with <CR><LF>.<CR><LF>")
+                data = []
+                for data_line in self.rfile:
+                    if data_line == b".\r\n":
+                        break
+                    data.append(data_line)
+                self.server.messages.append(
+                    (recipients, b"".join(data).decode())
+                )
+                self.reply("250 OK")
+            elif verb in ("RSET", "NOOP"):
+                self.reply("250 OK")
+            elif verb == "QUIT":
+                self.reply("221 Bye")
+                break
+            else:
+                self.reply("502 Command not implemented")
+
+
+class SMTPStandIn(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self):
+        super().__init__(("127.0.0.1", 0), SMTPStandInHandler)
+        self.connections = 0
+        self.messages = []
+        self.rejected = set()
+
+
+def failing_hook():
+    """Worker hook standing in for one that fails."""
+    raise RuntimeError("Hook failed")
+
+
+def queueing_hook():
+    """Worker hook queueing a message."""
+    mail.send_mail(
+        "Queued by hook", "Body", "support@example.com",
+        ["customer@example.com"],
+    )
+
+
+@override_settings(EMAIL_BACKEND="outbox.backends.OutboxEmailBackend")
+class TestOutbox(TestCase):
+    def setUp(self):
+        """Start a local SMTP stand-in server used as the delivery backend.
+
+        smtp_server: (SMTPStandIn)
+        """
+        self.smtp_server = SMTPStandIn()
+        thread = threading.Thread(
+            target=self.smtp_server.serve_forever, daemon=True
+        )
+        thread.start()
+        self.addCleanup(self.smtp_server.server_close)
+        self.addCleanup(self.smtp_server.shutdown)
+        delivery_settings = override_settings(
+            OUTBOX_DELIVERY_BACKEND=(
+                "django.core.mail.backends.smtp.EmailBackend"
+            ),
+            EMAIL_HOST="127.0.0.1",
+            EMAIL_PORT=self.smtp_server.server_address[1],
+            EMAIL_USE_TLS=False,
+            EMAIL_HOST_USER="",
+            EMAIL_HOST_PASSWORD="",
+        )
+        delivery_settings.enable()
+        self.addCleanup(delivery_settings.disable)
+
+    def drain(self):
+        call_command("drain_outbox", "--once", stdout=StringIO())
+
+    def test_mail_is_queued_then_delivered_over_one_connection(self):
+        """
+        Test sending mail only queues it, and the worker delivers every
+        queued message over a single SMTP connection
+        """
+        for number in range(3):
+            mail.send_mail(
+                subject=f"Support Hub - Test {number}",
+                message="Your Ticket has an update!",
+                html_message="<h2>Your Ticket has an update!</h2>",
+                from_email="support@example.com",
+                recipient_list=[f"customer{number}@example.com"],
+            )
+        self.assertEqual(OutboxMessage.objects.count(), 3)
+        self.assertEqual(self.smtp_server.connections, 0)
+
+        self.drain()
+        self.assertEqual(self.smtp_server.connections, 1)
+        self.assertEqual(len(self.smtp_server.messages), 3)
+        recipients, data = self.smtp_server.messages[0]
+        self.assertEqual(recipients, ["customer0@example.com"])
+        self.assertIn("Subject: Support Hub - Test 0", data)
+        self.assertIn("text/html", data)
+        self.assertFalse(
+            OutboxMessage.objects.exclude(
+                status=OutboxMessage.STATUS.sent
+            ).exists()
+        )
+
+    def test_rejected_message_is_retried_later(self):
+        """
+        Test a message rejected by the server is scheduled for a retry
+        without holding back the other messages
+        """
+        self.smtp_server.rejected.add("unknown@example.com")
+        mail.send_mail(
+            "Rejected", "Body", "support@example.com", ["unknown@example.com"]
+        )
+        mail.send_mail(
+            "Accepted", "Body", "support@example.com", ["known@example.com"]
+        )
+        with self.assertLogs("outbox.delivery", "WARNING"):
+            self.drain()
+        rejected = OutboxMessage.objects.get(subject="Rejected")
+        self.assertEqual(rejected.status, OutboxMessage.STATUS.pending)
+        self.assertEqual(rejected.attempts, 1)
+        self.assertGreater(rejected.next_attempt_on, rejected.created_on)
+        self.assertEqual(
+            OutboxMessage.objects.get(subject="Accepted").status,
+            OutboxMessage.STATUS.sent,
+        )
+
+        # Not due yet, so a second run does not try it again
+        self.drain()
+        rejected.refresh_from_db()
+        self.assertEqual(rejected.attempts, 1)
+
+    @override_settings(
+        OUTBOX_WORKER_HOOKS=[
+            "outbox.tests.test_outbox.failing_hook",
+            "outbox.tests.test_outbox.queueing_hook",
+        ]
+    )
+    def test_failing_hook_does_not_stop_the_worker(self):
+        """
+        Test a worker hook raising an exception is logged, and the other
+        hooks and the delivery run still take place
+        """
+        with self.assertLogs(
+            "outbox.management.commands.drain_outbox", "ERROR"
+        ) as logs:
+            self.drain()
+        self.assertIn("failing_hook", logs.output[0])
+        self.assertEqual(len(self.smtp_server.messages), 1)
+
+    def test_mail_from_rolled_back_transaction_is_not_sent(self):
+        """
+        Test mail queued inside a transaction that is rolled back is
+        discarded with it
+        """
+        try:
+            with transaction.atomic():
+                mail.send_mail(
+                    "Rolled back", "Body", "support@example.com",
+                    ["customer@example.com"],
+                )
+                raise RuntimeError
+        except RuntimeError:
+            pass
+        self.assertFalse(OutboxMessage.objects.exists())
+
+    @override_settings(DEFAULT_FROM_EMAIL=None)
+    def test_mail_without_sender_is_refused(self):
+        """
+        Test mail without a sender is refused with a clear error instead of
+        failing to be saved
+        """
+        with self.assertRaisesMessage(ValueError, "DEFAULT_FROM_EMAIL"):
+            mail.send_mail("Subject", "Body", None, ["customer@example.com"])
+        self.assertFalse(OutboxMessage.objects.exists())
+
+    @override_settings(DEFAULT_FROM_EMAIL="support@example.com")
+    def test_allauth_password_reset_mail_is_queued(self):
+        """
+        Test allauth's password reset mail goes through the outbox
+        """
+        get_user_model().objects.create_user(
+            username="customer_account",
+            email="customer@example.com",
+            password="testingPa$$w0rd!",
+        )
+        self.client.post(
+            reverse("account_reset_password"),
+            {"email": "customer@example.com"},
+        )
+        self.assertEqual(
+            OutboxMessage.objects.filter(
+                to=["customer@example.com"]
+            ).count(),
+            1,
+        )
+        self.drain()
+        self.assertEqual(len(self.smtp_server.messages), 1)
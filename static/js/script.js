@@ -6,4 +6,98 @@ window.onload = (event) => {
   let toastList = toastElementList.map(function (toastElement) {
     return new bootstrap.Toast(toastElement).show();
   });
-};
\ No newline at end of file
+};
+
+// Replace the 'Load older comments' button on the ticket detail page with
+// the page of older comments, fetched as a HTML fragment
+document.addEventListener('click', (event) => {
+  let button = event.target.closest('.load-older-comments');
+  if (!button) {
+    return;
+  }
+  event.preventDefault();
+  button.classList.add('disabled');
+  fetch(button.dataset.fragmentUrl, { credentials: 'same-origin' })
+    .then((response) => {
+      if (!response.ok) {
+        throw new Error(response.statusText);
+      }
+      return response.text();
+    })
+    .then((html) => {
+      button.closest('.older-comments').outerHTML = html;
+    })
+    .catch(() => {
+      // Fall back to loading the page of older comments in full
+      window.location.href = button.href;
+    });
+});
+
+// Select or deselect every ticket on the ticket list page for the bulk
+// actions form
+document.addEventListener('change', (event) => {
+  if (event.target.id !== 'bulk-select-all') {
+    return;
+  }
+  document.querySelectorAll('.bulk-select').forEach((checkbox) => {
+    checkbox.checked = event.target.checked;
+  });
+});
+
+// Live ticket events, streamed by the server when it runs under ASGI (see
+// tickets/sse.py). New comments are added to the thread of the ticket
+// detail page, and changed tickets update their card on the ticket list or
+// show a notice offering to reload the page.
+function showLiveUpdateNotice() {
+  let notice = document.querySelector('.live-update-notice');
+  if (notice) {
+    notice.classList.remove('d-none');
+  }
+}
+
+function listenForTicketEvents(url) {
+  if (!window.EventSource) {
+    return;
+  }
+  let source = new EventSource(url);
+  source.addEventListener('comment-added', (event) => {
+    let data = JSON.parse(event.data);
+    let thread = document.querySelector('.comment-thread');
+    if (!thread || thread.querySelector(`[data-comment-id="${data.comment_id}"]`)) {
+      return;
+    }
+    let placeholder = thread.querySelector('.no-comments');
+    if (placeholder) {
+      placeholder.remove();
+    }
+    thread.insertAdjacentHTML('beforeend', data.html);
+  });
+  source.addEventListener('ticket-changed', (event) => {
+    let data = JSON.parse(event.data);
+    let card = document.querySelector(`[data-ticket-id="${data.id}"]`);
+    let notice = document.querySelector('.live-update-notice');
+    if (card) {
+      let status = card.querySelector('.ticket-status');
+      status.className = `ticket-status ticket-status-${data.status}`;
+      status.textContent = data.status_display;
+    } else if (notice && notice.dataset.status) {
+      // Ticket detail page, comments alone do not need a reload
+      if (notice.dataset.status !== data.status || notice.dataset.title !== data.title) {
+        showLiveUpdateNotice();
+      }
+    } else {
+      showLiveUpdateNotice();
+    }
+  });
+  source.addEventListener('reload', () => {
+    source.close();
+    showLiveUpdateNotice();
+  });
+}
+
+document.addEventListener('DOMContentLoaded', () => {
+  let stream = document.querySelector('[data-events-url]');
+  if (stream) {
+    listenForTicketEvents(stream.dataset.eventsUrl);
+  }
+});
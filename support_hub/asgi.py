@@ -3,14 +3,33 @@ ASGI config for support_hub project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
 
+The live ticket events stream (tickets.sse) is served by its own ASGI
+application, in front of Django. Django serves the coroutine versions of the
+ticket and profile pages (ASYNC_VIEWS), and runs the synchronous code of
+each request in a thread of its own (common.utils.thread_per_request),
+including the reading of streaming responses such as the ticket export and
+attachments (common.asgi.StreamingASGIHandler).
+
+Served with gunicorn and uvicorn workers, see support_hub/gunicorn_asgi.py.
+
 For more information on this file, see
 https://docs.djangoproject.com/en/3.2/howto/deployment/asgi/
 """
 
 import os
 
-from django.core.asgi import get_asgi_application
+from common.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'support_hub.settings')
+os.environ.setdefault('ASYNC_VIEWS', '1')
+
+django_application = get_asgi_application()
+
+# Imported once Django is set up by get_asgi_application
+from django.conf import settings  # noqa: E402
+from common.utils import thread_per_request  # noqa: E402
+from tickets.sse import route_events  # noqa: E402
 
-application = get_asgi_application()
+application = route_events(
+    thread_per_request(django_application, settings.ASGI_REQUEST_THREADS)
+)
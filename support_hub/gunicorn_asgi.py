@@ -0,0 +1,35 @@
+"""
+Gunicorn configuration serving the ASGI application (support_hub.asgi) with
+uvicorn workers, each serving many requests concurrently from an event loop.
+
+Usage:
+    gunicorn support_hub.asgi:application -c python:support_hub.gunicorn_asgi
+"""
+
+from os import environ
+
+bind = f"0.0.0.0:{environ.get('PORT', '8000')}"
+worker_class = "uvicorn.workers.UvicornWorker"
+
+# The number of worker processes is left to gunicorn: the --workers option,
+# or the WEB_CONCURRENCY variable set by the platform (default 1).
+
+# Let open event streams and in-flight requests finish on restarts
+graceful_timeout = 10
+keepalive = 5
+
+
+def on_starting(server):
+    """Remove the request metrics files of the previous run, so workers that
+    exited before the restart are no longer counted (see metrics.registry).
+
+    The number of worker processes is exported as WEB_CONCURRENCY for the
+    workers, where it is read by the WEB_CONCURRENCY setting, whichever way
+    it was configured.
+    """
+    environ["WEB_CONCURRENCY"] = str(server.cfg.workers)
+    directory = environ.get("METRICS_DIR")
+    if directory:
+        from metrics.registry import clear_directory
+
+        clear_directory(directory)
@@ -59,6 +59,8 @@ INSTALLED_APPS = [
     "django_summernote",
     "accounts",
     "tickets",
+    "outbox",
+    "metrics",
     "django_filters",
 ]
 
@@ -88,10 +90,15 @@ ACCOUNT_FORMS = {
 # Email Settings
 # CREDIT: Adapted from djangokatya
 # URL: https://djangokatya.com/2020/08/17/django-allauth-tutorial-part-2-email-confirmation/
+#
+# Mail sent by the site (including allauth verification and password reset
+# mail) is queued in the outbox and delivered by the 'drain_outbox' worker
+# using OUTBOX_DELIVERY_BACKEND (see outbox.backends)
+EMAIL_BACKEND = "outbox.backends.OutboxEmailBackend"
 if environ.get("DEV_ENVIRONMENT_EMAIL"):
-    EMAIL_BACKEND = "django.core.mail.backends.console.EmailBackend"
+    OUTBOX_DELIVERY_BACKEND = "django.core.mail.backends.console.EmailBackend"
 else:
-    EMAIL_BACKEND = "django.core.mail.backends.smtp.EmailBackend"
+    OUTBOX_DELIVERY_BACKEND = "django.core.mail.backends.smtp.EmailBackend"
     EMAIL_USE_TLS = True
     EMAIL_HOST = "smtp.gmail.com"
     EMAIL_PORT = 587
@@ -121,6 +128,8 @@ SUMMERNOTE_CONFIG = {
 MESSAGE_STORAGE = "django.contrib.messages.storage.session.SessionStorage"
 
 MIDDLEWARE = [
+    # First, so request latency covers the other middleware
+    "metrics.middleware.MetricsMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
@@ -143,6 +152,7 @@ TEMPLATES = [
                 "django.template.context_processors.request",
                 "django.contrib.auth.context_processors.auth",
                 "django.contrib.messages.context_processors.messages",
+                "tickets.context_processors.ticket_counters",
             ],
         },
     },
@@ -164,6 +174,54 @@ if environ.get("DEV_ENVIRONMENT_DATABASE"):
 else:
     DATABASES = {"default": dj_database_url.parse(environ.get("DATABASE_URL"))}
 
+# Cache
+# https://docs.djangoproject.com/en/3.2/topics/cache/
+
+# The default cache is shared by every process (web workers, the outbox
+# worker and management commands), as the fragment cache generation must be
+# the same for all of them. The table is created by
+# the release phase with 'python manage.py createcachetable' (see Procfile).
+# Rendered ticket fragments are kept in memory by each process, checked
+# against the shared generation (see tickets.fragment_cache).
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.db.DatabaseCache",
+        "LOCATION": "support_hub_cache",
+        "OPTIONS": {"MAX_ENTRIES": 100000},
+    },
+    "fragments": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        "LOCATION": "ticket-fragments",
+        "OPTIONS": {"MAX_ENTRIES": 10000},
+    },
+}
+
+# Seconds rendered ticket fragments are cached for (see
+# tickets.fragment_cache). Entries are also replaced whenever a ticket is
+# updated.
+TICKET_FRAGMENT_CACHE_TIMEOUT = 60 * 60 * 24
+
+# Seconds comments on a ticket are collected for before the ticket author is
+# sent one digest email of them (see tickets.notifications)
+TICKET_COMMENT_DIGEST_WINDOW = 120
+
+# Functions called by the 'drain_outbox' worker before each delivery run,
+# used to queue mail that is due
+OUTBOX_WORKER_HOOKS = [
+    "tickets.notifications.send_comment_digests",
+    "tickets.image_deletion.delete_pending_images",
+]
+
+# Broker delivering the live ticket events streamed under ASGI (see
+# tickets.events). The in-process broker only reaches the streams of its own
+# process, so live events are turned off when several processes serve the
+# site, unless a broker shared between them is configured.
+TICKET_EVENT_BROKER = "tickets.events.InProcessBroker"
+
+# Number of web worker processes serving the site, set by the platform or by
+# support_hub.gunicorn_asgi
+WEB_CONCURRENCY = int(environ.get("WEB_CONCURRENCY", 1))
+
 # Password validation
 # https://docs.djangoproject.com/en/3.2/ref/settings/#auth-password-validators
 
@@ -211,6 +269,51 @@ STATIC_ROOT = Path.joinpath(BASE_DIR, "staticfiles")
 MEDIA_URL = "/media/"
 DEFAULT_FILE_STORAGE = "cloudinary_storage.storage.MediaCloudinaryStorage"
 
+# Uploaded files larger than MAX_UPLOAD_SIZE bytes are dropped as they are
+# received (see tickets.upload_handlers) and rejected by the form. Uploads
+# going on past MAX_DISCARDED_UPLOAD_SIZE bytes are stopped, resetting the
+# connection.
+MAX_UPLOAD_SIZE = 3 * 1024 * 1024
+MAX_DISCARDED_UPLOAD_SIZE = 25 * 1024 * 1024
+FILE_UPLOAD_HANDLERS = [
+    "tickets.upload_handlers.MaxSizeUploadHandler",
+    "django.core.files.uploadhandler.MemoryFileUploadHandler",
+    "django.core.files.uploadhandler.TemporaryFileUploadHandler",
+]
+# Largest image accepted, in pixels (see tickets.validators.validate_image)
+MAX_IMAGE_PIXELS = 40 * 1000 * 1000
+
+# Ticket attachments are uploaded to Cloudinary, or stored on local disk (or
+# any mounted volume) under ATTACHMENT_ROOT when LOCAL_ATTACHMENTS is set
+# (see tickets.storage)
+LOCAL_ATTACHMENTS = bool(environ.get("LOCAL_ATTACHMENTS"))
+ATTACHMENT_ROOT = environ.get(
+    "ATTACHMENT_ROOT", Path.joinpath(BASE_DIR, "attachments")
+)
+ATTACHMENT_URL = "/tickets/attachments/"
+# Header handing local attachments to the web server to send, either
+# "X-Sendfile" (Apache, lighttpd) or "X-Accel-Redirect" (nginx, serving
+# ATTACHMENT_ROOT at the internal location ATTACHMENT_SENDFILE_URL)
+ATTACHMENT_SENDFILE_HEADER = environ.get("ATTACHMENT_SENDFILE_HEADER")
+ATTACHMENT_SENDFILE_URL = "/protected-attachments/"
+# Worker processes generating the derivatives (thumbnails and previews) of
+# local attachments, 0 to generate them in the web process instead (see
+# tickets.derivatives)
+DERIVATIVE_WORKERS = int(environ.get("DERIVATIVE_WORKERS", 2))
+
+# Serve the coroutine versions of the ticket and profile pages (see
+# tickets.async_views and accounts.async_views), set by support_hub.asgi
+ASYNC_VIEWS = bool(environ.get("ASYNC_VIEWS"))
+# Requests an ASGI worker process serves at once, each in a thread with its
+# own database connection (see common.utils.thread_per_request)
+ASGI_REQUEST_THREADS = int(environ.get("ASGI_REQUEST_THREADS", 20))
+
+# Directory the request metrics of each process are written to, added up
+# across gunicorn workers by the /metrics endpoint (see metrics.registry)
+METRICS_DIR = environ.get("METRICS_DIR")
+# Bearer token the Prometheus scraper authenticates to /metrics with
+METRICS_TOKEN = environ.get("METRICS_TOKEN")
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/3.2/ref/settings/#default-auto-field
 
@@ -15,11 +15,13 @@ Including another URLconf
 """
 from django.contrib import admin
 from django.urls import path, include
+from metrics.views import metrics_view
 
 urlpatterns = [
     path("admin/", admin.site.urls),
     path("summernote/", include("django_summernote.urls")),
     path("accounts/", include("allauth.urls")),
     path("tickets/", include("tickets.urls")),
+    path("metrics", metrics_view, name="metrics"),
     path("", include("accounts.urls")),
 ]
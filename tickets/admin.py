@@ -3,7 +3,13 @@
 
 from django.contrib import admin
 from django_summernote.admin import SummernoteModelAdmin
-from .models import Comment, Team, Ticket, TicketCategory
+from .models import (
+    Comment,
+    CommentNotification,
+    Team,
+    Ticket,
+    TicketCategory,
+)
 
 
 class TicketAdmin(SummernoteModelAdmin):
@@ -39,3 +45,4 @@ admin.site.register(Team)
 admin.site.register(Comment, CommentAdmin)
 admin.site.register(TicketCategory)
 admin.site.register(Ticket, TicketAdmin)
+admin.site.register(CommentNotification)
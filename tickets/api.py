@@ -0,0 +1,254 @@
+"""Read-only JSON API for tickets application
+
+Ticket list and detail endpoints for dashboards and other scripts, using the
+same session login and role based visibility as the ticket list page:
+
+    - Sparse fieldsets: '?fields=id,title,status' selects the fields
+      returned (and the columns read). Without it the list returns every
+      field but the description, and the detail every field.
+    - Cursor pagination: the list is paginated with the KeysetPaginator of
+      the ticket list page, 'next' and 'previous' links carry the cursor.
+      The ticket list filter parameters are supported as well.
+    - Conditional requests: responses have an ETag built from the
+      'updated_on' values of the tickets returned (and the fragment cache
+      generation, bumped when related names shown on tickets change). The
+      ETag is checked against If-None-Match before any ticket is fetched or
+      serialized, so an unchanged poll is answered with a 304 after a single
+      query on the ticket keys.
+"""
+
+
+from django.contrib.auth.mixins import LoginRequiredMixin
+from django.http import JsonResponse
+from django.urls import reverse
+from django.utils.cache import get_conditional_response
+from django.views import View
+from common.utils import make_etag
+from .fragment_cache import get_generation
+from .models import Ticket
+from .pagination import InvalidCursor
+from .views import TicketListView
+
+
+# API fields and the ticket field lookups they are read from
+FIELDS = {
+    "id": "id",
+    "url": "id",
+    "title": "title",
+    "type": "type",
+    "status": "status",
+    "priority": "priority",
+    "category": "category__name",
+    "author": "author__username",
+    "assigned_team": "assigned_team__name",
+    "assigned_technician": "assigned_technician__username",
+    "preview": "preview",
+    "description_html": "description_html",
+    "image_url": "ticket_image",
+    "created_on": "created_on",
+    "updated_on": "updated_on",
+}
+
+# Fields returned by the list when no 'fields' parameter is given
+LIST_FIELDS = [field for field in FIELDS if field != "description_html"]
+
+# Number of tickets per page of the list, and the most a client may ask for
+PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
+
+class ApiError(Exception):
+    """Raised for requests the API cannot answer, with the HTTP status of
+    the response.
+    """
+
+    def __init__(self, message, status=400):
+        super().__init__(message)
+        self.status = status
+
+
+def parse_fields(value, default):
+    """Return the fields selected by a 'fields' parameter.
+
+    Args:
+        value (str): Comma separated field names, or None
+        default (list): Fields returned when no fields are selected
+
+    Returns:
+        list: Field names, in the order of FIELDS
+
+    Raises:
+        ApiError: If a field name is not known
+    """
+    if not value:
+        return default
+    names = {name.strip() for name in value.split(",") if name.strip()}
+    unknown = names - FIELDS.keys()
+    if unknown:
+        raise ApiError(f"Unknown fields: {', '.join(sorted(unknown))}.")
+    return [field for field in FIELDS if field in names]
+
+
+def serialize(row, fields, request):
+    """Return the API representation of a ticket read with QuerySet.values.
+
+    Args:
+        row (dict): Ticket values keyed by field lookup
+        fields (list): API fields to include
+        request (HttpRequest): Request the absolute URLs are built for
+
+    Returns:
+        dict: {field: value} of the ticket
+    """
+    data = {}
+    for field in fields:
+        value = row[FIELDS[field]]
+        if field == "url":
+            value = request.build_absolute_uri(
+                reverse("ticket_api_detail", kwargs={"pk": value})
+            )
+        elif field == "image_url":
+            value = value.url if value else None
+        data[field] = value
+    return data
+
+
+def fetch_rows(ticket_ids, fields):
+    """Return the values of the given fields of tickets, in the order of
+    'ticket_ids'.
+    """
+    lookups = {FIELDS[field] for field in fields} | {"id"}
+    rows = {
+        row["id"]: row
+        for row in Ticket.objects.filter(pk__in=ticket_ids).values(*lookups)
+    }
+    return [rows[ticket_id] for ticket_id in ticket_ids if ticket_id in rows]
+
+
+class ApiViewMixin:
+    """Mixin for API views answering errors, including missing logins, as
+    JSON and adding the headers of conditional responses.
+    """
+
+    raise_exception = True
+
+    def handle_no_permission(self):
+        return JsonResponse({"error": "Authentication required."}, status=403)
+
+    def dispatch(self, request, *args, **kwargs):
+        try:
+            return super().dispatch(request, *args, **kwargs)
+        except ApiError as error:
+            return JsonResponse({"error": str(error)}, status=error.status)
+
+    def conditional_response(self, etag, build_data):
+        """Return a 304 response if the request already has the ETag,
+        otherwise a JSON response of the data returned by 'build_data'.
+        """
+        response = get_conditional_response(self.request, etag=etag)
+        if response is None:
+            response = JsonResponse(build_data())
+        response["ETag"] = etag
+        # Clients may keep responses but must check they are still current
+        response["Cache-Control"] = "private, no-cache"
+        response["Vary"] = "Cookie"
+        return response
+
+
+class TicketApiListView(ApiViewMixin, TicketListView):
+    """View - JSON list of the tickets visible to the user, filtered with
+    the ticket list filters.
+    """
+
+    http_method_names = ["get", "head", "options"]
+
+    def get(self, request, *args, **kwargs):
+        """Handle GET requests
+
+        Returns:
+            JsonResponse: Page of tickets with the 'next' and 'previous'
+            page links, or a Not Modified response
+        """
+        fields = parse_fields(request.GET.get("fields"), LIST_FIELDS)
+        try:
+            page_size = min(
+                int(request.GET.get("page_size", PAGE_SIZE)), MAX_PAGE_SIZE
+            )
+        except ValueError:
+            raise ApiError("page_size must be a number.")
+        if page_size < 1:
+            raise ApiError("page_size must be positive.")
+
+        self.filterset = self.get_filterset()
+        try:
+            page = self.get_page_keys(self.filterset.qs, page_size)
+        except InvalidCursor as error:
+            raise ApiError(str(error))
+
+        keys = [(ticket.pk, ticket.updated_on) for ticket in page]
+        etag = make_etag(
+            get_generation(),
+            keys,
+            page.next_cursor,
+            page.previous_cursor,
+        )
+
+        def build_data():
+            return {
+                "results": [
+                    serialize(row, fields, request)
+                    for row in fetch_rows([pk for pk, _ in keys], fields)
+                ],
+                "next": self.page_url(page.next_cursor),
+                "previous": self.page_url(page.previous_cursor),
+            }
+
+        return self.conditional_response(etag, build_data)
+
+    def page_url(self, cursor):
+        if cursor is None:
+            return None
+        parameters = self.request.GET.copy()
+        parameters[self.page_kwarg] = cursor
+        return self.request.build_absolute_uri(
+            f"{self.request.path}?{parameters.urlencode()}"
+        )
+
+
+class TicketApiDetailView(ApiViewMixin, LoginRequiredMixin, View):
+    """View - JSON representation of a single ticket."""
+
+    http_method_names = ["get", "head", "options"]
+
+    def get(self, request, pk):
+        """Handle GET requests
+
+        Args:
+            request (WSGIRequest): Request object
+            pk (int): Ticket id
+
+        Returns:
+            JsonResponse: Ticket fields, or a Not Modified response
+        """
+        fields = parse_fields(request.GET.get("fields"), list(FIELDS))
+        ticket = (
+            Ticket.objects.with_visibility(request.user)
+            .filter(pk=pk)
+            .values("updated_on", "is_visible")
+            .first()
+        )
+        if ticket is None:
+            raise ApiError("Ticket not found.", status=404)
+        if not ticket["is_visible"]:
+            raise ApiError(
+                "You do not have permission to view this ticket.", status=403
+            )
+        etag = make_etag(get_generation(), pk, ticket["updated_on"])
+
+        def build_data():
+            rows = fetch_rows([pk], fields)
+            if not rows:
+                raise ApiError("Ticket not found.", status=404)
+            return serialize(rows[0], fields, request)
+
+        return self.conditional_response(etag, build_data)
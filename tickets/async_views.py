@@ -0,0 +1,35 @@
+"""Asynchronous views for tickets application
+
+Coroutine versions of the ticket list and ticket pages, served in place of
+the views in tickets.views when the ASYNC_VIEWS setting is on (it is turned
+on by support_hub.asgi). They behave exactly as the synchronous views, see
+common.mixins.AsyncViewMixin for how the work of a request is split between
+the event loop and the request's thread.
+"""
+
+
+from common.mixins import AsyncViewMixin
+from .views import TicketDetailView, TicketListView, TicketView
+
+
+class AsyncTicketListView(AsyncViewMixin, TicketListView):
+    """ListView - Coroutine version of TicketListView"""
+
+    pass
+
+
+class AsyncTicketDetailView(AsyncViewMixin, TicketDetailView):
+    """DetailView - Coroutine version of TicketDetailView"""
+
+    pass
+
+
+class AsyncTicketView(AsyncViewMixin, TicketView):
+    """View - Coroutine version of TicketView, displaying the ticket with
+    AsyncTicketDetailView. Comments are posted with CommentFormView, in the
+    thread of the request.
+    """
+
+    async def get(self, request, *args, **kwargs):
+        view = AsyncTicketDetailView.as_view()
+        return await view(request, *args, **kwargs)
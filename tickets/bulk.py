@@ -0,0 +1,126 @@
+"""Bulk ticket updates for tickets application
+
+Technicians can change the status, priority, team or technician of many
+tickets at once from the ticket list (see tickets.views.TicketBulkUpdateView).
+The tickets are changed with a single UPDATE query rather than a save per
+ticket, so the side effects of saving a ticket are applied here in bulk:
+
+    - The cached per-user ticket counters are adjusted (tickets.counters).
+    - 'updated_on' is set, which replaces the cached ticket fragments
+      (tickets.fragment_cache).
+    - Ticket authors are sent one email listing all of their tickets that
+      changed, queued in the outbox together.
+    - A live 'ticket-changed' event is published for each ticket changed
+      (tickets.events).
+"""
+
+
+from django.conf import settings
+from django.core.mail import EmailMultiAlternatives, get_connection
+from django.db import transaction
+from django.template.loader import render_to_string
+from django.utils import timezone
+from . import counters, events
+from .models import Ticket
+
+
+def bulk_update_tickets(tickets, changes, user, site_url):
+    """Apply the same changes to many tickets.
+
+    Args:
+        tickets (QuerySet): Tickets to update
+        changes (dict): {field attribute name: value} to set, any of
+        'status', 'priority', 'assigned_team_id' and
+        'assigned_technician_id'
+        user (accounts.models.CustomUser): User making the changes, who is
+        not notified of changes to their own tickets
+        site_url (str): Host used to link to the tickets in notifications
+
+    Returns:
+        int: Number of tickets changed
+    """
+    with transaction.atomic():
+        # Lock the tickets and read the fields the counters and notifications
+        # need from before the update
+        previous = list(
+            Ticket.objects.filter(pk__in=tickets.values("pk"))
+            .select_for_update()
+            .select_related("author")
+            .only(
+                "id",
+                "title",
+                "status",
+                "priority",
+                "assigned_team_id",
+                "assigned_technician_id",
+                "author__username",
+                "author__email",
+            )
+            .order_by("id")
+        )
+        changed = [
+            ticket
+            for ticket in previous
+            if any(
+                getattr(ticket, field) != value
+                for field, value in changes.items()
+            )
+        ]
+        if not changed:
+            return 0
+        updated_on = timezone.now()
+        Ticket.objects.filter(pk__in=[ticket.pk for ticket in changed]).update(
+            updated_on=updated_on, **changes
+        )
+        counters.tickets_updated(changed, changes)
+        notify_authors(changed, user, site_url)
+        for ticket in changed:
+            for field, value in changes.items():
+                setattr(ticket, field, value)
+            ticket.updated_on = updated_on
+            events.ticket_changed(ticket)
+    return len(changed)
+
+
+def notify_authors(tickets, user, site_url):
+    """Queue one email per ticket author listing their updated tickets.
+
+    Args:
+        tickets (list): Updated tickets (as they were before the update)
+        user (accounts.models.CustomUser): User making the changes
+        site_url (str): Host used to link to the tickets
+    """
+    by_author = {}
+    for ticket in tickets:
+        if ticket.author_id != user.pk and ticket.author.email:
+            by_author.setdefault(ticket.author, []).append(ticket)
+    if not by_author:
+        return
+    # Reload the tickets with their new values and related names
+    updated = Ticket.objects.select_related(
+        "assigned_team", "assigned_technician"
+    ).in_bulk([ticket.pk for ticket in tickets])
+    messages = []
+    for author, author_tickets in by_author.items():
+        context = {
+            "author": author,
+            "tickets": [updated[ticket.pk] for ticket in author_tickets],
+            "site_url": site_url,
+        }
+        message = EmailMultiAlternatives(
+            subject=(
+                f"Support Hub - {len(author_tickets)} of your tickets "
+                "have been updated"
+                if len(author_tickets) > 1
+                else f"Support Hub - {author_tickets[0]}"
+            ),
+            body=render_to_string("email/bulk_update_message.txt", context),
+            from_email=settings.DEFAULT_FROM_EMAIL,
+            to=[author.email],
+        )
+        message.attach_alternative(
+            render_to_string("email/bulk_update_message.html", context),
+            "text/html",
+        )
+        messages.append(message)
+    get_connection().send_messages(messages)
@@ -0,0 +1,31 @@
+"""Context processors for tickets application"""
+
+
+from . import counters
+from .utils import is_user_elevated_role
+
+
+def ticket_counters(request):
+    """Add the open ticket counts shown as navbar badges to the context of
+    every template rendered with a request.
+
+    Counts are read from the per-user counters (see tickets.counters)
+    rather than counted on every page.
+
+    Args:
+        request (HttpRequest): Current request
+
+    Returns:
+        dict: 'my_open_ticket_count' and, for technicians and
+        administrators, 'assigned_open_ticket_count'
+    """
+    user = getattr(request, "user", None)
+    if user is None or not user.is_authenticated:
+        return {}
+    counts = counters.get_counts(user)
+    context = {"my_open_ticket_count": counters.open_count(counts, "authored")}
+    if is_user_elevated_role(user):
+        context["assigned_open_ticket_count"] = counters.open_count(
+            counts, "assigned"
+        )
+    return context
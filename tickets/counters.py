@@ -0,0 +1,231 @@
+"""Per-user ticket counters for tickets application
+
+The number of tickets each user has raised and has been assigned, per
+status, is kept in the TicketCounter table (one row per user, relationship
+and status) so the navbar badges do not need COUNT queries on the ticket
+table on every page:
+
+    - Counters are adjusted with atomic increments when a ticket is
+      created, deleted or changes status, author or assigned technician (see
+      tickets.signals, and tickets.bulk for tickets updated in bulk), in the
+      transaction making the change. Saves that only touch other fields
+      (such as Ticket.set_ticket_updated_now when a comment is posted) leave
+      them alone.
+    - Counters missing (never computed) or counted more than COUNTER_MAX_AGE
+      ago are recomputed for that user with a grouped query.
+    - The 'reconcile_ticket_counters' management command recomputes the
+      counters of every user in bulk, correcting any drift.
+
+Being rows of the database, the counters are shared by every process and
+follow the transactions adjusting them, so an adjustment is never lost or
+applied for a change that is rolled back. Tickets changed without signals
+(QuerySet.update, or directly in the database) and changes committed while
+a user's counters are first computed can still make them drift, until
+COUNTER_MAX_AGE or the reconcile command recomputes them.
+"""
+
+
+import datetime as dt
+from collections import Counter
+from django.db import transaction
+from django.db.models import Count, F
+from django.utils import timezone
+from .models import Ticket, TicketCounter
+
+
+# Ticket foreign keys counted per user
+RELATIONSHIPS = {
+    TicketCounter.RELATIONSHIPS.authored: "author",
+    TicketCounter.RELATIONSHIPS.assigned: "assigned_technician",
+}
+
+# Age after which counters are recomputed, limiting how long any drift from
+# missed updates can last
+COUNTER_MAX_AGE = dt.timedelta(hours=6)
+
+
+def counter_keys():
+    """Return the (relationship, status) tuple of every counter of a
+    user.
+    """
+    return [
+        (relationship, status)
+        for relationship in RELATIONSHIPS
+        for status, _ in Ticket.STATUS
+    ]
+
+
+def compute_counts(user_ids):
+    """Count the tickets of users by relationship and status.
+
+    Args:
+        user_ids (iterable): Ids of the users to count tickets for
+
+    Returns:
+        dict: {(user id, relationship, status): count} for every counter of
+        the users
+    """
+    user_ids = list(user_ids)
+    counts = {
+        (user_id, *key): 0 for user_id in user_ids for key in counter_keys()
+    }
+    for relationship, field in RELATIONSHIPS.items():
+        rows = (
+            Ticket.objects.filter(**{f"{field}__in": user_ids})
+            .values_list(field, "status")
+            .annotate(count=Count("id"))
+            .order_by()
+        )
+        for user_id, status, count in rows:
+            counts[(user_id, relationship, status)] = count
+    return counts
+
+
+def store_counts(counts):
+    """Replace the counters of users with freshly computed counts.
+
+    Args:
+        counts (dict): Counts returned by compute_counts
+    """
+    now = timezone.now()
+    with transaction.atomic():
+        TicketCounter.objects.filter(
+            user_id__in={user_id for user_id, _, _ in counts}
+        ).delete()
+        # Counters stored at the same time by another request are kept
+        TicketCounter.objects.bulk_create(
+            [
+                TicketCounter(
+                    user_id=user_id,
+                    relationship=relationship,
+                    status=status,
+                    count=count,
+                    counted_on=now,
+                )
+                for (user_id, relationship, status), count in counts.items()
+            ],
+            ignore_conflicts=True,
+        )
+
+
+def get_counts(user):
+    """Return the ticket counters of a user, computing them when missing or
+    older than COUNTER_MAX_AGE.
+
+    Args:
+        user (accounts.models.CustomUser): User to get the counters of
+
+    Returns:
+        dict: {relationship: {status: count}}, e.g.
+        {"authored": {"open": 2, ...}, "assigned": {...}}
+    """
+    keys = counter_keys()
+    rows = list(
+        TicketCounter.objects.filter(user=user).values_list(
+            "relationship", "status", "count", "counted_on"
+        )
+    )
+    values = {
+        (relationship, status): count
+        for relationship, status, count, _ in rows
+    }
+    stale_before = timezone.now() - COUNTER_MAX_AGE
+    if len(values) < len(keys) or any(
+        counted_on < stale_before for _, _, _, counted_on in rows
+    ):
+        computed = compute_counts([user.pk])
+        store_counts(computed)
+        values = {key: computed[(user.pk, *key)] for key in keys}
+    counts = {relationship: {} for relationship in RELATIONSHIPS}
+    for relationship, status in keys:
+        counts[relationship][status] = values.get((relationship, status), 0)
+    return counts
+
+
+def open_count(counts, relationship):
+    """Return the number of tickets that are not closed from the counters
+    returned by get_counts.
+    """
+    return sum(
+        count
+        for status, count in counts[relationship].items()
+        if status != Ticket.STATUS.closed
+    )
+
+
+def adjust(user_id, relationship, status, delta):
+    """Adjust a single counter with an atomic update. Counters that were
+    never computed are left to be computed when first read.
+    """
+    if user_id is None or status is None:
+        return
+    TicketCounter.objects.filter(
+        user_id=user_id, relationship=relationship, status=status
+    ).update(count=F("count") + delta)
+
+
+def ticket_saved(ticket, created):
+    """Move a saved ticket between counters, using its field tracker to find
+    the author, technician and status it was counted under before.
+    """
+    fields = ["status"] + [
+        f"{field}_id" for field in RELATIONSHIPS.values()
+    ]
+    previous = {
+        field: None if created else ticket.tracker.previous(field)
+        for field in fields
+    }
+    current = {field: getattr(ticket, field) for field in fields}
+    for relationship, field in RELATIONSHIPS.items():
+        before = (previous[f"{field}_id"], previous["status"])
+        after = (current[f"{field}_id"], current["status"])
+        if before != after:
+            adjust(before[0], relationship, before[1], -1)
+            adjust(after[0], relationship, after[1], 1)
+
+
+def tickets_updated(previous, changes):
+    """Move tickets updated in bulk with QuerySet.update (which sends no
+    signals) between counters, with one increment per counter changed.
+
+    Args:
+        previous (iterable): Ticket objects as they were before the update
+        changes (dict): {field attribute name: value} the tickets were
+        updated with
+    """
+    deltas = Counter()
+    for ticket in previous:
+        status = changes.get("status", ticket.status)
+        for relationship, field in RELATIONSHIPS.items():
+            before = (getattr(ticket, f"{field}_id"), ticket.status)
+            after = (changes.get(f"{field}_id", before[0]), status)
+            if before != after:
+                deltas[(before[0], relationship, before[1])] -= 1
+                deltas[(after[0], relationship, after[1])] += 1
+    for (user_id, relationship, status), delta in deltas.items():
+        if delta:
+            adjust(user_id, relationship, status, delta)
+
+
+def ticket_deleted(ticket):
+    """Remove a deleted ticket from the counters it was counted under."""
+    for relationship, field in RELATIONSHIPS.items():
+        adjust(
+            getattr(ticket, f"{field}_id"), relationship, ticket.status, -1
+        )
+
+
+def reconcile(user_ids, batch_size=500):
+    """Recompute and store the counters of users in batches.
+
+    Args:
+        user_ids (iterable): Ids of the users to recompute
+        batch_size (int, optional): Number of users counted per query
+
+    Returns:
+        int: Number of users reconciled
+    """
+    user_ids = list(user_ids)
+    for start in range(0, len(user_ids), batch_size):
+        store_counts(compute_counts(user_ids[start:start + batch_size]))
+    return len(user_ids)
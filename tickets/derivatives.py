@@ -0,0 +1,221 @@
+"""Image derivatives for tickets application
+
+Ticket images are shown inline as resized derivatives (in WebP, with a JPEG
+fallback) rather than at full size:
+
+    - Images stored locally (see tickets.storage) have their derivatives
+      generated by a pool of worker processes, off the request path, when
+      the image is saved or first displayed. Derivatives are stored next to
+      the image, named after its content hash and the derivative, e.g.
+      '9f/86/9f86d08...0a08.thumbnail.webp', and are only shown once they
+      exist.
+    - Images stored in Cloudinary use Cloudinary's URL transformations.
+
+Derivatives are re-encoded after applying the EXIF orientation of the
+image, so they carry no EXIF metadata (such as camera GPS positions).
+"""
+
+
+import logging
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from django.conf import settings
+from PIL import Image, ImageOps
+from .fields import LocalAttachment
+from .storage import ContentAddressedStorage
+
+
+logger = logging.getLogger(__name__)
+
+# Maximum width and height in pixels of each derivative
+SIZES = {
+    "thumbnail": 320,
+    "preview": 1280,
+}
+
+# Formats every derivative is generated in, by extension
+FORMATS = {
+    "webp": "WEBP",
+    "jpeg": "JPEG",
+}
+
+QUALITY = 80
+
+_executor = None
+_executor_lock = threading.Lock()
+# {image name: Future} of the derivatives being generated by this process'
+# pool
+_scheduled = {}
+
+
+def derivative_name(name, size, extension):
+    """Return the storage name of a derivative of a locally stored image."""
+    return f"{os.path.splitext(name)[0]}.{size}.{extension}"
+
+
+def derivative_names(name):
+    """Return every derivative storage name of a locally stored image, mapped
+    to the (maximum size, Pillow format) it is generated with.
+    """
+    return {
+        derivative_name(name, size, extension): (SIZES[size], image_format)
+        for size in SIZES
+        for extension, image_format in FORMATS.items()
+    }
+
+
+def render_derivatives(source, targets):
+    """Generate derivatives of an image. Run in a worker process, so only
+    takes file paths.
+
+    Each derivative is written to a temporary file and moved into place, so
+    a derivative that exists is always complete.
+
+    Args:
+        source (str): Path of the image
+        targets (list): (path, maximum size, Pillow format) of each
+        derivative to generate
+
+    Returns:
+        list: Paths of the derivatives generated
+    """
+    with Image.open(source) as original:
+        image = ImageOps.exif_transpose(original)
+    if image.mode not in ("RGB", "RGBA"):
+        transparent = (
+            image.mode in ("LA", "PA") or "transparency" in image.info
+        )
+        image = image.convert("RGBA" if transparent else "RGB")
+    for path, max_size, image_format in targets:
+        derivative = image.copy()
+        derivative.thumbnail((max_size, max_size))
+        if image_format == "JPEG" and derivative.mode != "RGB":
+            derivative = derivative.convert("RGB")
+        temporary = f"{path}.{os.getpid()}.tmp"
+        derivative.save(temporary, image_format, quality=QUALITY)
+        os.replace(temporary, path)
+    return [path for path, _, _ in targets]
+
+
+def get_executor():
+    """Return the process pool generating derivatives, started on first use.
+
+    Workers are spawned rather than forked, so they do not inherit the
+    threads and database connections of the web process.
+    """
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ProcessPoolExecutor(
+                max_workers=settings.DERIVATIVE_WORKERS,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        return _executor
+
+
+def derivatives_finished(name, future):
+    _scheduled.pop(name, None)
+    error = future.exception()
+    if error:
+        logger.error(
+            "Generating the derivatives of %s failed: %s", name, error
+        )
+
+
+def schedule_derivatives(attachment):
+    """Generate the missing derivatives of a locally stored image in the
+    process pool, unless they are already being generated.
+
+    With DERIVATIVE_WORKERS set to 0 they are generated straight away
+    instead.
+
+    Args:
+        attachment (tickets.fields.LocalAttachment): Image
+
+    Returns:
+        Future: Generation of the derivatives (possibly scheduled earlier),
+        or None if there was nothing to generate
+    """
+    storage = ContentAddressedStorage()
+    targets = [
+        (storage.path(name), max_size, image_format)
+        for name, (max_size, image_format) in derivative_names(
+            attachment.name
+        ).items()
+        if not storage.exists(name)
+    ]
+    if not targets:
+        return None
+    if attachment.name in _scheduled:
+        return _scheduled[attachment.name]
+    source = storage.path(attachment.name)
+    if not settings.DERIVATIVE_WORKERS:
+        render_derivatives(source, targets)
+        return None
+    future = get_executor().submit(render_derivatives, source, targets)
+    _scheduled[attachment.name] = future
+    future.add_done_callback(
+        lambda future: derivatives_finished(attachment.name, future)
+    )
+    return future
+
+
+def local_derivative_urls(attachment, size):
+    storage = ContentAddressedStorage()
+    names = {
+        extension: derivative_name(attachment.name, size, extension)
+        for extension in FORMATS
+    }
+    if not all(storage.exists(name) for name in names.values()):
+        schedule_derivatives(attachment)
+        return None
+    return {extension: storage.url(name) for extension, name in names.items()}
+
+
+def cloudinary_derivative_urls(resource, size):
+    return {
+        extension: resource.build_url(
+            width=SIZES[size],
+            height=SIZES[size],
+            crop="limit",
+            format=extension,
+            quality="auto",
+            secure=True,
+        )
+        for extension in FORMATS
+    }
+
+
+def get_derivative_urls(image, size):
+    """Return the URLs of the derivatives of a ticket image.
+
+    Args:
+        image (LocalAttachment or CloudinaryResource): Ticket image
+        size (str): Derivative size, one of SIZES
+
+    Returns:
+        dict: {extension: URL} of the derivative in each of FORMATS, or None
+        if the image has no derivatives ready yet
+    """
+    if not image:
+        return None
+    if isinstance(image, LocalAttachment):
+        return local_derivative_urls(image, size)
+    return cloudinary_derivative_urls(image, size)
+
+
+def derivatives_ready(image, size):
+    """Return whether the derivatives of a ticket image are ready to be
+    shown, for the validators of the pages showing them: a page rendered
+    while they were being generated changes once they are ready.
+
+    Args:
+        image (LocalAttachment or CloudinaryResource): Ticket image
+        size (str): Derivative size, one of SIZES
+
+    Returns:
+        bool: Whether get_derivative_urls returns the derivatives' URLs
+    """
+    return get_derivative_urls(image, size) is not None
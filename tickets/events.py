@@ -0,0 +1,226 @@
+"""Live ticket events for tickets application
+
+Changes to tickets and new comments are published as events once the
+transaction making them commits (see tickets.signals, and tickets.bulk for
+tickets updated in bulk). Events go through the broker selected with the
+TICKET_EVENT_BROKER setting and are streamed to the browsers of the users
+who can see the ticket as server-sent events (see tickets.sse), so open
+ticket pages update in place instead of being reloaded.
+
+    ticket-changed - A ticket was created or saved: its id, title, status
+                     and 'updated_on'.
+    comment-added  - A comment was posted: its ticket id, comment id and the
+                     rendered comment markup.
+
+The default InProcessBroker delivers events to the streams served by the
+process the change was made in, which suits a single ASGI worker process.
+When the WEB_CONCURRENCY setting counts several processes, live events are
+only streamed with a broker shared between them (see 'live_events_enabled'),
+implementing BaseBroker with 'shared' set; pages otherwise work without live
+updates, as they do under WSGI.
+"""
+
+
+import abc
+import asyncio
+import itertools
+import json
+import threading
+from django.conf import settings
+from django.db import transaction
+from django.template.loader import render_to_string
+from django.utils.module_loading import import_string
+
+
+DEFAULT_BROKER = "tickets.events.InProcessBroker"
+
+# Events kept for a subscriber that is not reading them fast enough, after
+# which it is told to reload instead
+MAX_QUEUED_EVENTS = 100
+
+
+class TicketEvent:
+    """An event about a ticket, visible to the users who can see the ticket.
+
+    Args:
+        event_type (str): 'ticket-changed' or 'comment-added'
+        ticket_id (int): Id of the ticket
+        ticket_author_id (int): Id of the ticket's author, who can see the
+        event along with the elevated users
+        data (dict): JSON serializable event data
+    """
+
+    def __init__(self, event_type, ticket_id, ticket_author_id, data):
+        self.event_type = event_type
+        self.ticket_id = ticket_id
+        self.ticket_author_id = ticket_author_id
+        self.data = data
+        self.id = None
+
+    def __repr__(self):
+        return f"<TicketEvent {self.event_type} #{self.ticket_id}>"
+
+    def is_visible_to(self, user_id, elevated):
+        return elevated or self.ticket_author_id == user_id
+
+    def encode(self):
+        """Return the event in the server-sent events wire format."""
+        return (
+            f"id: {self.id}\n"
+            f"event: {self.event_type}\n"
+            f"data: {json.dumps(self.data)}\n\n"
+        ).encode()
+
+
+class BaseBroker(abc.ABC):
+    """Delivers published events to subscribers.
+
+    'publish' is called from the (synchronous) code changing tickets, in any
+    thread. 'subscribe' is called from the event loop serving an event
+    stream and returns an object with an async 'get(timeout)' method,
+    returning the next event or None after 'timeout' seconds without one,
+    and a 'close()' method.
+
+    'shared' is True for brokers delivering the events published in any
+    process to the subscribers of every process.
+    """
+
+    shared = False
+
+    @abc.abstractmethod
+    def publish(self, event):
+        """Deliver an event to the current subscribers."""
+
+    @abc.abstractmethod
+    def subscribe(self):
+        """Return a new subscription to the events published from now on."""
+
+
+class Subscription:
+    """Queue of the events of one subscriber of the InProcessBroker, filled
+    from any thread and read from the subscriber's event loop.
+    """
+
+    def __init__(self, broker, loop, max_queued=MAX_QUEUED_EVENTS):
+        self.broker = broker
+        self.loop = loop
+        self.queue = asyncio.Queue(max_queued)
+        # Set when events had to be dropped because the queue was full
+        self.overflowed = False
+
+    def put(self, event):
+        try:
+            self.loop.call_soon_threadsafe(self._put, event)
+        except RuntimeError:
+            # The subscriber's event loop has been closed
+            self.close()
+
+    def _put(self, event):
+        try:
+            self.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            self.overflowed = True
+
+    async def get(self, timeout):
+        try:
+            return await asyncio.wait_for(self.queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+    def close(self):
+        self.broker.unsubscribe(self)
+
+
+class InProcessBroker(BaseBroker):
+    """Broker delivering events to the subscribers of this process."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._subscriptions = set()
+        self._ids = itertools.count(1)
+
+    def publish(self, event):
+        with self._lock:
+            event.id = next(self._ids)
+            subscriptions = list(self._subscriptions)
+        for subscription in subscriptions:
+            subscription.put(event)
+
+    def subscribe(self):
+        subscription = Subscription(self, asyncio.get_running_loop())
+        with self._lock:
+            self._subscriptions.add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            self._subscriptions.discard(subscription)
+
+
+_brokers = {}
+_brokers_lock = threading.Lock()
+
+
+def get_broker():
+    """Return the broker selected with TICKET_EVENT_BROKER, created on first
+    use and shared by the whole process.
+
+    Returns:
+        BaseBroker: Event broker
+    """
+    path = getattr(settings, "TICKET_EVENT_BROKER", DEFAULT_BROKER)
+    with _brokers_lock:
+        if path not in _brokers:
+            _brokers[path] = import_string(path)()
+        return _brokers[path]
+
+
+def live_events_enabled():
+    """Return whether live events can be streamed: always with a broker
+    shared between processes, otherwise only when a single process serves
+    the site, so that every stream receives every event.
+    """
+    return get_broker().shared or settings.WEB_CONCURRENCY <= 1
+
+
+def publish_on_commit(event):
+    """Publish an event once the current transaction commits, so events are
+    never sent for changes that are rolled back.
+    """
+    transaction.on_commit(lambda: get_broker().publish(event))
+
+
+def ticket_changed(ticket):
+    """Publish a 'ticket-changed' event for a saved ticket."""
+    publish_on_commit(
+        TicketEvent(
+            "ticket-changed",
+            ticket.pk,
+            ticket.author_id,
+            {
+                "id": ticket.pk,
+                "title": ticket.title,
+                "status": ticket.status,
+                "status_display": ticket.get_status_display(),
+                "updated_on": ticket.updated_on.isoformat(),
+            },
+        )
+    )
+
+
+def comment_added(comment, ticket_author_id):
+    """Publish a 'comment-added' event for a new comment, with the comment
+    rendered as it is on the ticket detail page.
+    """
+    publish_on_commit(
+        TicketEvent(
+            "comment-added",
+            comment.ticket_id,
+            ticket_author_id,
+            {
+                "ticket_id": comment.ticket_id,
+                "comment_id": comment.pk,
+                "html": render_to_string("comment.html", {"comment": comment}),
+            },
+        )
+    )
@@ -0,0 +1,83 @@
+"""Custom model fields for tickets application"""
+
+
+from cloudinary.models import CloudinaryField
+from django.core.files.uploadedfile import UploadedFile
+from metrics.recording import timed
+from .storage import ContentAddressedStorage, local_attachments_enabled
+
+
+class LocalAttachment:
+    """Attachment stored by ContentAddressedStorage, the local counterpart of
+    the CloudinaryResource values of a CloudinaryField.
+    """
+
+    # Prefix of local attachment names stored in the database, telling them
+    # apart from Cloudinary resources
+    PREFIX = "local:"
+
+    def __init__(self, name):
+        self.name = name
+
+    def __str__(self):
+        return self.name
+
+    def __bool__(self):
+        return bool(self.name)
+
+    def __eq__(self, other):
+        return isinstance(other, LocalAttachment) and other.name == self.name
+
+    def __hash__(self):
+        return hash(self.name)
+
+    @property
+    def url(self):
+        return ContentAddressedStorage().url(self.name)
+
+    def get_prep_value(self):
+        return f"{self.PREFIX}{self.name}"
+
+
+class AttachmentField(CloudinaryField):
+    """CloudinaryField storing new uploads with ContentAddressedStorage when
+    LOCAL_ATTACHMENTS is set.
+
+    Values stored locally are read as LocalAttachment objects, and values
+    uploaded to Cloudinary as CloudinaryResource objects, whichever storage
+    is currently selected, so switching storage keeps existing attachments
+    working.
+    """
+
+    def to_python(self, value):
+        if isinstance(value, LocalAttachment):
+            return value
+        if isinstance(value, str) and value.startswith(LocalAttachment.PREFIX):
+            return LocalAttachment(value[len(LocalAttachment.PREFIX):])
+        return super().to_python(value)
+
+    def from_db_value(self, value, expression, connection, *args, **kwargs):
+        if value is None:
+            return value
+        return self.to_python(value)
+
+    def pre_save(self, model_instance, add):
+        value = getattr(model_instance, self.attname)
+        if isinstance(value, UploadedFile) and local_attachments_enabled():
+            if hasattr(value, "seekable") and value.seekable():
+                value.seek(0)
+            attachment = LocalAttachment(
+                ContentAddressedStorage().save(value.name, value)
+            )
+            setattr(model_instance, self.attname, attachment)
+            return attachment.get_prep_value()
+        if isinstance(value, UploadedFile):
+            # Uploaded to Cloudinary by CloudinaryField
+            with timed("cloudinary"):
+                return super().pre_save(model_instance, add)
+        return super().pre_save(model_instance, add)
+
+    def get_prep_value(self, value):
+        if isinstance(value, LocalAttachment):
+            return value.get_prep_value()
+        return super().get_prep_value(value)
@@ -2,7 +2,10 @@
 
 
 import django_filters
+from accounts.search import match_user_ids
 from .models import Ticket
+from .search import get_search_backend
+from .utils import ASSIGNABLE_ROLES
 
 
 # CREDIT: Filtering adapted from The Dumbfounds: Django Filtering System with
@@ -23,6 +26,13 @@ class CustomerTicketFilter(django_filters.FilterSet):
         ("ascending_updated_on", "Updated Date - Ascending"),
     )
 
+    # search form field. Matches ticket titles, descriptions and comments
+    # using the database full-text search (see tickets.search)
+    search = django_filters.CharFilter(
+        label="Search",
+        method="get_queryset_from_search",
+    )
+
     # filter_by_status form field. Set the field label, choices to be
     # presented to the user and the filter method to be used
     filter_by_status = django_filters.ChoiceFilter(
@@ -42,10 +52,39 @@ class CustomerTicketFilter(django_filters.FilterSet):
     class Meta:
         model = Ticket
         fields = (
+            "search",
             "filter_by_status",
             "order_by_creation_date",
         )
 
+    def get_queryset_from_search(self, queryset, name, value):
+        """Return queryset of tickets matching the search terms in value.
+
+        Results are ordered by relevance unless a date ordering has also been
+        selected.
+
+        Args:
+            queryset (QuerySet): Current queryset based on applied filters
+            name (str): Form field name
+            value (str): Search terms entered by the user
+
+        Returns:
+            QuerySet: Manipulated queryset annotated with 'search_rank'
+        """
+        queryset = get_search_backend().search(queryset, value)
+        if self.form.cleaned_data.get("order_by_creation_date"):
+            return queryset
+        return queryset.order_by("-search_rank")
+
+    @property
+    def search_terms(self):
+        """Search terms entered in the search field (empty string if the
+        field was not used).
+        """
+        if not self.is_bound or not self.is_valid():
+            return ""
+        return self.form.cleaned_data.get("search") or ""
+
     def get_queryset_from_status(self, queryset, name, value):
         """Return queryset based on value param from STATUS_FILTERING_CHOICES.
 
@@ -97,12 +136,16 @@ class ElevatedUserTicketFilter(CustomerTicketFilter, django_filters.FilterSet):
 
     ASSIGNEE_CHOICES = (("me", "Me"), ("all", "All"))
 
+    # Username filters resolve the (possibly misspelled) username to user ids
+    # using trigram matching (see accounts.search) and then filter tickets by
+    # foreign key
     author__username = django_filters.CharFilter(
-        lookup_expr="icontains", label="Requestor Username"
+        label="Requestor Username", method="get_queryset_from_username"
     )
 
     assigned_technician__username = django_filters.CharFilter(
-        lookup_expr="icontains", label="Assigned Technician Username"
+        label="Assigned Technician Username",
+        method="get_queryset_from_username",
     )
 
     title = django_filters.CharFilter(
@@ -154,3 +197,23 @@ class ElevatedUserTicketFilter(CustomerTicketFilter, django_filters.FilterSet):
             return queryset.filter(assigned_technician=self.user)
         else:
             return queryset.all()
+
+    def get_queryset_from_username(self, queryset, name, value):
+        """Return queryset of tickets whose user (author or assigned
+        technician, based on the name param) has a username matching value.
+
+        Args:
+            queryset (QuerySet): Current queryset based on applied filters
+            name (str): Filter field name, e.g. 'author__username'
+            value (str): Username (or part of one) entered by the user
+
+        Returns:
+            QuerySet: Manipulated queryset
+        """
+        field = name.split("__")[0]
+        if field == "assigned_technician":
+            roles = ASSIGNABLE_ROLES
+        else:
+            roles = None
+        user_ids = match_user_ids(value, roles=roles)
+        return queryset.filter(**{f"{field}__in": user_ids})
@@ -5,7 +5,8 @@ from django import forms
 from django_summernote.fields import SummernoteWidget
 from crispy_forms.helper import FormHelper
 from accounts.models import CustomUser
-from .models import Comment, Ticket
+from .models import Comment, Team, Ticket
+from .utils import ASSIGNABLE_ROLES
 
 
 class CustomerTicketUpdateForm(forms.ModelForm):
@@ -68,7 +69,7 @@ class ElevatedUserTicketForm(CustomerTicketCreationForm, forms.ModelForm):
         super(ElevatedUserTicketForm, self).__init__(*args, **kwargs)
         self.fields[
             "assigned_technician"
-        ].queryset = CustomUser.objects.filter(role="technician")
+        ].queryset = CustomUser.objects.filter(role__in=ASSIGNABLE_ROLES)
 
     class Meta(CustomerTicketCreationForm):
         model = Ticket
@@ -93,6 +94,56 @@ class ElevatedUserTicketForm(CustomerTicketCreationForm, forms.ModelForm):
     ] + CustomerTicketCreationForm.field_order
 
 
+class BulkTicketUpdateForm(forms.Form):
+    """Bulk Ticket Update Form for users with elevated roles.
+
+    Applies the same status, priority, team and technician to the selected
+    tickets (see tickets.bulk). Fields left blank are not changed.
+    """
+
+    NO_CHANGE = [("", "No change")]
+
+    tickets = forms.ModelMultipleChoiceField(
+        queryset=Ticket.objects.all(),
+        error_messages={"required": "Select the tickets to update."},
+    )
+    status = forms.ChoiceField(
+        choices=NO_CHANGE + list(Ticket.STATUS), required=False
+    )
+    priority = forms.ChoiceField(
+        choices=NO_CHANGE + list(Ticket.PRIORITY), required=False
+    )
+    assigned_team = forms.ModelChoiceField(
+        queryset=Team.objects.all(), required=False, empty_label="No change"
+    )
+    assigned_technician = forms.ModelChoiceField(
+        queryset=CustomUser.objects.filter(role__in=ASSIGNABLE_ROLES),
+        required=False,
+        empty_label="No change",
+    )
+
+    def clean(self):
+        cleaned_data = super().clean()
+        if not self.get_changes():
+            raise forms.ValidationError("Choose at least one change to make.")
+        return cleaned_data
+
+    def get_changes(self):
+        """Return the changes chosen.
+
+        Returns:
+            dict: {ticket field attribute name: value} of each field set
+        """
+        changes = {}
+        for field in ("status", "priority"):
+            if self.cleaned_data.get(field):
+                changes[field] = self.cleaned_data[field]
+        for field in ("assigned_team", "assigned_technician"):
+            if self.cleaned_data.get(field):
+                changes[f"{field}_id"] = self.cleaned_data[field].pk
+        return changes
+
+
 class CommentForm(forms.ModelForm):
     """Ticket Comment Form for all users."""
 
@@ -0,0 +1,161 @@
+"""Versioned template fragment cache for tickets application
+
+Rendered ticket fragments (the ticket list cards and the ticket detail
+header) are cached under a key built from the ticket's primary key and
+'updated_on' value and the viewer's role. Every save path (the update view,
+the admin site, Ticket.set_ticket_updated_now when a comment is posted)
+sets a new 'updated_on', so edited tickets are looked up under a new key and
+stale entries simply expire.
+
+Changes that alter rendered fragments without touching 'updated_on' (such as
+renaming a team or a user, or re-rendering descriptions with the backfill
+command) call 'bump_generation', which invalidates every cached fragment.
+
+The generation and the hit and miss counters are kept in the default cache,
+shared by every process, so a bump made by a management command reaches the
+web processes. The fragments themselves are kept in the 'fragments' cache
+local to each process (see CACHES in support_hub/settings.py), as they are
+read many times per page and are stored with the generation they were
+rendered under, which is checked against the shared one.
+
+Hits and misses are counted in process and added to the shared counters
+every FLUSH_EVERY lookups (see 'get_stats' and the 'fragment_cache_stats'
+management command).
+"""
+
+
+import threading
+import time
+from django.conf import settings
+from django.core.cache import cache, caches
+
+
+KEY_PREFIX = "ticketfragment"
+GENERATION_KEY = f"{KEY_PREFIX}:generation"
+HITS_KEY = f"{KEY_PREFIX}:hits"
+MISSES_KEY = f"{KEY_PREFIX}:misses"
+
+# Number of lookups counted in process before they are added to the shared
+# counters
+FLUSH_EVERY = 50
+
+# Alias of the cache holding the rendered fragments
+FRAGMENT_CACHE = "fragments"
+
+_lock = threading.Lock()
+_pending = {"hits": 0, "misses": 0}
+
+
+def get_timeout():
+    return getattr(settings, "TICKET_FRAGMENT_CACHE_TIMEOUT", 60 * 60 * 24)
+
+
+def get_fragment_cache():
+    """Return the cache of the rendered fragments of this process."""
+    return caches[FRAGMENT_CACHE]
+
+
+def start_generation():
+    """Store a new generation, returning the current one.
+
+    Generations start from the current time in milliseconds rather than 1,
+    so a generation evicted from the shared cache is never restarted at a
+    value fragments (or ETags) were already built with.
+    """
+    start = int(time.time() * 1000)
+    cache.add(GENERATION_KEY, start, timeout=None)
+    return cache.get(GENERATION_KEY, start)
+
+
+def get_generation():
+    """Return the current fragment generation, starting it if needed."""
+    generation = cache.get(GENERATION_KEY)
+    if generation is None:
+        generation = start_generation()
+    return generation
+
+
+def bump_generation():
+    """Invalidate every cached ticket fragment."""
+    try:
+        cache.incr(GENERATION_KEY)
+    except ValueError:
+        # No generation has been stored yet, so nothing is cached under one
+        start_generation()
+
+
+def make_key(name, ticket, role):
+    """Return the cache key of fragment 'name' of a ticket for a role.
+
+    Args:
+        name (str): Fragment name, unique per template block
+        ticket (tickets.models.Ticket): Ticket rendered by the fragment
+        role (str): Role of the user viewing the fragment
+
+    Returns:
+        str: Cache key
+    """
+    return (
+        f"{KEY_PREFIX}:{name}:{ticket.pk}:"
+        f"{ticket.updated_on.timestamp():.6f}:{role}"
+    )
+
+
+def record(hit):
+    """Count a fragment lookup, flushing the counts to the cache every
+    FLUSH_EVERY lookups.
+    """
+    with _lock:
+        _pending["hits" if hit else "misses"] += 1
+        if _pending["hits"] + _pending["misses"] < FLUSH_EVERY:
+            return
+        counts = dict(_pending)
+        _pending.update(hits=0, misses=0)
+    _add_counts(counts)
+
+
+def _add_counts(counts):
+    for key, count in (
+        (HITS_KEY, counts["hits"]),
+        (MISSES_KEY, counts["misses"]),
+    ):
+        if not count:
+            continue
+        if not cache.add(key, count, timeout=None):
+            try:
+                cache.incr(key, count)
+            except ValueError:
+                cache.set(key, count, timeout=None)
+
+
+def flush_stats():
+    """Add the counts of this process to the shared counters."""
+    with _lock:
+        counts = dict(_pending)
+        _pending.update(hits=0, misses=0)
+    _add_counts(counts)
+
+
+def get_stats():
+    """Return the fragment cache hit and miss counts and the hit rate.
+
+    Returns:
+        dict: 'hits', 'misses' and 'hit_rate' (0 - 1, None when there have
+        been no lookups)
+    """
+    flush_stats()
+    hits = cache.get(HITS_KEY, 0)
+    misses = cache.get(MISSES_KEY, 0)
+    lookups = hits + misses
+    return {
+        "hits": hits,
+        "misses": misses,
+        "hit_rate": hits / lookups if lookups else None,
+    }
+
+
+def reset_stats():
+    """Reset the shared hit and miss counters."""
+    with _lock:
+        _pending.update(hits=0, misses=0)
+    cache.delete_many([HITS_KEY, MISSES_KEY])
@@ -0,0 +1,156 @@
+"""Deferred deletion of ticket images for tickets application
+
+Deleting a ticket does not call Cloudinary. Instead the 'photo_delete'
+signal receiver records the public id of the ticket image as a
+PendingImageDeletion in the same transaction, so:
+
+    - Deleting tickets (including bulk deletes in the admin and cascades
+      from deleting a user) does not wait on a network round trip per image.
+    - Images are only deleted once the deletion is committed, and are kept
+      if it is rolled back.
+
+'delete_pending_images' is run by the outbox worker (see OUTBOX_WORKER_HOOKS
+in settings) and deletes the recorded images with Cloudinary's bulk
+'delete_resources' API, BATCH_SIZE public ids per call. The API used is set
+by TICKET_IMAGE_DELETION_API, so tests can replace it with a local fake.
+Images that could not be deleted are retried with an exponential backoff,
+and marked as failed after PendingImageDeletion.MAX_ATTEMPTS attempts so
+they are no longer tried (their 'last_error' is kept for inspection).
+
+Images stored locally (see tickets.storage) are deleted once the deletion is
+committed, unless another ticket has the same image.
+"""
+
+
+import logging
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+from django.utils.module_loading import import_string
+from metrics.recording import timed
+from .derivatives import derivative_names
+from .models import PendingImageDeletion, Ticket
+from .storage import ContentAddressedStorage
+
+
+logger = logging.getLogger(__name__)
+
+# Maximum number of public ids accepted by delete_resources
+BATCH_SIZE = 100
+
+# Results of delete_resources meaning an image no longer exists
+DELETED_RESULTS = ("deleted", "not_found")
+
+
+def get_deletion_api():
+    """Return the object providing 'delete_resources', cloudinary.api
+    unless TICKET_IMAGE_DELETION_API names another.
+    """
+    return import_string(
+        getattr(settings, "TICKET_IMAGE_DELETION_API", "cloudinary.api")
+    )
+
+
+def queue_image_deletion(public_id):
+    """Record an image to be deleted once the current transaction commits.
+
+    Args:
+        public_id (str): Cloudinary public id of the image
+    """
+    PendingImageDeletion.objects.create(public_id=public_id)
+
+
+def delete_local_attachment_on_commit(attachment):
+    """Delete a locally stored image and its derivatives once the current
+    transaction commits, if no ticket has it anymore.
+
+    Args:
+        attachment (tickets.fields.LocalAttachment): Image to delete
+    """
+
+    def delete_if_unused():
+        if not Ticket.objects.filter(ticket_image=attachment).exists():
+            storage = ContentAddressedStorage()
+            for name in [attachment.name, *derivative_names(attachment.name)]:
+                storage.delete(name)
+
+    transaction.on_commit(delete_if_unused)
+
+
+def delete_batch(api, batch_size=BATCH_SIZE):
+    """Delete a batch of due images with a single API call.
+
+    Images Cloudinary reports as deleted (or already missing) are removed
+    from the queue. The rest, or the whole batch if the call fails, are
+    tried again later, or marked as failed after MAX_ATTEMPTS (see
+    PendingImageDeletion.mark_failed_attempt).
+
+    Args:
+        api (object): Object providing 'delete_resources'
+        batch_size (int, optional): Maximum number of images deleted
+
+    Returns:
+        tuple: Number of images deleted and number not deleted
+    """
+    with transaction.atomic():
+        batch = list(
+            PendingImageDeletion.objects.filter(
+                status=PendingImageDeletion.STATUS.pending,
+                next_attempt_on__lte=timezone.now(),
+            )
+            .select_for_update(skip_locked=True)
+            .order_by("next_attempt_on", "id")[:batch_size]
+        )
+        if not batch:
+            return 0, 0
+        public_ids = list({pending.public_id for pending in batch})
+        try:
+            with timed("cloudinary"):
+                response = api.delete_resources(public_ids)
+            results = response.get("deleted", {})
+            error = "Not deleted"
+        except Exception as api_error:
+            logger.warning("Deleting ticket images failed: %s", api_error)
+            results = {}
+            error = str(api_error)
+        deleted = [
+            pending.pk
+            for pending in batch
+            if results.get(pending.public_id) in DELETED_RESULTS
+        ]
+        PendingImageDeletion.objects.filter(pk__in=deleted).delete()
+        retried = [pending for pending in batch if pending.pk not in deleted]
+        for pending in retried:
+            pending.mark_failed_attempt(
+                results.get(pending.public_id) or error
+            )
+        PendingImageDeletion.objects.bulk_update(
+            retried, ["attempts", "last_error", "status", "next_attempt_on"]
+        )
+    return len(deleted), len(retried)
+
+
+def delete_pending_images(api=None, batch_size=BATCH_SIZE):
+    """Delete every image currently due, in batches.
+
+    Args:
+        api (object, optional): Object providing 'delete_resources',
+        defaults to TICKET_IMAGE_DELETION_API
+        batch_size (int, optional): Number of images deleted per API call
+
+    Returns:
+        int: Number of images deleted
+    """
+    total = 0
+    if not PendingImageDeletion.objects.filter(
+        status=PendingImageDeletion.STATUS.pending,
+        next_attempt_on__lte=timezone.now(),
+    ).exists():
+        return total
+    api = api or get_deletion_api()
+    while True:
+        deleted, retried = delete_batch(api, batch_size)
+        total += deleted
+        if not deleted or deleted + retried < batch_size:
+            break
+    return total
@@ -0,0 +1,500 @@
+"""Bulk ticket import for tickets application
+
+Used by the 'import_tickets' management command to load tickets and
+comments exported from another helpdesk (or by tickets.export) far faster
+than creating them one at a time:
+
+    - Rows are read from CSV or JSON Lines files one at a time.
+    - Batches of rows are validated with the model field validators, and
+      their rich text sanitized and rendered, in a pool of worker processes.
+    - Usernames, teams and categories are resolved to ids with one query per
+      batch for the names not seen before, and cached.
+    - Rows whose id is already taken, by an existing object or an earlier
+      row, are rejected with one query per batch.
+    - Each batch is inserted with bulk_create, keeping the original
+      'created_on' and 'updated_on' dates, and added to the search index.
+"""
+
+
+import csv
+import json
+import multiprocessing
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+from itertools import islice
+from django.contrib.auth import get_user_model
+from django.core.exceptions import ValidationError
+from django.core.management.color import no_style
+from django.db import connection, connections, transaction
+from django.db.models import Max
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from .models import Comment, Team, Ticket, TicketCategory
+from .search import get_search_backend
+
+
+# Columns holding the names of related objects, and the field they set
+TICKET_RELATED_COLUMNS = {
+    "author": "author",
+    "category": "category",
+    "assigned_team": "assigned_team",
+    "assigned_technician": "assigned_technician",
+}
+TICKET_COLUMNS = ("id", "title", "description", "type", "status", "priority")
+COMMENT_COLUMNS = ("id", "body")
+
+
+def read_rows(path, file_format=None):
+    """Yield (line number, row dict) for each row of a CSV or JSON Lines
+    file, reading it one line at a time.
+
+    Args:
+        path (str): File to read
+        file_format (str, optional): 'csv' or 'jsonl', from the file
+        extension by default
+    """
+    file_format = file_format or ("csv" if path.endswith(".csv") else "jsonl")
+    with open(path, newline="") as file:
+        if file_format == "csv":
+            reader = csv.DictReader(file)
+            for row in reader:
+                yield reader.line_num, row
+        else:
+            for line_number, line in enumerate(file, start=1):
+                if not line.strip():
+                    continue
+                try:
+                    row = json.loads(line)
+                except ValueError:
+                    raise ValueError(
+                        f"{path}:{line_number}: Invalid JSON, import stopped."
+                    )
+                yield line_number, row
+
+
+def batched(iterable, size):
+    iterator = iter(iterable)
+    while True:
+        batch = list(islice(iterator, size))
+        if not batch:
+            return
+        yield batch
+
+
+def parse_date(value):
+    """Return an aware datetime from an ISO 8601 string, or None if empty.
+    Dates without a timezone are taken to be in the current timezone.
+    """
+    if not value:
+        return None
+    try:
+        date = parse_datetime(value)
+    except ValueError:
+        date = None
+    if date is None:
+        raise ValidationError(f"Invalid date '{value}'.")
+    if timezone.is_naive(date):
+        date = timezone.make_aware(date)
+    return date
+
+
+def parse_id(value):
+    """Return a ticket id read from a row.
+
+    Raises:
+        ValidationError: If the value is not a positive integer
+    """
+    try:
+        ticket_id = int(value)
+    except (TypeError, ValueError):
+        ticket_id = 0
+    if ticket_id < 1:
+        raise ValidationError(f"Invalid ticket id '{value or ''}'.")
+    return ticket_id
+
+
+def prepare_object(model, row, columns, exclude):
+    """Build an unsaved model object from a row and validate its fields with
+    the model field validators, as a form would.
+
+    Returns:
+        dict: Field values of the object, including the rendered rich text
+        fields and dates
+
+    Raises:
+        ValidationError: If a value is not valid
+    """
+    values = {
+        column: row[column]
+        for column in columns
+        if row.get(column) not in (None, "")
+    }
+    instance = model(**values)
+    instance.clean_fields(exclude=exclude)
+    instance.refresh_rendered_fields()
+    # Values as converted by the field validation, e.g. an 'id' read as text
+    values = {column: getattr(instance, column) for column in values}
+    created_on = parse_date(row.get("created_on")) or timezone.now()
+    values.update(
+        {field: getattr(instance, field) for field in model.RENDERED_FIELDS},
+        created_on=created_on,
+    )
+    if hasattr(instance, "updated_on"):
+        values["updated_on"] = parse_date(row.get("updated_on")) or created_on
+    return values
+
+
+def prepare_ticket_batch(batch):
+    """Validate and render a batch of ticket rows. Run in a worker process.
+
+    Args:
+        batch (list): (line number, row dict) of each row
+
+    Returns:
+        tuple: List of (line number, field values, related names) of the
+        valid rows, and list of (line number, error) of the invalid rows
+    """
+    prepared, errors = [], []
+    exclude = [*TICKET_RELATED_COLUMNS, "ticket_image", "search_vector"]
+    for line_number, row in batch:
+        try:
+            values = prepare_object(Ticket, row, TICKET_COLUMNS, exclude)
+        except ValidationError as error:
+            errors.append((line_number, format_error(error)))
+            continue
+        names = {
+            column: row.get(column) or None
+            for column in TICKET_RELATED_COLUMNS
+        }
+        prepared.append((line_number, values, names))
+    return prepared, errors
+
+
+def prepare_comment_batch(batch):
+    """Validate and render a batch of comment rows. Run in a worker process.
+
+    Returns:
+        tuple: As prepare_ticket_batch, the related names being the ticket
+        id and the author username
+    """
+    prepared, errors = [], []
+    for line_number, row in batch:
+        try:
+            values = prepare_object(
+                Comment,
+                row,
+                COMMENT_COLUMNS,
+                ["ticket", "author", "search_vector"],
+            )
+            ticket_id = parse_id(row.get("ticket"))
+        except ValidationError as error:
+            errors.append((line_number, format_error(error)))
+            continue
+        names = {"ticket": ticket_id, "author": row.get("author") or None}
+        prepared.append((line_number, values, names))
+    return prepared, errors
+
+
+def format_error(error):
+    if hasattr(error, "message_dict"):
+        return "; ".join(
+            f"{field}: {' '.join(messages)}"
+            for field, messages in error.message_dict.items()
+        )
+    return " ".join(error.messages)
+
+
+def prepare_in_pool(batches, prepare, workers):
+    """Yield the result of 'prepare' for each batch, in order, running it in
+    a pool of worker processes with at most two batches per worker queued,
+    so the input is read as it is consumed.
+
+    Workers are forked, so they start with the configured Django project.
+    With 'workers' set to 0 the batches are prepared in this process.
+    """
+    if not workers:
+        for batch in batches:
+            yield prepare(batch)
+        return
+    # Workers do not use the database. Connections are closed so they are
+    # not inherited, unless a transaction is open (as in tests).
+    for database in connections.all():
+        if not database.in_atomic_block:
+            database.close()
+    with ProcessPoolExecutor(
+        max_workers=workers, mp_context=multiprocessing.get_context("fork")
+    ) as pool:
+        pending = deque()
+        for batch in batches:
+            pending.append(pool.submit(prepare, batch))
+            if len(pending) >= workers * 2:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+
+@contextmanager
+def preserve_timestamps(*models):
+    """Stop 'auto_now' and 'auto_now_add' date fields of models from
+    overwriting the dates set on the objects being inserted.
+
+    Changes the model fields for the whole process, so is only used by the
+    single-threaded import command.
+    """
+    fields = [
+        field
+        for model in models
+        for field in model._meta.concrete_fields
+        if getattr(field, "auto_now", False)
+        or getattr(field, "auto_now_add", False)
+    ]
+    saved = [(field, field.auto_now, field.auto_now_add) for field in fields]
+    for field in fields:
+        field.auto_now = field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field, auto_now, auto_now_add in saved:
+            field.auto_now = auto_now
+            field.auto_now_add = auto_now_add
+
+
+class NameCache:
+    """Resolve names of related objects to ids, querying the database once
+    per batch for names not seen before.
+
+    Teams and categories that do not exist are created. Users that do not
+    exist are created without a usable password when 'create_users' is set,
+    otherwise rows referring to them are rejected.
+    """
+
+    def __init__(self, create_users=False):
+        self.create_users = create_users
+        self.ids = {
+            get_user_model(): {},
+            Team: {},
+            TicketCategory: {},
+        }
+        self.lookup_fields = {
+            get_user_model(): "username",
+            Team: "name",
+            TicketCategory: "name",
+        }
+
+    def load(self, model, names):
+        """Cache the ids of the given names of a model, creating any missing
+        that can be created.
+        """
+        ids = self.ids[model]
+        field = self.lookup_fields[model]
+        missing = {name for name in names if name and name not in ids}
+        if not missing:
+            return
+        ids.update(
+            model.objects.filter(**{f"{field}__in": missing}).values_list(
+                field, "id"
+            )
+        )
+        missing -= ids.keys()
+        if not missing:
+            return
+        if model is get_user_model():
+            if not self.create_users:
+                return
+            new_objects = []
+            for name in missing:
+                user = model(username=name)
+                user.set_unusable_password()
+                new_objects.append(user)
+        else:
+            new_objects = [model(**{field: name}) for name in missing]
+        model.objects.bulk_create(new_objects)
+        ids.update(
+            model.objects.filter(**{f"{field}__in": missing}).values_list(
+                field, "id"
+            )
+        )
+
+    def get(self, model, name):
+        """Return the id of a name, None for an empty name.
+
+        Raises:
+            ValidationError: If there is no object with the name
+        """
+        if not name:
+            return None
+        try:
+            return self.ids[model][name]
+        except KeyError:
+            raise ValidationError(
+                f"Unknown {model._meta.verbose_name} '{name}'."
+            )
+
+
+def reject_taken_ids(model, prepared, errors):
+    """Remove the rows whose id is already taken, by an existing object or
+    an earlier row of the batch, adding them to the errors. Earlier batches
+    are inserted before the next one is checked, so their ids are found in
+    the table.
+
+    Args:
+        model (django.db.models.Model): Model the rows are inserted into
+        prepared (list): (line number, field values, related names) of the
+        valid rows of the batch
+        errors (list): (line number, error) of the rejected rows
+
+    Returns:
+        list: Rows of 'prepared' with an id that is free, or without one
+    """
+    ids = {values["id"] for _, values, _ in prepared if "id" in values}
+    if not ids:
+        return prepared
+    taken = set(
+        model.objects.filter(pk__in=ids).values_list("id", flat=True)
+    )
+    kept = []
+    for row in prepared:
+        line_number, values, _ = row
+        object_id = values.get("id")
+        if object_id is not None:
+            if object_id in taken:
+                errors.append(
+                    (
+                        line_number,
+                        f"{model._meta.verbose_name.capitalize()} id "
+                        f"'{object_id}' is already taken.",
+                    )
+                )
+                continue
+            taken.add(object_id)
+        kept.append(row)
+    return kept
+
+
+def import_tickets(rows, names, batch_size=1000, workers=2):
+    """Import ticket rows.
+
+    Args:
+        rows (iterable): (line number, row dict) of each ticket
+        names (NameCache): Cache of related object ids
+        batch_size (int, optional): Rows validated and inserted at a time
+        workers (int, optional): Worker processes validating rows
+
+    Returns:
+        tuple: Number of tickets imported, list of (line number, error) of
+        rejected rows and set of the ids of the users of the tickets
+    """
+    imported, errors, user_ids = 0, [], set()
+    user_model = get_user_model()
+    models = {
+        "author": user_model,
+        "assigned_technician": user_model,
+        "category": TicketCategory,
+        "assigned_team": Team,
+    }
+    for prepared, batch_errors in prepare_in_pool(
+        batched(rows, batch_size), prepare_ticket_batch, workers
+    ):
+        errors.extend(batch_errors)
+        prepared = reject_taken_ids(Ticket, prepared, errors)
+        for column, model in models.items():
+            names.load(model, [row[2][column] for row in prepared])
+        tickets = []
+        for line_number, values, related in prepared:
+            try:
+                related_ids = {
+                    f"{column}_id": names.get(model, related[column])
+                    for column, model in models.items()
+                }
+                if related_ids["author_id"] is None:
+                    raise ValidationError("Missing author.")
+            except ValidationError as error:
+                errors.append((line_number, format_error(error)))
+                continue
+            tickets.append(Ticket(**values, **related_ids))
+            user_ids.update(
+                (related_ids["author_id"],
+                 related_ids["assigned_technician_id"])
+            )
+        with transaction.atomic(), preserve_timestamps(Ticket):
+            created = bulk_insert(Ticket, tickets)
+            get_search_backend().index_tickets(created)
+        imported += len(created)
+    user_ids.discard(None)
+    return imported, errors, user_ids
+
+
+def import_comments(rows, names, batch_size=1000, workers=2):
+    """Import comment rows, whose 'ticket' column is the id of a ticket.
+
+    Returns:
+        tuple: Number of comments imported and list of (line number, error)
+        of rejected rows
+    """
+    imported, errors = 0, []
+    user_model = get_user_model()
+    for prepared, batch_errors in prepare_in_pool(
+        batched(rows, batch_size), prepare_comment_batch, workers
+    ):
+        errors.extend(batch_errors)
+        prepared = reject_taken_ids(Comment, prepared, errors)
+        names.load(user_model, [row[2]["author"] for row in prepared])
+        ticket_ids = set(
+            Ticket.objects.filter(
+                pk__in={row[2]["ticket"] for row in prepared}
+            ).values_list("id", flat=True)
+        )
+        comments = []
+        for line_number, values, related in prepared:
+            try:
+                if related["ticket"] not in ticket_ids:
+                    raise ValidationError(
+                        f"Unknown ticket '{related['ticket']}'."
+                    )
+                author_id = names.get(user_model, related["author"])
+            except ValidationError as error:
+                errors.append((line_number, format_error(error)))
+                continue
+            comments.append(
+                Comment(
+                    **values, ticket_id=related["ticket"], author_id=author_id
+                )
+            )
+        with transaction.atomic(), preserve_timestamps(Comment):
+            created = bulk_insert(Comment, comments)
+            get_search_backend().index_comments(created)
+        imported += len(created)
+    return imported, errors
+
+
+def bulk_insert(model, objects):
+    """Insert objects with bulk_create, making sure they have their ids.
+
+    Databases that do not return the ids of inserted rows (SQLite) have ids
+    given to the objects without one, following the highest id in the table
+    or the batch. Called inside the transaction inserting the batch.
+    """
+    if not connection.features.can_return_rows_from_bulk_insert:
+        next_id = max(
+            model.objects.aggregate(Max("id"))["id__max"] or 0,
+            *[obj.pk for obj in objects if obj.pk is not None],
+            0,
+        ) + 1
+        for obj in objects:
+            if obj.pk is None:
+                obj.pk = next_id
+                next_id += 1
+    return model.objects.bulk_create(objects)
+
+
+def reset_sequences():
+    """Move the id sequences of tickets and comments past any imported ids
+    (PostgreSQL only, other databases do this themselves).
+    """
+    statements = connection.ops.sequence_reset_sql(
+        no_style(), [Ticket, Comment]
+    )
+    with connection.cursor() as cursor:
+        for statement in statements:
+            cursor.execute(statement)
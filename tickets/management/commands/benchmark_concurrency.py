@@ -0,0 +1,234 @@
+"""Benchmark concurrent request throughput of the WSGI and ASGI deployments.
+
+Starts gunicorn serving the site with sync workers (support_hub.wsgi, as the
+Procfile did before ASGI) and with uvicorn workers (support_hub.asgi and
+support_hub/gunicorn_asgi.py) in turn, each on a free local port against the
+configured database, and requests pages as an existing user from many
+concurrent clients, printing the throughput and latency percentiles of each
+deployment.
+
+Usage:
+    python manage.py benchmark_concurrency customer_account \
+        --path /tickets/ --path /tickets/1/ --concurrency 50
+"""
+
+
+import http.client
+import os
+import socket
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from importlib import import_module
+from django.conf import settings
+from django.contrib.auth import (
+    BACKEND_SESSION_KEY,
+    HASH_SESSION_KEY,
+    SESSION_KEY,
+    get_user_model,
+)
+from django.core.management.base import BaseCommand, CommandError
+
+
+# (label, gunicorn arguments)
+SERVERS = {
+    "wsgi": (
+        "WSGI - sync workers",
+        ["support_hub.wsgi:application"],
+    ),
+    "asgi": (
+        "ASGI - uvicorn workers",
+        [
+            "support_hub.asgi:application",
+            "-c",
+            "python:support_hub.gunicorn_asgi",
+        ],
+    ),
+}
+
+# Seconds to wait for a server to accept connections
+STARTUP_TIMEOUT = 30
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def percentile(values, fraction):
+    """Return the value below which 'fraction' of the sorted values fall."""
+    index = min(int(len(values) * fraction), len(values) - 1)
+    return values[index]
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare the concurrent request throughput of the site served with "
+        "WSGI sync workers and with ASGI uvicorn workers."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "username", help="User the pages are requested as."
+        )
+        parser.add_argument(
+            "--path",
+            action="append",
+            dest="paths",
+            help=(
+                "Page requested, may be repeated to request pages in turn "
+                "(default /tickets/)."
+            ),
+        )
+        parser.add_argument(
+            "--requests",
+            type=int,
+            default=500,
+            help="Number of requests per deployment (default 500).",
+        )
+        parser.add_argument(
+            "--concurrency",
+            type=int,
+            default=50,
+            help="Number of concurrent clients (default 50).",
+        )
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=1,
+            help="Number of gunicorn worker processes (default 1).",
+        )
+        parser.add_argument(
+            "--server",
+            action="append",
+            dest="servers",
+            choices=list(SERVERS),
+            help="Deployment to benchmark (default both).",
+        )
+
+    def handle(self, *args, **options):
+        try:
+            user = get_user_model().objects.get(username=options["username"])
+        except get_user_model().DoesNotExist:
+            raise CommandError(f"No user named {options['username']}.")
+        paths = options["paths"] or ["/tickets/"]
+        session = self.login(user)
+        try:
+            for name in options["servers"] or list(SERVERS):
+                label, arguments = SERVERS[name]
+                port = free_port()
+                process = self.start_server(
+                    arguments, port, options["workers"]
+                )
+                try:
+                    self.stdout.write(f"{label}:")
+                    self.benchmark(
+                        port,
+                        session.session_key,
+                        paths,
+                        options["requests"],
+                        options["concurrency"],
+                    )
+                finally:
+                    process.terminate()
+                    process.wait()
+        finally:
+            session.delete()
+
+    def login(self, user):
+        """Return a saved session logging in the user, sent as the session
+        cookie of the requests.
+        """
+        session = import_module(settings.SESSION_ENGINE).SessionStore()
+        session[SESSION_KEY] = str(user.pk)
+        session[BACKEND_SESSION_KEY] = settings.AUTHENTICATION_BACKENDS[0]
+        session[HASH_SESSION_KEY] = user.get_session_auth_hash()
+        session.save()
+        return session
+
+    def start_server(self, arguments, port, workers):
+        """Start gunicorn on a local port and wait until it accepts
+        connections.
+
+        Returns:
+            subprocess.Popen: Server process
+        """
+        environment = dict(os.environ)
+        environment.pop("ASYNC_VIEWS", None)
+        process = subprocess.Popen(
+            [
+                sys.executable,
+                "-m",
+                "gunicorn",
+                *arguments,
+                "--bind",
+                f"127.0.0.1:{port}",
+                "--workers",
+                str(workers),
+                "--log-level",
+                "warning",
+            ],
+            env=environment,
+            cwd=settings.BASE_DIR,
+        )
+        deadline = time.monotonic() + STARTUP_TIMEOUT
+        while time.monotonic() < deadline:
+            if process.poll() is not None:
+                raise CommandError("The server failed to start.")
+            try:
+                socket.create_connection(("127.0.0.1", port), 1).close()
+                return process
+            except OSError:
+                time.sleep(0.2)
+        process.terminate()
+        raise CommandError("The server did not start in time.")
+
+    def benchmark(self, port, session_key, paths, requests, concurrency):
+        """Request the pages from concurrent clients, each keeping its
+        connection open, and print the throughput and latencies.
+        """
+        clients = threading.local()
+        headers = {
+            "Cookie": f"{settings.SESSION_COOKIE_NAME}={session_key}",
+        }
+
+        def request(number):
+            if not hasattr(clients, "connection"):
+                clients.connection = http.client.HTTPConnection(
+                    "127.0.0.1", port, timeout=60
+                )
+            start = time.perf_counter()
+            try:
+                clients.connection.request(
+                    "GET", paths[number % len(paths)], headers=headers
+                )
+                response = clients.connection.getresponse()
+                response.read()
+                status = response.status
+            except (OSError, http.client.HTTPException):
+                clients.connection.close()
+                status = None
+            return time.perf_counter() - start, status
+
+        with ThreadPoolExecutor(concurrency) as executor:
+            # Warm up the workers and open the client connections
+            list(executor.map(request, range(concurrency)))
+            start = time.perf_counter()
+            results = list(executor.map(request, range(requests)))
+            elapsed = time.perf_counter() - start
+
+        latencies = sorted(latency * 1000 for latency, _ in results)
+        errors = sum(1 for _, status in results if status != 200)
+        style = self.style.WARNING if errors else self.style.SUCCESS
+        self.stdout.write(
+            style(
+                f"    {requests / elapsed:.1f} requests/s, "
+                f"p50 {percentile(latencies, 0.5):.1f}ms, "
+                f"p95 {percentile(latencies, 0.95):.1f}ms, "
+                f"max {latencies[-1]:.1f}ms, "
+                f"{errors} errors"
+            )
+        )
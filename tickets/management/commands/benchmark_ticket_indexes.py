@@ -0,0 +1,204 @@
+"""Benchmark the ticket list filter and ordering combinations against the
+ticket indexes.
+
+Seeds a database with generated users and tickets (inside a transaction that
+is rolled back unless --keep is used), then runs the first page query of the
+ticket list for each filter/ordering combination, printing the query plan,
+the execution time and whether the ticket table was read by an index.
+
+Usage:
+    python manage.py benchmark_ticket_indexes --tickets 50000
+"""
+
+
+import random
+import time
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.http import QueryDict
+from tickets.filters import CustomerTicketFilter, ElevatedUserTicketFilter
+from tickets.models import Ticket, Team, TicketCategory
+from tickets.pagination import KeysetPaginator
+
+
+# (label, role, filter query string)
+COMBINATIONS = (
+    ("All tickets", "technician", ""),
+    (
+        "All tickets - created ascending",
+        "technician",
+        "order_by_creation_date=ascending_created_on",
+    ),
+    ("Open tickets", "technician", "filter_by_status=open"),
+    ("Closed tickets", "technician", "filter_by_status=closed"),
+    ("Assigned to me", "technician", "filter_by_assignee=me"),
+    (
+        "Assigned to me - open",
+        "technician",
+        "filter_by_assignee=me&filter_by_status=open",
+    ),
+    ("High priority", "technician", "priority=high"),
+    ("Team", "technician", "assigned_team={team}"),
+    ("Customer - own tickets", "customer", ""),
+    (
+        "Customer - own tickets, created descending",
+        "customer",
+        "order_by_creation_date=descending_created_on",
+    ),
+    ("Customer - own open tickets", "customer", "filter_by_status=open"),
+)
+
+
+class Rollback(Exception):
+    """Raised to discard the seeded data at the end of the benchmark."""
+
+    pass
+
+
+class Command(BaseCommand):
+    help = (
+        "Seed tickets and report the query plan and timing of each ticket "
+        "list filter/ordering combination."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--tickets",
+            type=int,
+            default=20000,
+            help="Number of tickets to seed (default 20000).",
+        )
+        parser.add_argument(
+            "--keep",
+            action="store_true",
+            help="Keep the seeded data instead of rolling it back.",
+        )
+
+    def handle(self, *args, **options):
+        try:
+            with transaction.atomic():
+                technician, customer, team = self.seed(options["tickets"])
+                self.analyze()
+                for label, role, query_string in COMBINATIONS:
+                    self.benchmark(
+                        label,
+                        technician if role == "technician" else customer,
+                        query_string.format(team=team.pk),
+                    )
+                if not options["keep"]:
+                    raise Rollback
+        except Rollback:
+            self.stdout.write("Seeded data rolled back.")
+
+    def seed(self, number_of_tickets):
+        """Create users, teams, categories and tickets with a realistic
+        spread of statuses (most tickets closed).
+
+        Returns:
+            tuple: A technician, a customer and a team to filter by
+        """
+        self.stdout.write(f"Seeding {number_of_tickets} tickets...")
+        user_model = get_user_model()
+        technicians = [
+            user_model.objects.create_user(
+                username=f"benchmark-technician-{number}",
+                role=user_model.ROLES.technician,
+            )
+            for number in range(20)
+        ]
+        customers = [
+            user_model.objects.create_user(
+                username=f"benchmark-customer-{number}",
+                role=user_model.ROLES.customer,
+            )
+            for number in range(500)
+        ]
+        teams = [
+            Team.objects.get_or_create(name=f"Benchmark Team {number}")[0]
+            for number in range(5)
+        ]
+        categories = [
+            TicketCategory.objects.get_or_create(
+                name=f"Benchmark Category {number}"
+            )[0]
+            for number in range(8)
+        ]
+        statuses = ["closed"] * 16 + ["open", "inprogress", "onhold", "open"]
+        priorities = [value for value, _ in Ticket.PRIORITY]
+        types = [value for value, _ in Ticket.TYPE]
+
+        def generate():
+            for number in range(number_of_tickets):
+                yield Ticket(
+                    author=random.choice(customers),
+                    title=f"Benchmark ticket {number}",
+                    description="<p>Benchmark ticket description</p>",
+                    status=random.choice(statuses),
+                    priority=random.choice(priorities),
+                    type=random.choice(types),
+                    category=random.choice(categories),
+                    assigned_team=random.choice(teams + [None]),
+                    assigned_technician=random.choice(technicians + [None]),
+                )
+
+        Ticket.objects.bulk_create(generate(), batch_size=2000)
+        return technicians[0], customers[0], teams[0]
+
+    def analyze(self):
+        """Refresh the planner statistics for the seeded tables."""
+        with connection.cursor() as cursor:
+            if connection.vendor == "postgresql":
+                cursor.execute("ANALYZE tickets_ticket")
+            elif connection.vendor == "sqlite":
+                cursor.execute("ANALYZE")
+
+    def benchmark(self, label, user, query_string):
+        """Print the plan and timing of the first page of the ticket list for
+        a filter combination.
+        """
+        data = QueryDict(query_string)
+        if user.role == "customer":
+            queryset = CustomerTicketFilter(
+                data, queryset=Ticket.objects.filter(author=user)
+            ).qs
+        else:
+            queryset = ElevatedUserTicketFilter(
+                data, user=user, queryset=Ticket.objects.all()
+            ).qs
+        paginator = KeysetPaginator(queryset, 10)
+        page_queryset = queryset.order_by(
+            *[
+                f"-{name}" if descending else name
+                for name, descending in paginator.ordering
+            ]
+        )[:11]
+
+        plan = page_queryset.explain()
+        start = time.perf_counter()
+        list(page_queryset)
+        elapsed = (time.perf_counter() - start) * 1000
+
+        uses_index = self.uses_index(plan)
+        style = self.style.SUCCESS if uses_index else self.style.WARNING
+        self.stdout.write(
+            style(
+                f"{label} [{query_string or 'no filter'}]: {elapsed:.2f}ms "
+                f"- {'index scan' if uses_index else 'SEQUENTIAL SCAN'}"
+            )
+        )
+        for line in plan.splitlines():
+            self.stdout.write(f"    {line}")
+
+    def uses_index(self, plan):
+        """Return True if the ticket table is read through an index in the
+        query plan.
+        """
+        if connection.vendor == "postgresql":
+            return "Seq Scan on tickets_ticket" not in plan
+        # SQLite reports "SCAN tickets_ticket" for a full table scan and
+        # "SEARCH"/"USING INDEX" when an index is used
+        return not any(
+            line.strip().endswith("SCAN tickets_ticket")
+            for line in plan.splitlines()
+        )
@@ -0,0 +1,93 @@
+"""Export the tickets matching a ticket list filter (see
+tickets.filters.ElevatedUserTicketFilter) as CSV or JSON Lines, streaming
+rows from the database so memory use stays flat however many tickets are
+exported (see tickets.export).
+
+Filters are given as the parameters of the ticket list page, e.g.
+'--filter filter_by_status=open --filter priority=high'.
+
+Usage:
+    python manage.py export_tickets [--format csv|jsonl] [--output FILE]
+        [--filter NAME=VALUE ...] [--user USERNAME] [--chunk-size 2000]
+"""
+
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.http import QueryDict
+from tickets import export
+from tickets.filters import ElevatedUserTicketFilter
+from tickets.models import Ticket
+
+
+class Command(BaseCommand):
+    help = "Export the tickets matching a filter as CSV or JSON Lines."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--format",
+            choices=list(export.FORMATS),
+            default="csv",
+            help="Export format (default csv).",
+        )
+        parser.add_argument(
+            "--output",
+            help="File to write the export to (default standard output).",
+        )
+        parser.add_argument(
+            "--filter",
+            action="append",
+            default=[],
+            metavar="NAME=VALUE",
+            help="Ticket list filter parameter, may be repeated.",
+        )
+        parser.add_argument(
+            "--user",
+            help="Username the 'filter_by_assignee=me' filter refers to.",
+        )
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=export.CHUNK_SIZE,
+            help=(
+                "Number of rows fetched and written at a time "
+                f"(default {export.CHUNK_SIZE})."
+            ),
+        )
+
+    def handle(self, *args, **options):
+        data = QueryDict(mutable=True)
+        for parameter in options["filter"]:
+            name, separator, value = parameter.partition("=")
+            if not separator:
+                raise CommandError(
+                    f"Invalid filter '{parameter}', expected NAME=VALUE."
+                )
+            data.appendlist(name, value)
+        user = None
+        if options["user"]:
+            try:
+                user = get_user_model().objects.get(
+                    username=options["user"]
+                )
+            except get_user_model().DoesNotExist:
+                raise CommandError(f"Unknown user '{options['user']}'.")
+        filterset = ElevatedUserTicketFilter(
+            data, user=user, queryset=Ticket.objects.all()
+        )
+        if not filterset.is_valid():
+            raise CommandError(f"Invalid filter: {filterset.errors.as_text()}")
+
+        chunks = export.stream_export(
+            filterset.qs, options["format"], options["chunk_size"]
+        )
+        if options["output"]:
+            with open(options["output"], "w", newline="") as output:
+                for chunk in chunks:
+                    output.write(chunk)
+            self.stderr.write(
+                self.style.SUCCESS(f"Exported tickets to {options['output']}.")
+            )
+        else:
+            for chunk in chunks:
+                self.stdout.write(chunk, ending="")
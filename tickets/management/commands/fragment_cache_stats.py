@@ -0,0 +1,42 @@
+"""Report the hit rate of the ticket fragment cache (see
+tickets.fragment_cache).
+
+Counts are added up in the default cache, shared by every process (see
+CACHES in support_hub/settings.py), so they cover every web process. Each
+process adds its counts every FLUSH_EVERY lookups, so the most recent
+lookups of other processes may not be included yet.
+
+Usage:
+    python manage.py fragment_cache_stats [--reset]
+"""
+
+
+from django.core.management.base import BaseCommand
+from tickets import fragment_cache
+
+
+class Command(BaseCommand):
+    help = "Show the ticket fragment cache hit and miss counts."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--reset",
+            action="store_true",
+            help="Reset the counters after reporting them.",
+        )
+
+    def handle(self, *args, **options):
+        stats = fragment_cache.get_stats()
+        hit_rate = (
+            "n/a"
+            if stats["hit_rate"] is None
+            else f"{stats['hit_rate']:.1%}"
+        )
+        self.stdout.write(
+            f"Hits: {stats['hits']}\n"
+            f"Misses: {stats['misses']}\n"
+            f"Hit rate: {hit_rate}"
+        )
+        if options["reset"]:
+            fragment_cache.reset_stats()
+            self.stdout.write("Counters reset.")
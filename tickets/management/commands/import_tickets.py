@@ -0,0 +1,102 @@
+"""Import tickets, and optionally their comments, from CSV or JSON Lines
+files, such as those written by the 'export_tickets' command (see
+tickets.importer).
+
+Ticket columns: id (optional, kept as the ticket id), title, description,
+type, status, priority, category, author, assigned_team,
+assigned_technician, created_on and updated_on (ISO 8601). Comment columns:
+ticket (ticket id), author, body and created_on.
+
+Rows that are not valid, or whose id is already taken, are skipped and
+reported with their line number.
+
+Usage:
+    python manage.py import_tickets FILE [--format csv|jsonl]
+        [--comments FILE] [--batch-size 1000] [--workers 2]
+        [--create-users]
+"""
+
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import IntegrityError, connection
+from tickets import counters, importer
+
+
+class Command(BaseCommand):
+    help = "Import tickets and comments from CSV or JSON Lines files."
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="Tickets file to import.")
+        parser.add_argument(
+            "--format",
+            choices=["csv", "jsonl"],
+            help="Format of the files (default from the file extension).",
+        )
+        parser.add_argument(
+            "--comments",
+            help="Comments file to import after the tickets.",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=1000,
+            help="Number of rows validated and inserted at a time "
+            "(default 1000).",
+        )
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=2,
+            help="Number of worker processes validating rows, 0 to validate "
+            "them in this process (default 2).",
+        )
+        parser.add_argument(
+            "--create-users",
+            action="store_true",
+            help="Create users that do not exist, without a usable password, "
+            "instead of rejecting their rows.",
+        )
+
+    def handle(self, *args, **options):
+        if options["batch_size"] < 1 or options["workers"] < 0:
+            raise CommandError(
+                "--batch-size must be positive and --workers not negative."
+            )
+        batch_options = {
+            "batch_size": options["batch_size"],
+            "workers": options["workers"],
+        }
+        names = importer.NameCache(create_users=options["create_users"])
+        try:
+            imported, errors, user_ids = importer.import_tickets(
+                importer.read_rows(options["path"], options["format"]),
+                names,
+                **batch_options,
+            )
+            self.report(options["path"], "tickets", imported, errors)
+            if options["comments"]:
+                imported, errors = importer.import_comments(
+                    importer.read_rows(options["comments"], options["format"]),
+                    names,
+                    **batch_options,
+                )
+                self.report(options["comments"], "comments", imported, errors)
+        except (OSError, ValueError) as error:
+            raise CommandError(error)
+        except IntegrityError as error:
+            # Batches already inserted are kept, each is its own transaction
+            raise CommandError(
+                f"A batch could not be inserted, import stopped: {error}"
+            )
+        if connection.vendor == "postgresql":
+            importer.reset_sequences()
+        counters.reconcile(user_ids)
+
+    def report(self, path, label, imported, errors):
+        for line_number, error in sorted(errors):
+            self.stderr.write(f"{path}:{line_number}: {error}")
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Imported {imported} {label}, skipped {len(errors)} rows."
+            )
+        )
@@ -0,0 +1,24 @@
+"""Rebuild the full-text search index of tickets and comments.
+
+Usage:
+    python manage.py rebuild_search_index
+"""
+
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from tickets.search import get_search_backend
+
+
+class Command(BaseCommand):
+    help = "Rebuild the full-text search index of tickets and comments."
+
+    def handle(self, *args, **options):
+        backend = get_search_backend()
+        with transaction.atomic():
+            backend.rebuild()
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Search index rebuilt ({type(backend).__name__})."
+            )
+        )
@@ -0,0 +1,35 @@
+"""Recompute the per-user ticket counters (see tickets.counters) from
+the ticket table, correcting any drift from missed updates (for example
+tickets changed with QuerySet.update or directly in the database).
+
+Usage:
+    python manage.py reconcile_ticket_counters --batch-size 500
+"""
+
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from tickets import counters
+
+
+class Command(BaseCommand):
+    help = "Recompute the ticket counters of every user."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=500,
+            help="Number of users counted per query (default 500).",
+        )
+
+    def handle(self, *args, **options):
+        user_ids = get_user_model().objects.values_list("id", flat=True)
+        reconciled = counters.reconcile(
+            user_ids.iterator(), batch_size=options["batch_size"]
+        )
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Reconciled ticket counters of {reconciled} user(s)."
+            )
+        )
@@ -0,0 +1,92 @@
+# Generated by Django 3.2.14 on 2026-10-18 18:01
+
+import django.contrib.postgres.search
+from django.db import migrations
+from tickets.utils import html_to_text
+
+
+def create_search_index(apps, schema_editor):
+    """Create the full-text search structures for the database in use and
+    index the existing tickets and comments (see tickets.search).
+    """
+    connection = schema_editor.connection
+    if connection.vendor == "postgresql":
+        schema_editor.execute(
+            "CREATE INDEX ticket_search_vector_idx ON tickets_ticket "
+            "USING GIN (search_vector)"
+        )
+        schema_editor.execute(
+            "CREATE INDEX comment_search_vector_idx ON tickets_comment "
+            "USING GIN (search_vector)"
+        )
+        schema_editor.execute(
+            "UPDATE tickets_ticket SET search_vector = "
+            "setweight(to_tsvector('english', coalesce(title, '')), 'A') || "
+            "setweight(to_tsvector('english', coalesce(description, '')), "
+            "'B')"
+        )
+        schema_editor.execute(
+            "UPDATE tickets_comment SET search_vector = "
+            "setweight(to_tsvector('english', coalesce(body, '')), 'C')"
+        )
+    elif connection.vendor == "sqlite":
+        schema_editor.execute(
+            "CREATE VIRTUAL TABLE tickets_ticket_fts USING fts5("
+            "title, description, tokenize = 'porter unicode61')"
+        )
+        schema_editor.execute(
+            "CREATE VIRTUAL TABLE tickets_comment_fts USING fts5("
+            "ticket_id UNINDEXED, body, tokenize = 'porter unicode61')"
+        )
+        Ticket = apps.get_model("tickets", "Ticket")
+        Comment = apps.get_model("tickets", "Comment")
+        with connection.cursor() as cursor:
+            for pk, title, description in Ticket.objects.values_list(
+                "pk", "title", "description"
+            ).iterator():
+                cursor.execute(
+                    "INSERT INTO tickets_ticket_fts "
+                    "(rowid, title, description) VALUES (%s, %s, %s)",
+                    [pk, title, html_to_text(description)],
+                )
+            for pk, ticket_id, body in Comment.objects.values_list(
+                "pk", "ticket_id", "body"
+            ).iterator():
+                cursor.execute(
+                    "INSERT INTO tickets_comment_fts "
+                    "(rowid, ticket_id, body) VALUES (%s, %s, %s)",
+                    [pk, ticket_id, html_to_text(body)],
+                )
+
+
+def drop_search_index(apps, schema_editor):
+    connection = schema_editor.connection
+    if connection.vendor == "postgresql":
+        schema_editor.execute("DROP INDEX IF EXISTS ticket_search_vector_idx")
+        schema_editor.execute(
+            "DROP INDEX IF EXISTS comment_search_vector_idx"
+        )
+    elif connection.vendor == "sqlite":
+        schema_editor.execute("DROP TABLE IF EXISTS tickets_ticket_fts")
+        schema_editor.execute("DROP TABLE IF EXISTS tickets_comment_fts")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tickets', '0015_ticket_comment_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='comment',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='ticket',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 3.2.14 on 2026-10-18 18:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tickets', '0016_ticket_comment_search'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='ticket',
+            name='preview',
+            field=models.CharField(blank=True, editable=False, max_length=130),
+        ),
+    ]
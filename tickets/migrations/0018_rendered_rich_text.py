@@ -0,0 +1,100 @@
+# Generated by Django 3.2.14 on 2026-10-18 18:30
+
+from django.db import migrations, models
+from django.utils.text import Truncator
+from tickets.utils import html_to_text, sanitize_html
+
+
+BATCH_SIZE = 500
+
+
+def update_in_batches(model, objects, fields):
+    """Write objects with bulk_update every BATCH_SIZE objects, so only one
+    batch is held in memory at a time.
+    """
+    batch = []
+    for obj in objects:
+        batch.append(obj)
+        if len(batch) >= BATCH_SIZE:
+            model.objects.bulk_update(batch, fields)
+            batch = []
+    if batch:
+        model.objects.bulk_update(batch, fields)
+
+
+def render_rich_text(apps, schema_editor):
+    """Store sanitized HTML and plain text versions of the existing ticket
+    descriptions and comment bodies, so no unsanitized HTML is rendered
+    after the templates switch to the stored versions.
+    """
+    Ticket = apps.get_model("tickets", "Ticket")
+    Comment = apps.get_model("tickets", "Comment")
+
+    def render_tickets():
+        for ticket in Ticket.objects.only("id", "description").iterator(
+            chunk_size=BATCH_SIZE
+        ):
+            ticket.description_html = sanitize_html(ticket.description)
+            ticket.description_text = html_to_text(ticket.description)
+            ticket.preview = Truncator(ticket.description_text).chars(130)
+            yield ticket
+
+    def render_comments():
+        for comment in Comment.objects.only("id", "body").iterator(
+            chunk_size=BATCH_SIZE
+        ):
+            comment.body_html = sanitize_html(comment.body)
+            comment.body_text = html_to_text(comment.body)
+            yield comment
+
+    update_in_batches(
+        Ticket,
+        render_tickets(),
+        ["description_html", "description_text", "preview"],
+    )
+    update_in_batches(Comment, render_comments(), ["body_html", "body_text"])
+    if schema_editor.connection.vendor == "postgresql":
+        # Search documents are now built from the plain text versions
+        schema_editor.execute(
+            "UPDATE tickets_ticket SET search_vector = "
+            "setweight(to_tsvector('english', coalesce(title, '')), 'A') || "
+            "setweight(to_tsvector('english', "
+            "coalesce(description_text, '')), 'B')"
+        )
+        schema_editor.execute(
+            "UPDATE tickets_comment SET search_vector = "
+            "setweight(to_tsvector('english', coalesce(body_text, '')), 'C')"
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tickets', '0017_ticket_preview'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='ticket',
+            name='description_html',
+            field=models.TextField(blank=True, editable=False),
+        ),
+        migrations.AddField(
+            model_name='ticket',
+            name='description_text',
+            field=models.TextField(blank=True, editable=False),
+        ),
+        migrations.AddField(
+            model_name='comment',
+            name='body_html',
+            field=models.TextField(blank=True, editable=False),
+        ),
+        migrations.AddField(
+            model_name='comment',
+            name='body_text',
+            field=models.TextField(blank=True, editable=False),
+        ),
+        migrations.RunPython(
+            render_rich_text, migrations.RunPython.noop, elidable=True
+        ),
+    ]
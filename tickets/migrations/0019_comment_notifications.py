@@ -0,0 +1,35 @@
+# Generated by Django 3.2.14 on 2026-10-18 18:23
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('tickets', '0018_rendered_rich_text'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CommentNotification',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('ticket_url', models.CharField(max_length=255)),
+                ('send_after', models.DateTimeField()),
+                ('comment', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='notifications', to='tickets.comment')),
+                ('recipient', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='comment_notifications', to=settings.AUTH_USER_MODEL)),
+                ('ticket', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='notifications', to='tickets.ticket')),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='commentnotification',
+            index=models.Index(fields=['send_after'], name='notification_due_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='commentnotification',
+            index=models.Index(fields=['recipient', 'ticket'], name='notification_window_idx'),
+        ),
+    ]
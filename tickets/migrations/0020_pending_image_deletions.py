@@ -0,0 +1,32 @@
+# Generated by Django 3.2.14 on 2026-10-18 18:25
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tickets', '0019_comment_notifications'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PendingImageDeletion',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('public_id', models.CharField(max_length=255)),
+                ('created_on', models.DateTimeField(auto_now_add=True)),
+                ('attempts', models.PositiveSmallIntegerField(default=0)),
+                ('last_error', models.TextField(blank=True)),
+                ('next_attempt_on', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+            options={
+                'ordering': ('id',),
+            },
+        ),
+        migrations.AddIndex(
+            model_name='pendingimagedeletion',
+            index=models.Index(fields=['next_attempt_on', 'id'], name='image_deletion_due_idx'),
+        ),
+    ]
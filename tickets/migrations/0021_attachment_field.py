@@ -0,0 +1,20 @@
+# Generated by Django 3.2.14 on 2026-10-18 18:28
+
+from django.db import migrations
+import tickets.fields
+import tickets.validators
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tickets', '0020_pending_image_deletions'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='ticket',
+            name='ticket_image',
+            field=tickets.fields.AttachmentField(blank=True, help_text="Only 'jpg' or 'png' files permitted. Maximum file size is 3MB.", max_length=255, validators=[tickets.validators.validate_image], verbose_name='image'),
+        ),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 3.2.14 on 2026-10-18 19:26
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tickets', '0021_attachment_field'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='pendingimagedeletion',
+            name='image_deletion_due_idx',
+        ),
+        migrations.AddField(
+            model_name='pendingimagedeletion',
+            name='status',
+            field=models.CharField(choices=[('pending', 'Pending'), ('failed', 'Failed')], default='pending', max_length=7),
+        ),
+        migrations.AddIndex(
+            model_name='pendingimagedeletion',
+            index=models.Index(condition=models.Q(('status', 'pending')), fields=['next_attempt_on', 'id'], name='image_deletion_due_idx'),
+        ),
+    ]
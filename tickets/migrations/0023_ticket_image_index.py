@@ -0,0 +1,17 @@
+# Generated by Django 3.2.14 on 2026-10-18 19:27
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tickets', '0022_pending_image_deletion_status'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='ticket',
+            index=models.Index(fields=['ticket_image'], name='ticket_image_idx', opclasses=['varchar_pattern_ops']),
+        ),
+    ]
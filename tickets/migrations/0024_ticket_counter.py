@@ -0,0 +1,32 @@
+# Generated by Django 3.2.14 on 2026-10-18 19:50
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('tickets', '0023_ticket_image_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TicketCounter',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('relationship', models.CharField(choices=[('authored', 'Authored'), ('assigned', 'Assigned')], max_length=8)),
+                ('status', models.CharField(choices=[('open', 'Open'), ('inprogress', 'In Progress'), ('onhold', 'On Hold'), ('closed', 'Closed')], max_length=10)),
+                ('count', models.IntegerField(default=0)),
+                ('counted_on', models.DateTimeField(default=django.utils.timezone.now)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='ticket_counters', to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='ticketcounter',
+            constraint=models.UniqueConstraint(fields=('user', 'relationship', 'status'), name='ticket_counter_unique'),
+        ),
+    ]
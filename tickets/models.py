@@ -3,13 +3,17 @@
 
 import datetime as dt
 from django.conf import settings
+from django.contrib.postgres.search import SearchVectorField
 from django.db import models
+from django.db.models import BooleanField, ExpressionWrapper, Q, Value
 from django.urls import reverse
-from django.utils.html import strip_tags
+from django.utils import timezone
+from django.utils.text import Truncator
 from django.core.validators import MinLengthValidator
-from cloudinary.models import CloudinaryField
-from model_utils import Choices
+from model_utils import Choices, FieldTracker
 
+from .fields import AttachmentField, LocalAttachment
+from .utils import html_to_text, is_user_elevated_role, sanitize_html
 from .validators import textfield_not_empty, validate_image
 
 
@@ -39,9 +43,72 @@ class TicketCategory(models.Model):
         return self.name
 
 
+class TicketQuerySet(models.QuerySet):
+    """QuerySet for the Ticket model, used as its default manager."""
+
+    def visible_to(self, user):
+        """Return the tickets a user is allowed to view: every ticket for
+        elevated roles, otherwise the tickets they have raised.
+
+        Args:
+            user (accounts.models.CustomUser): User viewing the tickets
+
+        Returns:
+            QuerySet: Tickets visible to user
+        """
+        if not user.is_authenticated:
+            return self.none()
+        if is_user_elevated_role(user):
+            return self.all()
+        return self.filter(author=user)
+
+    def with_attachment(self, name):
+        """Return the tickets whose image is a locally stored attachment, or
+        the image a derivative was generated from (see tickets.derivatives).
+
+        Args:
+            name (str): Storage name of the attachment or derivative, e.g.
+            '9f/86/9f86d08...0a08.thumbnail.webp'
+
+        Returns:
+            QuerySet: Tickets with the image
+        """
+        # Images and their derivatives share the name up to the extensions
+        stem = name.split(".", 1)[0]
+        return self.filter(
+            ticket_image__startswith=f"{LocalAttachment.PREFIX}{stem}"
+        )
+
+    def with_visibility(self, user):
+        """Annotate each ticket with 'is_visible', True if user is allowed to
+        view it, so a view can fetch a ticket and check access with a single
+        query while still telling a forbidden ticket from a missing one.
+
+        Args:
+            user (accounts.models.CustomUser): User viewing the tickets
+
+        Returns:
+            QuerySet: Tickets annotated with 'is_visible'
+        """
+        if not user.is_authenticated:
+            condition = Value(False)
+        elif is_user_elevated_role(user):
+            condition = Value(True)
+        else:
+            condition = Q(author=user)
+        return self.annotate(
+            is_visible=ExpressionWrapper(
+                condition, output_field=BooleanField()
+            )
+        )
+
+
 class Ticket(models.Model):
     """Ticket model - Represent Support Tickets that can be raised by users"""
 
+    # Number of characters of the description shown on ticket list cards
+    PREVIEW_LENGTH = 130
+
     STATUS = Choices(
         ("open", ("Open")),
         ("inprogress", ("In Progress")),
@@ -74,7 +141,16 @@ class Ticket(models.Model):
     description = models.TextField(
         validators=[textfield_not_empty(min_length=int(20))]
     )
-    ticket_image = CloudinaryField(
+    # Sanitized HTML and plain text versions of the description, and a
+    # truncated plain text preview rendered on the ticket list. Computed on
+    # save so pages, the admin and emails do not re-parse the description.
+    description_html = models.TextField(blank=True, editable=False)
+    description_text = models.TextField(blank=True, editable=False)
+    preview = models.CharField(
+        max_length=PREVIEW_LENGTH, blank=True, editable=False
+    )
+    # Uploaded to Cloudinary, or stored locally when LOCAL_ATTACHMENTS is set
+    ticket_image = AttachmentField(
         "image",
         validators=[validate_image],
         blank=True,
@@ -120,14 +196,111 @@ class Ticket(models.Model):
         blank=True,
         null=True,
     )
+    # Full-text search document (title and description) maintained by
+    # tickets.search on PostgreSQL. Unused on other databases.
+    search_vector = SearchVectorField(null=True, editable=False)
+
+    # Tracks the fields the per-user ticket counters are grouped by, so the
+    # counters can be moved when they change (see tickets.counters). Foreign
+    # keys are tracked by attribute name so deferred columns (e.g. in the
+    # ticket list's only() queryset) are not loaded by the tracker.
+    tracker = FieldTracker(
+        fields=["status", "author_id", "assigned_technician_id"]
+    )
+
+    objects = TicketQuerySet.as_manager()
 
     class Meta:
         # Ordering configured to show the most recently updated tickets first
         ordering = ("-updated_on",)
+        # Indexes chosen from the ticket list filter and ordering combinations
+        # (tickets.filters). Ordered columns include the primary key so the
+        # keyset paginator's (ordering, id) key is served by the index.
+        indexes = [
+            # Default list and each date ordering option
+            models.Index(
+                fields=["-updated_on", "-id"], name="ticket_updated_idx"
+            ),
+            models.Index(
+                fields=["-created_on", "-id"], name="ticket_created_idx"
+            ),
+            # "All Open Requests" status filter
+            models.Index(
+                fields=["-updated_on", "-id"],
+                condition=~models.Q(status="closed"),
+                name="ticket_open_updated_idx",
+            ),
+            models.Index(
+                fields=["status", "-updated_on", "-id"],
+                name="ticket_status_updated_idx",
+            ),
+            # Customer list (author's own tickets)
+            models.Index(
+                fields=["author", "-updated_on", "-id"],
+                name="ticket_author_updated_idx",
+            ),
+            models.Index(
+                fields=["author", "-created_on", "-id"],
+                name="ticket_author_created_idx",
+            ),
+            # "Assigned to me" and technician/team filters
+            models.Index(
+                fields=["assigned_technician", "-updated_on", "-id"],
+                name="ticket_tech_updated_idx",
+            ),
+            models.Index(
+                fields=["assigned_technician", "status", "-updated_on"],
+                name="ticket_tech_status_idx",
+            ),
+            models.Index(
+                fields=["assigned_team", "-updated_on", "-id"],
+                name="ticket_team_updated_idx",
+            ),
+            models.Index(
+                fields=["priority", "-updated_on", "-id"],
+                name="ticket_priority_updated_idx",
+            ),
+            # Tickets of a locally stored attachment (with_attachment), a
+            # prefix match on PostgreSQL
+            models.Index(
+                fields=["ticket_image"],
+                name="ticket_image_idx",
+                opclasses=["varchar_pattern_ops"],
+            ),
+        ]
 
     def __str__(self):
         return f"Request #: {self.id} - {self.title}"
 
+    # Fields computed from the description when it is saved
+    RENDERED_FIELDS = ("description_html", "description_text", "preview")
+
+    def save(self, *args, **kwargs):
+        """Save the ticket, refreshing the rendered versions of the
+        description when the description is being saved.
+        """
+        update_fields = kwargs.get("update_fields")
+        if "description" not in self.get_deferred_fields() and (
+            update_fields is None or "description" in update_fields
+        ):
+            self.refresh_rendered_fields()
+            if update_fields is not None:
+                kwargs["update_fields"] = {
+                    *update_fields,
+                    *self.RENDERED_FIELDS,
+                }
+        super().save(*args, **kwargs)
+
+    def refresh_rendered_fields(self):
+        """Sets the sanitized HTML, plain text and preview fields from the
+        current description.
+        """
+        self.description_html = sanitize_html(self.description)
+        self.description_text = html_to_text(self.description)
+        self.preview = Truncator(self.description_text).chars(
+            self.PREVIEW_LENGTH
+        )
+
     # CREDIT: CodingEntrepreneurs - Python & Django 3.2 Tutorial Series
     # Video 44 (get absolute url) & 45 (Django URLs Reverse)
     # URL: 44 - https://www.youtube.com/watch?v=b42B-xli-vQ
@@ -165,17 +338,199 @@ class Comment(models.Model):
         null=True,
     )
     body = models.TextField(validators=[textfield_not_empty()])
+    # Sanitized HTML and plain text versions of the body, computed on save
+    body_html = models.TextField(blank=True, editable=False)
+    body_text = models.TextField(blank=True, editable=False)
     created_on = models.DateTimeField(auto_now_add=True)
+    # Full-text search document maintained by tickets.search on PostgreSQL
+    search_vector = SearchVectorField(null=True, editable=False)
+
+    class Meta:
+        indexes = [
+            # Comment thread of a ticket in posting order
+            models.Index(
+                fields=["ticket", "created_on"],
+                name="comment_ticket_created_idx",
+            ),
+        ]
+
+    # Fields computed from the body when it is saved
+    RENDERED_FIELDS = ("body_html", "body_text")
+
+    def save(self, *args, **kwargs):
+        """Save the comment, refreshing the rendered versions of the body
+        when the body is being saved.
+        """
+        update_fields = kwargs.get("update_fields")
+        if "body" not in self.get_deferred_fields() and (
+            update_fields is None or "body" in update_fields
+        ):
+            self.refresh_rendered_fields()
+            if update_fields is not None:
+                kwargs["update_fields"] = {
+                    *update_fields,
+                    *self.RENDERED_FIELDS,
+                }
+        super().save(*args, **kwargs)
+
+    def refresh_rendered_fields(self):
+        """Sets the sanitized HTML and plain text fields from the current
+        body.
+        """
+        self.body_html = sanitize_html(self.body)
+        self.body_text = html_to_text(self.body)
 
     # Remove HTML tags in for comment body. For use in the admin panel
     # CREDIT: arie - Stack Overflow
     # URL: https://stackoverflow.com/a/9294835
     @property
     def body_without_tags(self):
-        """Strips all HTML tags from the comment body (used to improve
-        readability in the admin site).
+        """Comment body striped of all HTML tags (used to improve readability
+        in the admin site and emails). Computed when the comment is saved.
 
         Returns:
             str: Comment body striped of all HTML tags
         """
-        return strip_tags(self.body)
+        return self.body_text
+
+
+class CommentNotification(models.Model):
+    """Comment Notification model - A comment waiting to be sent to a
+    recipient as part of a digest email (see tickets.notifications).
+
+    Comments on the same ticket for the same recipient share a 'send_after'
+    time set when the first of them is queued, so every comment posted
+    within the coalescing window is sent in one email.
+    """
+
+    ticket = models.ForeignKey(
+        Ticket, on_delete=models.CASCADE, related_name="notifications"
+    )
+    comment = models.ForeignKey(
+        Comment, on_delete=models.CASCADE, related_name="notifications"
+    )
+    recipient = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name="comment_notifications",
+    )
+    # Absolute link to the ticket, built from the request the comment was
+    # posted with
+    ticket_url = models.CharField(max_length=255)
+    send_after = models.DateTimeField()
+
+    class Meta:
+        indexes = [
+            # Due digests, read by tickets.notifications.send_comment_digests
+            models.Index(fields=["send_after"], name="notification_due_idx"),
+            # Open window of a recipient and ticket
+            models.Index(
+                fields=["recipient", "ticket"],
+                name="notification_window_idx",
+            ),
+        ]
+
+    def __str__(self):
+        return f"Comment {self.comment_id} for {self.recipient}"
+
+
+class TicketCounter(models.Model):
+    """Ticket Counter model - The number of tickets a user has raised or has
+    been assigned with a given status (see tickets.counters).
+
+    Counters are adjusted with 'count = count + delta' updates, which the
+    database applies atomically, so adjustments made at the same time by
+    different processes are never lost.
+    """
+
+    RELATIONSHIPS = Choices(
+        ("authored", ("Authored")),
+        ("assigned", ("Assigned")),
+    )
+
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name="ticket_counters",
+    )
+    relationship = models.CharField(max_length=8, choices=RELATIONSHIPS)
+    status = models.CharField(max_length=10, choices=Ticket.STATUS)
+    count = models.IntegerField(default=0)
+    counted_on = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        constraints = [
+            # Also serves the counters of a user, read on every page
+            models.UniqueConstraint(
+                fields=["user", "relationship", "status"],
+                name="ticket_counter_unique",
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.user_id} {self.relationship} {self.status}"
+
+
+class PendingImageDeletion(models.Model):
+    """Pending Image Deletion model - A Cloudinary image of a deleted ticket
+    waiting to be deleted by the worker (see tickets.image_deletion).
+
+    Rows are created in the transaction that deletes the ticket, so images
+    are only deleted once that transaction is committed. Failed deletions
+    are retried with an exponential backoff until MAX_ATTEMPTS is reached,
+    as outbox messages are.
+    """
+
+    STATUS = Choices(
+        ("pending", ("Pending")),
+        ("failed", ("Failed")),
+    )
+
+    # Number of deletion attempts before an image is marked as failed
+    MAX_ATTEMPTS = 8
+    # Delay before the first retry, doubled after each failed attempt
+    RETRY_DELAY = dt.timedelta(minutes=1)
+    MAX_RETRY_DELAY = dt.timedelta(hours=6)
+
+    status = models.CharField(
+        max_length=7,
+        choices=STATUS,
+        default=STATUS.pending,
+    )
+    public_id = models.CharField(max_length=255)
+    created_on = models.DateTimeField(auto_now_add=True)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    last_error = models.TextField(blank=True)
+    next_attempt_on = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        ordering = ("id",)
+        indexes = [
+            # Images due for deletion, read by the worker
+            models.Index(
+                fields=["next_attempt_on", "id"],
+                name="image_deletion_due_idx",
+                condition=Q(status="pending"),
+            ),
+        ]
+
+    def __str__(self):
+        return self.public_id
+
+    def mark_failed_attempt(self, error):
+        """Record a failed deletion, scheduling a retry with an exponential
+        backoff or marking the image as failed after MAX_ATTEMPTS.
+
+        The object is not saved, the worker saves each batch with
+        bulk_update.
+        """
+        self.attempts += 1
+        self.last_error = str(error)
+        if self.attempts >= self.MAX_ATTEMPTS:
+            self.status = self.STATUS.failed
+        else:
+            delay = min(
+                self.RETRY_DELAY * 2 ** (self.attempts - 1),
+                self.MAX_RETRY_DELAY,
+            )
+            self.next_attempt_on = timezone.now() + delay
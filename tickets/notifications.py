@@ -0,0 +1,112 @@
+"""Comment notification digests for tickets application
+
+Posting a comment on someone else's ticket queues a CommentNotification
+instead of sending an email straight away. The first notification for a
+(recipient, ticket) pair opens a coalescing window of
+TICKET_COMMENT_DIGEST_WINDOW seconds, and every comment queued before it
+closes is sent in the same digest email, rendered once per digest.
+
+'send_comment_digests' is run by the outbox worker (see OUTBOX_WORKER_HOOKS
+in settings) and queues the digest emails in the outbox.
+"""
+
+
+import datetime as dt
+from itertools import groupby
+from django.conf import settings
+from django.core.mail import send_mail
+from django.db import transaction
+from django.template.loader import render_to_string
+from django.utils import timezone
+from .models import CommentNotification
+
+
+def get_window():
+    return dt.timedelta(
+        seconds=getattr(settings, "TICKET_COMMENT_DIGEST_WINDOW", 120)
+    )
+
+
+def queue_comment_notification(comment, recipient, ticket_url):
+    """Queue a comment to be sent to a recipient in the next digest for the
+    ticket, opening a new coalescing window if none is open.
+
+    Args:
+        comment (tickets.models.Comment): Comment posted
+        recipient (accounts.models.CustomUser): User to notify
+        ticket_url (str): Absolute link to the ticket
+
+    Returns:
+        CommentNotification: Queued notification
+    """
+    open_window = (
+        CommentNotification.objects.filter(
+            recipient=recipient, ticket_id=comment.ticket_id
+        )
+        .values_list("send_after", flat=True)
+        .first()
+    )
+    return CommentNotification.objects.create(
+        ticket_id=comment.ticket_id,
+        comment=comment,
+        recipient=recipient,
+        ticket_url=ticket_url,
+        send_after=open_window or timezone.now() + get_window(),
+    )
+
+
+def send_comment_digests(now=None):
+    """Send a digest email for every (recipient, ticket) pair whose
+    coalescing window has closed.
+
+    Each digest is queued and its notifications deleted in one transaction,
+    so a digest is never sent twice or lost.
+
+    Args:
+        now (datetime, optional): Time to compare windows against
+
+    Returns:
+        int: Number of digests sent
+    """
+    now = now or timezone.now()
+    due = list(
+        CommentNotification.objects.filter(send_after__lte=now)
+        .select_related("ticket", "recipient", "comment__author")
+        .order_by("recipient_id", "ticket_id", "comment__created_on")
+    )
+    sent = 0
+    for _, group in groupby(
+        due, key=lambda notification: (
+            notification.recipient_id, notification.ticket_id
+        )
+    ):
+        notifications = list(group)
+        with transaction.atomic():
+            send_digest(notifications)
+            CommentNotification.objects.filter(
+                pk__in=[notification.pk for notification in notifications]
+            ).delete()
+        sent += 1
+    return sent
+
+
+def send_digest(notifications):
+    """Render and send the digest email for the notifications of a single
+    recipient and ticket.
+    """
+    first = notifications[0]
+    context = {
+        "ticket": first.ticket,
+        "recipient": first.recipient,
+        "comments": [notification.comment for notification in notifications],
+        "ticket_url": first.ticket_url,
+    }
+    send_mail(
+        subject=f"Support Hub - {first.ticket}",
+        message=render_to_string("email/comment_digest_message.txt", context),
+        html_message=render_to_string(
+            "email/comment_digest_message.html", context
+        ),
+        from_email=settings.DEFAULT_FROM_EMAIL,
+        recipient_list=[first.recipient.email],
+    )
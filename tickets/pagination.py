@@ -0,0 +1,235 @@
+"""Keyset (cursor) pagination for tickets application"""
+
+
+import base64
+import binascii
+import datetime as dt
+import json
+from collections.abc import Sequence
+from django.core.exceptions import FieldDoesNotExist, ValidationError
+from django.core.paginator import InvalidPage
+from django.db.models import Q
+
+
+def _encode_value(value):
+    """JSON encoder for key values not natively supported by json.
+
+    Datetimes keep their full (microsecond) precision, unlike
+    DjangoJSONEncoder, so that rows are never skipped or repeated between
+    pages.
+    """
+    if isinstance(value, (dt.datetime, dt.date, dt.time)):
+        return value.isoformat()
+    return str(value)
+
+
+class InvalidCursor(InvalidPage):
+    """Raised when a cursor token cannot be decoded for the current
+    ordering.
+    """
+
+    pass
+
+
+class KeysetPage(Sequence):
+    """A single page of results returned by the KeysetPaginator.
+
+    Mirrors the parts of django.core.paginator.Page used by the templates
+    (has_next, has_previous, has_other_pages) but exposes opaque cursors
+    rather than page numbers.
+    """
+
+    def __init__(
+        self, object_list, paginator, has_next=False, has_previous=False
+    ):
+        self.object_list = object_list
+        self.paginator = paginator
+        self._has_next = has_next
+        self._has_previous = has_previous
+
+    def __repr__(self):
+        return f"<KeysetPage of {len(self)} objects>"
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __getitem__(self, index):
+        return self.object_list[index]
+
+    def has_next(self):
+        return self._has_next
+
+    def has_previous(self):
+        return self._has_previous
+
+    def has_other_pages(self):
+        return self.has_next() or self.has_previous()
+
+    @property
+    def next_cursor(self):
+        """Cursor pointing after the last object of this page."""
+        if not self.has_next():
+            return None
+        return self.paginator.encode_cursor(self.object_list[-1])
+
+    @property
+    def previous_cursor(self):
+        """Cursor pointing before the first object of this page."""
+        if not self.has_previous():
+            return None
+        return self.paginator.encode_cursor(
+            self.object_list[0], backwards=True
+        )
+
+
+class KeysetPaginator:
+    """Paginate a queryset by seeking past the last seen row instead of using
+    OFFSET.
+
+    The ordering of the queryset (or the model's Meta.ordering) is used as the
+    key, with the primary key appended as a tie-breaker so every row has a
+    unique position. Each page is fetched with a WHERE clause on the key
+    values from the cursor, so the cost of a page does not depend on how deep
+    into the result set it is and no COUNT(*) query is needed.
+
+    Ordering fields must be non-nullable model fields or annotations present
+    on the queryset.
+    """
+
+    def __init__(self, queryset, per_page, ordering=None):
+        self.queryset = queryset
+        self.per_page = int(per_page)
+        self.ordering = self._get_key(ordering)
+
+    def _get_key(self, ordering):
+        """Return the list of (field_name, descending) tuples used as the
+        pagination key.
+        """
+        if ordering is None:
+            ordering = (
+                self.queryset.query.order_by or
+                self.queryset.model._meta.ordering
+            )
+        key = []
+        for expression in ordering:
+            if not isinstance(expression, str) or "__" in expression:
+                raise ValueError(
+                    "Keyset pagination requires orderings on field names, "
+                    f"got {expression!r}."
+                )
+            descending = expression.startswith("-")
+            name = expression.lstrip("-+")
+            if name == "pk":
+                name = self.queryset.model._meta.pk.name
+            key.append((name, descending))
+        # Append the primary key as a tie-breaker so that rows sharing the
+        # same ordering values still have a unique position
+        pk_name = self.queryset.model._meta.pk.name
+        if pk_name not in [name for name, _ in key]:
+            key.append((pk_name, key[-1][1] if key else False))
+        return key
+
+    def _order_by(self, backwards=False):
+        return [
+            f"-{name}" if descending != backwards else name
+            for name, descending in self.ordering
+        ]
+
+    def _seek(self, values, backwards=False):
+        """Build the filter returning the rows positioned after 'values' in
+        the key ordering (or before them when going backwards).
+        """
+        (first_name, first_descending), *_ = self.ordering
+        # A leading inclusive range predicate on the first key column lets
+        # the database use an index range scan before applying the
+        # tie-breaking conditions
+        bound = "lte" if first_descending != backwards else "gte"
+        condition = Q()
+        for index, (name, descending) in enumerate(self.ordering):
+            lookup = "lt" if descending != backwards else "gt"
+            clause = Q(**{f"{name}__{lookup}": values[index]})
+            for prior_index, (prior_name, _) in enumerate(
+                self.ordering[:index]
+            ):
+                clause &= Q(**{prior_name: values[prior_index]})
+            condition |= clause
+        return Q(**{f"{first_name}__{bound}": values[0]}) & condition
+
+    def encode_cursor(self, obj, backwards=False):
+        """Return an opaque, url safe token for the position of 'obj'."""
+        payload = {
+            "v": [getattr(obj, name) for name, _ in self.ordering],
+            "b": backwards,
+        }
+        data = json.dumps(
+            payload, default=_encode_value, separators=(",", ":")
+        )
+        return base64.urlsafe_b64encode(data.encode()).decode().rstrip("=")
+
+    def decode_cursor(self, cursor):
+        """Return the (values, backwards) tuple stored in a cursor token.
+
+        Raises:
+            InvalidCursor: If the token is malformed or does not match the
+            current ordering
+        """
+        try:
+            padding = "=" * (-len(cursor) % 4)
+            payload = json.loads(base64.urlsafe_b64decode(cursor + padding))
+            values, backwards = payload["v"], bool(payload["b"])
+        except (
+            binascii.Error,
+            UnicodeDecodeError,
+            ValueError,
+            KeyError,
+            TypeError,
+        ):
+            raise InvalidCursor("That cursor is not valid.")
+        if not isinstance(values, list) or len(values) != len(self.ordering):
+            raise InvalidCursor("That cursor does not match the ordering.")
+        return [
+            self._to_python(name, value)
+            for (name, _), value in zip(self.ordering, values)
+        ], backwards
+
+    def _to_python(self, name, value):
+        try:
+            field = self.queryset.model._meta.get_field(name)
+        except FieldDoesNotExist:
+            # Annotations (e.g. search rank) are stored as plain JSON values
+            return value
+        try:
+            return field.to_python(value)
+        except ValidationError:
+            raise InvalidCursor("That cursor contains an invalid value.")
+
+    def page(self, cursor=None):
+        """Return the KeysetPage positioned by 'cursor' (first page when no
+        cursor is given).
+        """
+        if not cursor:
+            rows = list(
+                self.queryset.order_by(*self._order_by())[: self.per_page + 1]
+            )
+            return KeysetPage(
+                rows[: self.per_page],
+                self,
+                has_next=len(rows) > self.per_page,
+            )
+
+        values, backwards = self.decode_cursor(cursor)
+        rows = list(
+            self.queryset.filter(self._seek(values, backwards)).order_by(
+                *self._order_by(backwards)
+            )[: self.per_page + 1]
+        )
+        has_more = len(rows) > self.per_page
+        rows = rows[: self.per_page]
+        if not backwards:
+            return KeysetPage(rows, self, has_next=has_more, has_previous=True)
+        if not has_more:
+            # Walked back to the start of the results, return a full first
+            # page rather than a partial one
+            return self.page()
+        rows.reverse()
+        return KeysetPage(rows, self, has_next=True, has_previous=True)
@@ -0,0 +1,367 @@
+"""Full-text search for tickets application
+
+Ticket titles/descriptions and comment bodies are indexed when they are saved
+(see tickets.signals) so that searching does not need to scan the description
+column:
+
+    PostgreSQL - 'search_vector' tsvector columns on the ticket and comment
+                 tables with GIN indexes.
+    SQLite     - FTS5 shadow tables ('tickets_ticket_fts' and
+                 'tickets_comment_fts') keyed by the ticket/comment id.
+
+Other databases fall back to 'icontains' lookups.
+"""
+
+
+import re
+from django.contrib.postgres.search import (
+    SearchHeadline,
+    SearchQuery,
+    SearchRank,
+    SearchVector,
+)
+from django.db import connection
+from django.db.models import Exists, FloatField, OuterRef, Q, Value
+from django.db.models.expressions import RawSQL
+from django.utils.html import escape
+from .models import Comment, Ticket
+from .utils import html_to_text
+
+
+# Markers wrapped around matched terms by the database. They are replaced
+# with <mark> elements after the snippet has been escaped.
+START_SELECTION = "\x02"
+STOP_SELECTION = "\x03"
+
+# Text search configuration used for stemming on PostgreSQL
+SEARCH_CONFIG = "english"
+
+
+def format_snippet(snippet):
+    """Return a snippet produced by the database as safe HTML.
+
+    Any markup in the snippet is removed and the text escaped before the
+    selection markers are replaced with <mark> elements.
+
+    Args:
+        snippet (str): Snippet containing START/STOP_SELECTION markers
+
+    Returns:
+        str: Escaped snippet with matched terms highlighted
+    """
+    text = escape(html_to_text(snippet))
+    return text.replace(START_SELECTION, "<mark>").replace(
+        STOP_SELECTION, "</mark>"
+    )
+
+
+class BaseSearchBackend:
+    """Search backend using 'icontains' lookups, used when the database has no
+    supported full-text search. Subclasses override the index and search
+    methods.
+    """
+
+    def index_ticket(self, ticket):
+        pass
+
+    def index_comment(self, comment):
+        pass
+
+    def index_tickets(self, tickets):
+        """Index many new tickets at once (used after bulk inserts)."""
+        for ticket in tickets:
+            self.index_ticket(ticket)
+
+    def index_comments(self, comments):
+        """Index many new comments at once (used after bulk inserts)."""
+        for comment in comments:
+            self.index_comment(comment)
+
+    def remove_ticket(self, ticket_id):
+        pass
+
+    def remove_comment(self, comment_id):
+        pass
+
+    def rebuild(self):
+        pass
+
+    def search(self, queryset, query):
+        """Filter a ticket queryset to tickets matching 'query', annotated
+        with a 'search_rank' (higher is more relevant).
+        """
+        return queryset.filter(
+            Q(title__icontains=query) |
+            Q(description_text__icontains=query) |
+            Q(comments__body_text__icontains=query)
+        ).distinct().annotate(
+            search_rank=Value(1.0, output_field=FloatField())
+        )
+
+    def no_results(self, queryset):
+        """Return an empty result, annotated like a search result so it can
+        still be ordered by relevance.
+        """
+        return queryset.annotate(
+            search_rank=Value(0.0, output_field=FloatField())
+        ).none()
+
+    def highlight(self, ticket_ids, query):
+        """Return a {ticket id: snippet} dict of highlighted snippets for the
+        tickets in 'ticket_ids'.
+        """
+        return {}
+
+
+class PostgresSearchBackend(BaseSearchBackend):
+    """Search backend using tsvector columns with GIN indexes."""
+
+    def vector(self, *weighted_fields):
+        vector = None
+        for field, weight in weighted_fields:
+            field_vector = SearchVector(
+                field, weight=weight, config=SEARCH_CONFIG
+            )
+            vector = field_vector if vector is None else vector + field_vector
+        return vector
+
+    def query(self, query):
+        return SearchQuery(
+            query, search_type="websearch", config=SEARCH_CONFIG
+        )
+
+    def ticket_vector(self):
+        return self.vector(("title", "A"), ("description_text", "B"))
+
+    def comment_vector(self):
+        return self.vector(("body_text", "C"))
+
+    def index_ticket(self, ticket):
+        Ticket.objects.filter(pk=ticket.pk).update(
+            search_vector=self.ticket_vector()
+        )
+
+    def index_comment(self, comment):
+        Comment.objects.filter(pk=comment.pk).update(
+            search_vector=self.comment_vector()
+        )
+
+    def index_tickets(self, tickets):
+        Ticket.objects.filter(
+            pk__in=[ticket.pk for ticket in tickets]
+        ).update(search_vector=self.ticket_vector())
+
+    def index_comments(self, comments):
+        Comment.objects.filter(
+            pk__in=[comment.pk for comment in comments]
+        ).update(search_vector=self.comment_vector())
+
+    def rebuild(self):
+        Ticket.objects.update(search_vector=self.ticket_vector())
+        Comment.objects.update(search_vector=self.comment_vector())
+
+    def search(self, queryset, query):
+        search_query = self.query(query)
+        matching_comments = Comment.objects.filter(
+            ticket=OuterRef("pk"), search_vector=search_query
+        )
+        return queryset.filter(
+            Q(search_vector=search_query) | Exists(matching_comments)
+        ).annotate(search_rank=SearchRank("search_vector", search_query))
+
+    def highlight(self, ticket_ids, query):
+        search_query = self.query(query)
+        options = {
+            "config": SEARCH_CONFIG,
+            "start_sel": START_SELECTION,
+            "stop_sel": STOP_SELECTION,
+            "max_words": 25,
+            "min_words": 10,
+        }
+        snippets = {}
+        for ticket_id, headline in Ticket.objects.filter(
+            pk__in=ticket_ids, search_vector=search_query
+        ).annotate(
+            headline=SearchHeadline(
+                "description_text", search_query, **options
+            )
+        ).values_list("pk", "headline"):
+            snippets[ticket_id] = format_snippet(headline)
+        # Tickets matched by one of their comments only
+        for ticket_id, headline in Comment.objects.filter(
+            ticket_id__in=set(ticket_ids) - set(snippets),
+            search_vector=search_query,
+        ).annotate(
+            headline=SearchHeadline("body_text", search_query, **options)
+        ).order_by("-created_on").values_list("ticket_id", "headline"):
+            snippets.setdefault(ticket_id, format_snippet(headline))
+        return snippets
+
+
+class SQLiteSearchBackend(BaseSearchBackend):
+    """Search backend using FTS5 virtual tables."""
+
+    def match_expression(self, query):
+        """Convert user input to an FTS5 MATCH expression.
+
+        Each word is quoted (so FTS5 operators and punctuation in the input
+        cannot cause syntax errors) and all words must match. The last word
+        is matched as a prefix.
+        """
+        words = re.findall(r"\w+", query)
+        if not words:
+            return None
+        terms = [f'"{word}"' for word in words]
+        terms[-1] += "*"
+        return " ".join(terms)
+
+    def index_ticket(self, ticket):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "DELETE FROM tickets_ticket_fts WHERE rowid = %s", [ticket.pk]
+            )
+            cursor.execute(
+                "INSERT INTO tickets_ticket_fts (rowid, title, description) "
+                "VALUES (%s, %s, %s)",
+                [ticket.pk, ticket.title, ticket.description_text],
+            )
+
+    def index_comment(self, comment):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "DELETE FROM tickets_comment_fts WHERE rowid = %s",
+                [comment.pk],
+            )
+            cursor.execute(
+                "INSERT INTO tickets_comment_fts (rowid, ticket_id, body) "
+                "VALUES (%s, %s, %s)",
+                [comment.pk, comment.ticket_id, comment.body_text],
+            )
+
+    def index_tickets(self, tickets):
+        # New rows only, so there are no previous entries to delete
+        with connection.cursor() as cursor:
+            cursor.executemany(
+                "INSERT INTO tickets_ticket_fts (rowid, title, description) "
+                "VALUES (%s, %s, %s)",
+                [
+                    (ticket.pk, ticket.title, ticket.description_text)
+                    for ticket in tickets
+                ],
+            )
+
+    def index_comments(self, comments):
+        with connection.cursor() as cursor:
+            cursor.executemany(
+                "INSERT INTO tickets_comment_fts (rowid, ticket_id, body) "
+                "VALUES (%s, %s, %s)",
+                [
+                    (comment.pk, comment.ticket_id, comment.body_text)
+                    for comment in comments
+                ],
+            )
+
+    def remove_ticket(self, ticket_id):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "DELETE FROM tickets_ticket_fts WHERE rowid = %s", [ticket_id]
+            )
+
+    def remove_comment(self, comment_id):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "DELETE FROM tickets_comment_fts WHERE rowid = %s",
+                [comment_id],
+            )
+
+    def rebuild(self):
+        with connection.cursor() as cursor:
+            cursor.execute("DELETE FROM tickets_ticket_fts")
+            cursor.execute("DELETE FROM tickets_comment_fts")
+        tickets = Ticket.objects.only("title", "description_text")
+        for ticket in tickets.iterator():
+            self.index_ticket(ticket)
+        comments = Comment.objects.only("ticket", "body_text")
+        for comment in comments.iterator():
+            self.index_comment(comment)
+
+    def search(self, queryset, query):
+        expression = self.match_expression(query)
+        if expression is None:
+            return self.no_results(queryset)
+        # The matching tickets are found with a single full-text query each
+        # on the ticket and comment indexes, joined to the queryset (and so
+        # to the role and filter restrictions) by the database
+        matching_ids = RawSQL(
+            "SELECT rowid FROM tickets_ticket_fts"
+            " WHERE tickets_ticket_fts MATCH %s"
+            " UNION"
+            " SELECT ticket_id FROM tickets_comment_fts"
+            " WHERE tickets_comment_fts MATCH %s",
+            [expression, expression],
+        )
+        # bm25() scores are lower for better matches. Title matches are
+        # weighted above description and comment matches. The score is only
+        # computed for the tickets kept by the queryset, looking up their
+        # index entries by rowid.
+        rank = RawSQL(
+            "SELECT -MIN(score) FROM ("
+            "  SELECT bm25(tickets_ticket_fts, 4.0, 2.0) AS score"
+            "  FROM tickets_ticket_fts WHERE tickets_ticket_fts MATCH %s"
+            '  AND rowid = "tickets_ticket"."id"'
+            "  UNION ALL"
+            "  SELECT bm25(tickets_comment_fts) AS score"
+            "  FROM tickets_comment_fts WHERE tickets_comment_fts MATCH %s"
+            "  AND rowid IN ("
+            "    SELECT id FROM tickets_comment"
+            '    WHERE ticket_id = "tickets_ticket"."id"'
+            "  )"
+            ")",
+            [expression, expression],
+            output_field=FloatField(),
+        )
+        return queryset.filter(pk__in=matching_ids).annotate(
+            search_rank=rank
+        )
+
+    def highlight(self, ticket_ids, query):
+        expression = self.match_expression(query)
+        ticket_ids = list(ticket_ids)
+        if expression is None or not ticket_ids:
+            return {}
+        placeholders = ", ".join(["%s"] * len(ticket_ids))
+        snippet_options = [START_SELECTION, STOP_SELECTION, "...", 20]
+        snippets = {}
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT rowid, snippet(tickets_ticket_fts, -1, %s, %s, %s, %s)"
+                " FROM tickets_ticket_fts WHERE tickets_ticket_fts MATCH %s"
+                f" AND rowid IN ({placeholders})",
+                snippet_options + [expression] + ticket_ids,
+            )
+            for ticket_id, snippet in cursor.fetchall():
+                snippets[ticket_id] = format_snippet(snippet)
+            # Tickets matched by one of their comments only
+            cursor.execute(
+                "SELECT ticket_id,"
+                " snippet(tickets_comment_fts, 1, %s, %s, %s, %s)"
+                " FROM tickets_comment_fts WHERE tickets_comment_fts MATCH %s"
+                f" AND ticket_id IN ({placeholders}) ORDER BY rowid DESC",
+                snippet_options + [expression] + ticket_ids,
+            )
+            for ticket_id, snippet in cursor.fetchall():
+                snippets.setdefault(ticket_id, format_snippet(snippet))
+        return snippets
+
+
+def get_search_backend():
+    """Return the search backend for the database in use.
+
+    Returns:
+        BaseSearchBackend: Search backend instance
+    """
+    if connection.vendor == "postgresql":
+        return PostgresSearchBackend()
+    if connection.vendor == "sqlite":
+        return SQLiteSearchBackend()
+    return BaseSearchBackend()
@@ -1,10 +1,26 @@
 """Signals for tickets application"""
 
 
-from django.db.models.signals import pre_delete
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_delete
 from django.dispatch import receiver
-import cloudinary
-from .models import Ticket
+from . import counters, events
+from .derivatives import schedule_derivatives
+from .fragment_cache import bump_generation
+from .fields import LocalAttachment
+from .image_deletion import (
+    delete_local_attachment_on_commit,
+    queue_image_deletion,
+)
+from .models import Comment, Team, Ticket, TicketCategory
+from .search import get_search_backend
+from .utils import ASSIGNABLE_ROLES
+
+
+# Fields included in the full-text search index of each model
+TICKET_SEARCH_FIELDS = {"title", "description"}
+COMMENT_SEARCH_FIELDS = {"body"}
 
 
 # CREDIT: Nicholas Kajoh - https://alphacoder.xyz
@@ -13,6 +29,148 @@ from .models import Ticket
 def photo_delete(sender, instance, **kwargs):
     """Receiver function to delete cloudinary image when ticket is deleted
     using the delete view or the admin site.
+
+    The image is queued and deleted by the worker once the deletion is
+    committed (see tickets.image_deletion).
+    """
+    if isinstance(instance.ticket_image, LocalAttachment):
+        delete_local_attachment_on_commit(instance.ticket_image)
+    elif instance.ticket_image:
+        queue_image_deletion(instance.ticket_image.public_id)
+
+
+@receiver(post_save, sender=Ticket)
+def generate_image_derivatives(
+    sender, instance, update_fields=None, raw=False, **kwargs
+):
+    """Receiver function to generate the derivatives of a locally stored
+    ticket image once the ticket is committed (see tickets.derivatives).
+    """
+    if raw or (update_fields and "ticket_image" not in update_fields):
+        return
+    if isinstance(instance.ticket_image, LocalAttachment):
+        image = instance.ticket_image
+        transaction.on_commit(lambda: schedule_derivatives(image))
+
+
+@receiver(post_save, sender=Ticket)
+def index_ticket(sender, instance, update_fields=None, raw=False, **kwargs):
+    """Receiver function to keep the full-text search index in sync when a
+    ticket is saved.
+
+    Saves that only update fields which are not searchable (such as
+    Ticket.set_ticket_updated_now) do not touch the index.
+    """
+    if raw or (update_fields and not TICKET_SEARCH_FIELDS & update_fields):
+        return
+    get_search_backend().index_ticket(instance)
+
+
+@receiver(post_save, sender=Comment)
+def index_comment(sender, instance, update_fields=None, raw=False, **kwargs):
+    """Receiver function to keep the full-text search index in sync when a
+    comment is saved.
+    """
+    if raw or (update_fields and not COMMENT_SEARCH_FIELDS & update_fields):
+        return
+    get_search_backend().index_comment(instance)
+
+
+@receiver(post_delete, sender=Ticket)
+def remove_ticket_from_index(sender, instance, **kwargs):
+    """Receiver function to remove a deleted ticket from the search index."""
+    get_search_backend().remove_ticket(instance.pk)
+
+
+@receiver(post_save, sender=Ticket)
+def update_ticket_counters(
+    sender, instance, created=False, raw=False, **kwargs
+):
+    """Receiver function to keep the cached per-user ticket counters up to
+    date when a ticket is saved.
+    """
+    if not raw:
+        counters.ticket_saved(instance, created)
+
+
+@receiver(post_save, sender=Ticket)
+def publish_ticket_changed(sender, instance, raw=False, **kwargs):
+    """Receiver function to publish a live 'ticket-changed' event when a
+    ticket is saved (see tickets.events).
+    """
+    if not raw:
+        events.ticket_changed(instance)
+
+
+@receiver(post_save, sender=Comment)
+def publish_comment_added(
+    sender, instance, created=False, raw=False, **kwargs
+):
+    """Receiver function to publish a live 'comment-added' event when a
+    comment is posted (see tickets.events).
+    """
+    if created and not raw:
+        events.comment_added(instance, instance.ticket.author_id)
+
+
+@receiver(post_delete, sender=Ticket)
+def remove_ticket_from_counters(sender, instance, **kwargs):
+    """Receiver function to remove a deleted ticket from the cached per-user
+    ticket counters.
+    """
+    counters.ticket_deleted(instance)
+
+
+@receiver(post_delete, sender=Comment)
+def remove_comment_from_index(sender, instance, **kwargs):
+    """Receiver function to remove a deleted comment from the search index."""
+    get_search_backend().remove_comment(instance.pk)
+
+
+@receiver(post_save, sender=Team)
+@receiver(post_delete, sender=Team)
+@receiver(post_save, sender=TicketCategory)
+@receiver(post_delete, sender=TicketCategory)
+def invalidate_fragments_for_name(sender, **kwargs):
+    """Receiver function to invalidate the cached ticket fragments and the
+    ETags of the ticket pages when a team or category (whose names are
+    rendered in them, and listed in the form and filter dropdowns) is
+    created, changed or deleted.
+    """
+    if not kwargs.get("raw"):
+        bump_generation()
+
+
+@receiver(post_save, sender=get_user_model())
+def invalidate_fragments_for_username(
+    sender, instance, created=False, update_fields=None, raw=False, **kwargs
+):
+    """Receiver function to invalidate the cached ticket fragments and the
+    ETags of the ticket pages when a user (whose username is rendered in
+    them) is saved, or a technician or administrator (listed in the
+    technician dropdowns of the forms) is created.
+
+    Saves that only update other fields, such as 'last_login' on each login,
+    keep the cached fragments, as do new customers.
+    """
+    if raw:
+        return
+    if created:
+        if instance.role in ASSIGNABLE_ROLES:
+            bump_generation()
+        return
+    if update_fields and not {"username", "role"} & set(update_fields):
+        return
+    bump_generation()
+
+
+@receiver(post_delete, sender=get_user_model())
+def invalidate_fragments_for_deleted_user(sender, instance, **kwargs):
+    """Receiver function to invalidate the cached ticket fragments and the
+    ETags of the ticket pages when a user is deleted.
+
+    The tickets assigned to a deleted technician are set to no technician
+    without their 'updated_on' changing, so would otherwise still be
+    rendered with the technician's username.
     """
-    if instance.ticket_image:
-        cloudinary.uploader.destroy(instance.ticket_image.public_id)
+    bump_generation()
@@ -0,0 +1,165 @@
+"""Server-sent events stream for tickets application
+
+'events_application' is a plain ASGI application serving EVENTS_PATH,
+mounted in front of Django by support_hub.asgi. Each connection is a
+long-lived response streaming the live ticket events (see tickets.events)
+for the tickets the logged in user can see, optionally limited to one
+ticket with the 'ticket' query parameter.
+
+The stream is served outside of Django's request handling so that an open
+connection only holds a coroutine waiting on its event queue, rather than a
+worker thread. The session cookie is read to find the user, in the same way
+as the authentication middleware.
+
+Under WSGI the path is served by EventsUnavailableView, answering 204 No
+Content, which tells browsers not to reconnect. The stream answers the same
+when live events are turned off because several processes serve the site
+without a shared broker (see tickets.events.live_events_enabled).
+"""
+
+
+import asyncio
+from importlib import import_module
+from urllib.parse import parse_qs
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib import auth
+from django.db import close_old_connections
+from django.http import HttpRequest
+from django.http.cookie import parse_cookie
+from .events import get_broker, live_events_enabled
+from .utils import is_user_elevated_role
+
+
+EVENTS_PATH = "/tickets/events/"
+
+# Seconds between comment lines sent to keep idle connections open through
+# proxies
+KEEPALIVE_INTERVAL = 15
+
+# Milliseconds browsers wait before reconnecting a dropped stream
+RETRY_DELAY = 5000
+
+
+def load_user(headers):
+    """Return the user of the session in the cookie header of a request.
+
+    Args:
+        headers (list): ASGI (name, value) header pairs
+
+    Returns:
+        tuple: (user id, whether the user has an elevated role), or None if
+        the session has no logged in user
+    """
+    cookie = b"".join(
+        value for name, value in headers if name == b"cookie"
+    ).decode("latin-1")
+    request = HttpRequest()
+    request.session = import_module(settings.SESSION_ENGINE).SessionStore(
+        parse_cookie(cookie).get(settings.SESSION_COOKIE_NAME)
+    )
+    close_old_connections()
+    try:
+        user = auth.get_user(request)
+    finally:
+        close_old_connections()
+    if not user.is_authenticated:
+        return None
+    return user.pk, is_user_elevated_role(user)
+
+
+async def send_response(send, status, headers, body=b"", more_body=False):
+    await send(
+        {"type": "http.response.start", "status": status, "headers": headers}
+    )
+    await send(
+        {"type": "http.response.body", "body": body, "more_body": more_body}
+    )
+
+
+async def events_application(scope, receive, send):
+    """ASGI application streaming the live ticket events a user can see."""
+    if scope["method"] not in ("GET", "HEAD"):
+        await send_response(send, 405, [(b"allow", b"GET, HEAD")])
+        return
+    viewer = await sync_to_async(load_user)(scope["headers"])
+    if viewer is None:
+        await send_response(send, 403, [(b"content-type", b"text/plain")])
+        return
+    user_id, elevated = viewer
+    if not live_events_enabled():
+        await send_response(send, 204, [])
+        return
+    query = parse_qs(scope.get("query_string", b"").decode("latin-1"))
+    try:
+        ticket_id = int(query["ticket"][0]) if "ticket" in query else None
+    except ValueError:
+        await send_response(send, 400, [(b"content-type", b"text/plain")])
+        return
+
+    subscription = get_broker().subscribe()
+    disconnected = asyncio.ensure_future(wait_for_disconnect(receive))
+    try:
+        await send_response(
+            send,
+            200,
+            [
+                (b"content-type", b"text/event-stream"),
+                (b"cache-control", b"no-cache"),
+                # Do not let a proxy buffer the stream
+                (b"x-accel-buffering", b"no"),
+            ],
+            f"retry: {RETRY_DELAY}\n\n".encode(),
+            more_body=True,
+        )
+        while not disconnected.done():
+            getting = asyncio.ensure_future(
+                subscription.get(KEEPALIVE_INTERVAL)
+            )
+            await asyncio.wait(
+                {getting, disconnected}, return_when=asyncio.FIRST_COMPLETED
+            )
+            if not getting.done():
+                getting.cancel()
+                break
+            event = getting.result()
+            if subscription.overflowed:
+                # Events were dropped, the page has to be reloaded in full
+                await send_body(send, b"event: reload\ndata: {}\n\n")
+                break
+            if event is None:
+                await send_body(send, b": keepalive\n\n")
+            elif event.is_visible_to(user_id, elevated) and (
+                ticket_id is None or event.ticket_id == ticket_id
+            ):
+                await send_body(send, event.encode())
+        if not disconnected.done():
+            await send({"type": "http.response.body", "body": b""})
+    finally:
+        subscription.close()
+        disconnected.cancel()
+
+
+async def send_body(send, body):
+    await send({"type": "http.response.body", "body": body, "more_body": True})
+
+
+async def wait_for_disconnect(receive):
+    while True:
+        message = await receive()
+        if message["type"] == "http.disconnect":
+            return
+
+
+def route_events(django_application):
+    """Return an ASGI application serving the events stream at EVENTS_PATH
+    and passing every other request to Django.
+    """
+
+    async def application(scope, receive, send):
+        if scope["type"] == "http" and scope["path"] == EVENTS_PATH:
+            await events_application(scope, receive, send)
+        else:
+            await django_application(scope, receive, send)
+
+    return application
@@ -0,0 +1,101 @@
+"""Content-addressed attachment storage for tickets application
+
+When LOCAL_ATTACHMENTS is set, ticket attachments are stored on local disk
+(or any mounted volume) under ATTACHMENT_ROOT instead of being uploaded to
+Cloudinary. Files are named after the SHA-256 hash of their content, e.g.
+'9f/86/9f86d08...0a08.png', so:
+
+    - Uploading the same file again stores it once.
+    - A name always refers to the same content, so attachments are served
+      (see tickets.views.AttachmentView) with long-lived immutable cache
+      headers.
+"""
+
+
+import hashlib
+import os
+import re
+import tempfile
+from django.conf import settings
+from django.core.files import File
+from django.core.files.storage import FileSystemStorage
+from django.utils.deconstruct import deconstructible
+
+
+# Names generated by ContentAddressedStorage, and of the derivatives of
+# images (see tickets.derivatives)
+NAME_RE = re.compile(
+    r"^[0-9a-f]{2}/[0-9a-f]{2}/[0-9a-f]{64}(\.[a-z]+)?(\.[a-z0-9]{1,5})?$"
+)
+
+
+def local_attachments_enabled():
+    return getattr(settings, "LOCAL_ATTACHMENTS", False)
+
+
+@deconstructible
+class ContentAddressedStorage(FileSystemStorage):
+    """File system storage naming files after the hash of their content.
+
+    Defaults to the ATTACHMENT_ROOT directory, served at ATTACHMENT_URL.
+    """
+
+    def __init__(self, location=None, base_url=None, **kwargs):
+        super().__init__(
+            location=location or settings.ATTACHMENT_ROOT,
+            base_url=base_url or settings.ATTACHMENT_URL,
+            **kwargs,
+        )
+
+    @staticmethod
+    def hashed_name(digest, name):
+        """Return the storage name of a file from its content hash, keeping
+        the extension of its original name.
+        """
+        extension = os.path.splitext(name or "")[1].lower()
+        if not re.match(r"^\.[a-z0-9]{1,5}$", extension):
+            extension = ""
+        return f"{digest[:2]}/{digest[2:4]}/{digest}{extension}"
+
+    def save(self, name, content, max_length=None):
+        """Save a file, returning the name of the existing copy if the same
+        content is already stored.
+
+        The content is hashed while it is written to a temporary file in the
+        storage directory, which is then moved into place, so each file is
+        read once and concurrent uploads of the same file are harmless.
+
+        Args:
+            name (str): Original name of the file
+            content (File): File to save
+            max_length (int, optional): Unused, names have a fixed length
+
+        Returns:
+            str: Storage name of the file
+        """
+        if not hasattr(content, "chunks"):
+            content = File(content, name)
+        os.makedirs(self.location, exist_ok=True)
+        digest = hashlib.sha256()
+        temporary = tempfile.NamedTemporaryFile(
+            dir=self.location, prefix=".upload-", delete=False
+        )
+        try:
+            with temporary:
+                for chunk in content.chunks():
+                    digest.update(chunk)
+                    temporary.write(chunk)
+            stored_name = self.hashed_name(digest.hexdigest(), name)
+            path = self.path(stored_name)
+            if os.path.exists(path):
+                os.remove(temporary.name)
+            else:
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                if self.file_permissions_mode is not None:
+                    os.chmod(temporary.name, self.file_permissions_mode)
+                os.replace(temporary.name, path)
+        except BaseException:
+            if os.path.exists(temporary.name):
+                os.remove(temporary.name)
+            raise
+        return stored_name
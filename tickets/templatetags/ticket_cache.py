@@ -0,0 +1,132 @@
+"""Template tags caching rendered ticket fragments (see
+tickets.fragment_cache).
+
+Usage:
+    {% load ticket_cache %}
+    {% ticketcache "card" ticket %}
+        ...
+        {% uncached %}{{ ticket.updated_on | timesince }}{% enduncached %}
+        ...
+    {% endticketcache %}
+
+The viewer's role is taken from the request in the context. Content that
+depends on anything other than the ticket and the role (such as the current
+time or search highlights) must be wrapped in 'uncached' blocks, which are
+rendered on every request and spliced into the cached markup.
+"""
+
+
+from django import template
+from django.utils.safestring import mark_safe
+from .. import fragment_cache
+
+
+register = template.Library()
+
+# Markers standing in for uncached blocks in the cached markup
+UNCACHED_MARKER = "\x00uncached:{}\x00"
+
+# render_context key holding the {uncached node: index} mapping while a
+# fragment is rendered for caching
+MARKING = "ticketcache_marking"
+
+
+class UncachedNode(template.Node):
+    def __init__(self, nodelist):
+        self.nodelist = nodelist
+
+    def render(self, context):
+        marking = context.render_context.get(MARKING)
+        if marking and self in marking:
+            return UNCACHED_MARKER.format(marking[self])
+        return self.nodelist.render(context)
+
+
+class TicketCacheNode(template.Node):
+    def __init__(self, name, ticket, nodelist):
+        self.name = name
+        self.ticket = ticket
+        self.nodelist = nodelist
+        self.uncached_nodes = nodelist.get_nodes_by_type(UncachedNode)
+
+    def get_generation(self, context, request):
+        """Return the fragment generation, fetched once per request."""
+        if request is None:
+            return fragment_cache.get_generation()
+        if not hasattr(request, "ticket_fragment_generation"):
+            request.ticket_fragment_generation = (
+                fragment_cache.get_generation()
+            )
+        return request.ticket_fragment_generation
+
+    def render(self, context):
+        ticket = self.ticket.resolve(context)
+        request = context.get("request")
+        role = getattr(getattr(request, "user", None), "role", "anonymous")
+        key = fragment_cache.make_key(
+            self.name.resolve(context), ticket, role
+        )
+        generation = self.get_generation(context, request)
+
+        fragments = fragment_cache.get_fragment_cache()
+        cached = fragments.get(key)
+        if cached is not None and cached[0] == generation:
+            markup = cached[1]
+            fragment_cache.record(hit=True)
+        else:
+            markup = self.render_with_markers(context)
+            fragments.set(
+                key, (generation, markup), fragment_cache.get_timeout()
+            )
+            fragment_cache.record(hit=False)
+
+        for index, node in enumerate(self.uncached_nodes):
+            markup = markup.replace(
+                UNCACHED_MARKER.format(index), node.render(context)
+            )
+        return mark_safe(markup)
+
+    def render_with_markers(self, context):
+        """Render the fragment with markers in place of the uncached
+        blocks.
+        """
+        previous = context.render_context.get(MARKING)
+        context.render_context[MARKING] = {
+            node: index for index, node in enumerate(self.uncached_nodes)
+        }
+        try:
+            return self.nodelist.render(context)
+        finally:
+            context.render_context[MARKING] = previous
+
+
+@register.tag
+def ticketcache(parser, token):
+    """Cache the enclosed template fragment for a ticket and the viewer's
+    role until the ticket is updated.
+
+    Usage:
+        {% ticketcache "fragment name" ticket %} ... {% endticketcache %}
+    """
+    bits = token.split_contents()
+    if len(bits) != 3:
+        raise template.TemplateSyntaxError(
+            f"'{bits[0]}' tag requires a fragment name and a ticket."
+        )
+    nodelist = parser.parse(("endticketcache",))
+    parser.delete_first_token()
+    return TicketCacheNode(
+        parser.compile_filter(bits[1]),
+        parser.compile_filter(bits[2]),
+        nodelist,
+    )
+
+
+@register.tag
+def uncached(parser, token):
+    """Render the enclosed template on every request inside a
+    'ticketcache' block.
+    """
+    nodelist = parser.parse(("enduncached",))
+    parser.delete_first_token()
+    return UncachedNode(nodelist)
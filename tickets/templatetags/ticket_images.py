@@ -0,0 +1,28 @@
+"""Template tags displaying ticket image derivatives (see
+tickets.derivatives).
+
+Usage:
+    {% load ticket_images %}
+    {% ticket_picture ticket.ticket_image "thumbnail" "Ticket attachment" %}
+    {% ticket_picture ticket.ticket_image "preview" "Preview" link=url %}
+
+Renders a <picture> element with the WebP derivative and a JPEG fallback,
+optionally wrapped in a link, or nothing while the derivatives of a local
+image are being generated.
+"""
+
+
+from django import template
+from ..derivatives import get_derivative_urls
+
+
+register = template.Library()
+
+
+@register.inclusion_tag("ticket_picture.html")
+def ticket_picture(image, size, alt="", link=None):
+    return {
+        "urls": get_derivative_urls(image, size),
+        "alt": alt,
+        "link": link,
+    }
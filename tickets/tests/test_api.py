@@ -0,0 +1,170 @@
+"""Test Tickets Application JSON API"""
+
+
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.contrib.auth import get_user_model
+from django.urls import reverse
+from ..models import Ticket, TicketCategory
+
+
+class TestTicketApi(TestCase):
+    def setUp(self):
+        """Create two customers and a technician, and five tickets raised by
+        the first customer and one by the second.
+
+        customer_account: (accounts.models.CustomUser)
+        other_customer_account: (accounts.models.CustomUser)
+        technician_account: (accounts.models.CustomUser)
+        tickets: (list) - Tickets raised by customer_account
+        other_ticket: (tickets.models.Ticket) - Ticket raised by
+        other_customer_account
+        """
+        self.password = "testingPa$$w0rd!"
+        self.customer_account = get_user_model().objects.create_user(
+            username="customer_account",
+            password=self.password,
+            role=get_user_model().ROLES.customer,
+        )
+        self.other_customer_account = get_user_model().objects.create_user(
+            username="other_customer_account",
+            password=self.password,
+            role=get_user_model().ROLES.customer,
+        )
+        self.technician_account = get_user_model().objects.create_user(
+            username="technician_account",
+            password=self.password,
+            role=get_user_model().ROLES.technician,
+        )
+        category = TicketCategory.objects.create(name="Test Category")
+        self.tickets = [
+            Ticket.objects.create(
+                author=self.customer_account,
+                category=category,
+                title=f"Test Ticket, number {number}",
+                description="<p>Non excepteur <b>voluptate</b> id.</p>",
+            )
+            for number in range(5)
+        ]
+        self.other_ticket = Ticket.objects.create(
+            author=self.other_customer_account,
+            category=category,
+            title="Other Test Ticket",
+            description="<p>Non excepteur voluptate incididunt id.</p>",
+        )
+
+    def test_list_shows_visible_tickets_with_sparse_fields(self):
+        """
+        Test the list returns only the tickets the user can see, with the
+        fields asked for, one page at a time
+        """
+        self.client.login(username="customer_account", password=self.password)
+        response = self.client.get(
+            reverse("ticket_api_list"),
+            {"fields": "id,title,category", "page_size": 3},
+        )
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        self.assertEqual(
+            data["results"][0],
+            {
+                "id": self.tickets[4].pk,
+                "title": "Test Ticket, number 4",
+                "category": "Test Category",
+            },
+        )
+        self.assertIsNone(data["previous"])
+        response = self.client.get(data["next"])
+        data = response.json()
+        self.assertEqual(
+            [ticket["id"] for ticket in data["results"]],
+            [self.tickets[1].pk, self.tickets[0].pk],
+        )
+        self.assertIsNone(data["next"])
+        self.assertIsNotNone(data["previous"])
+
+        self.client.login(
+            username="technician_account", password=self.password
+        )
+        response = self.client.get(reverse("ticket_api_list"))
+        data = response.json()
+        self.assertEqual(len(data["results"]), 6)
+        self.assertNotIn("description_html", data["results"][0])
+        self.assertTrue(data["results"][0]["url"].startswith("http://"))
+
+    def test_unchanged_list_returns_not_modified(self):
+        """
+        Test polling with the ETag of the previous response returns a 304
+        after a single ticket query until a ticket changes
+        """
+        self.client.login(
+            username="technician_account", password=self.password
+        )
+        response = self.client.get(reverse("ticket_api_list"))
+        etag = response["ETag"]
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(
+                reverse("ticket_api_list"), HTTP_IF_NONE_MATCH=etag
+            )
+        self.assertEqual(response.status_code, 304)
+        ticket_queries = [
+            query
+            for query in queries.captured_queries
+            if "tickets_ticket" in query["sql"]
+        ]
+        self.assertEqual(len(ticket_queries), 1)
+
+        self.tickets[0].status = Ticket.STATUS.closed
+        self.tickets[0].save()
+        response = self.client.get(
+            reverse("ticket_api_list"), HTTP_IF_NONE_MATCH=etag
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response["ETag"], etag)
+
+    def test_detail_checks_visibility_and_etag(self):
+        """
+        Test the detail returns a visible ticket, 403 or 404 otherwise, and
+        304 while the ticket is unchanged
+        """
+        self.client.login(username="customer_account", password=self.password)
+        url = reverse("ticket_api_detail", kwargs={"pk": self.tickets[0].pk})
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        self.assertEqual(data["author"], "customer_account")
+        self.assertIn("<b>voluptate</b>", data["description_html"])
+        self.assertIsNone(data["image_url"])
+
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=response["ETag"])
+        self.assertEqual(response.status_code, 304)
+
+        response = self.client.get(
+            reverse("ticket_api_detail", kwargs={"pk": self.other_ticket.pk})
+        )
+        self.assertEqual(response.status_code, 403)
+        response = self.client.get(
+            reverse("ticket_api_detail", kwargs={"pk": 9999})
+        )
+        self.assertEqual(response.status_code, 404)
+
+    def test_errors_are_returned_as_json(self):
+        """
+        Test unknown fields, invalid cursors and missing logins are reported
+        as JSON errors
+        """
+        response = self.client.get(reverse("ticket_api_list"))
+        self.assertEqual(response.status_code, 403)
+        self.assertIn("error", response.json())
+
+        self.client.login(username="customer_account", password=self.password)
+        response = self.client.get(
+            reverse("ticket_api_list"), {"fields": "id,password"}
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json()["error"], "Unknown fields: password.")
+        response = self.client.get(
+            reverse("ticket_api_list"), {"cursor": "not-a-cursor"}
+        )
+        self.assertEqual(response.status_code, 400)
@@ -0,0 +1,197 @@
+"""Test Tickets Application Asynchronous Views"""
+
+
+import asyncio
+import threading
+from urllib.parse import urlencode
+from asgiref.sync import async_to_sync, sync_to_async
+from django.contrib.auth import get_user_model
+from django.test import (
+    AsyncClient,
+    SimpleTestCase,
+    TestCase,
+    override_settings,
+)
+from django.urls import include, path, resolve
+from accounts.async_views import (
+    AsyncProfileDetailView,
+    AsyncProfileListView,
+    AsyncProfileUpdateView,
+)
+from common.utils import thread_per_request
+from ..async_views import AsyncTicketListView, AsyncTicketView
+from ..models import Comment, Ticket, TicketCategory
+
+
+# The site's URLs, with the pages served by the coroutine views as when
+# ASYNC_VIEWS is on
+urlpatterns = [
+    path("tickets/", AsyncTicketListView.as_view(), name="ticket_list"),
+    path(
+        "tickets/<slug:pk>/", AsyncTicketView.as_view(), name="ticket_detail"
+    ),
+    path(
+        "accounts/profile/<slug:pk>/",
+        AsyncProfileDetailView.as_view(),
+        name="profile_detail",
+    ),
+    path(
+        "accounts/profile/<slug:pk>/edit",
+        AsyncProfileUpdateView.as_view(),
+        name="profile_update",
+    ),
+    path(
+        "accounts/profile/search",
+        AsyncProfileListView.as_view(),
+        name="profile_list",
+    ),
+    path("", include("support_hub.urls")),
+]
+
+
+@override_settings(ROOT_URLCONF="tickets.tests.test_async_views")
+class TestAsyncViews(TestCase):
+    def setUp(self):
+        """Create a customer, a technician and an administrator, and a ticket
+        raised by the customer, and log the async client in as the
+        technician.
+
+        customer_account: (accounts.models.CustomUser)
+        technician_account: (accounts.models.CustomUser)
+        administrator_account: (accounts.models.CustomUser)
+        ticket: (tickets.models.Ticket)
+        """
+        self.customer_account = get_user_model().objects.create_user(
+            username="customer_account",
+            role=get_user_model().ROLES.customer,
+        )
+        self.technician_account = get_user_model().objects.create_user(
+            username="technician_account",
+            role=get_user_model().ROLES.technician,
+        )
+        self.administrator_account = get_user_model().objects.create_user(
+            username="administrator_account",
+            role=get_user_model().ROLES.administrator,
+        )
+        self.ticket = Ticket.objects.create(
+            author=self.customer_account,
+            category=TicketCategory.objects.create(name="Test Category"),
+            title="Printer is jammed",
+            description="<p>Non excepteur voluptate incididunt id.</p>",
+        )
+        self.async_client.force_login(self.technician_account)
+
+    def test_views_are_coroutine_functions(self):
+        """
+        Test the coroutine views are recognised as asynchronous by Django's
+        request handler
+        """
+        for url in (
+            "/tickets/",
+            f"/tickets/{self.ticket.pk}/",
+            f"/accounts/profile/{self.customer_account.pk}/",
+            f"/accounts/profile/{self.customer_account.pk}/edit",
+            "/accounts/profile/search",
+        ):
+            with self.subTest(url=url):
+                self.assertTrue(
+                    asyncio.iscoroutinefunction(resolve(url).func)
+                )
+
+    async def test_ticket_list(self):
+        """
+        Test the ticket list is rendered and answers a Not Modified response
+        when unchanged
+        """
+        response = await self.async_client.get("/tickets/")
+        self.assertEqual(response.status_code, 200)
+        self.assertTemplateUsed(response, "ticket_list.html")
+        self.assertContains(response, "Printer is jammed")
+
+        response = await self.async_client.get(
+            "/tickets/", **{"if-none-match": response["ETag"]}
+        )
+        self.assertEqual(response.status_code, 304)
+
+    async def test_ticket_detail_and_comment(self):
+        """
+        Test the ticket page is rendered and a comment posted to it is saved
+        """
+        url = f"/tickets/{self.ticket.pk}/"
+        response = await self.async_client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertTemplateUsed(response, "ticket_detail.html")
+
+        response = await self.async_client.post(
+            url,
+            urlencode({"body": "<p>Cleared the paper tray.</p>"}),
+            content_type="application/x-www-form-urlencoded",
+        )
+        self.assertRedirects(
+            response, url, fetch_redirect_response=False
+        )
+        self.assertTrue(
+            await sync_to_async(
+                Comment.objects.filter(ticket=self.ticket).exists
+            )()
+        )
+
+    def test_permissions_are_checked(self):
+        """
+        Test the login and permission checks of the views still apply
+
+        The synchronous client is used, as Django 3.2 renders the error pages
+        of the asynchronous handler in another thread, which cannot read the
+        test database while the test's transaction is open.
+        """
+        self.client.force_login(self.technician_account)
+        response = self.client.get("/accounts/profile/search")
+        self.assertEqual(response.status_code, 403)
+        response = self.client.get(
+            f"/accounts/profile/{self.customer_account.pk}/"
+        )
+        self.assertEqual(response.status_code, 403)
+        response = self.client.get(
+            f"/accounts/profile/{self.technician_account.pk}/"
+        )
+        self.assertEqual(response.status_code, 200)
+
+        self.client.force_login(self.administrator_account)
+        response = self.client.get("/accounts/profile/search")
+        self.assertEqual(response.status_code, 200)
+        self.assertTemplateUsed(response, "profile_list.html")
+
+    async def test_login_is_required(self):
+        """
+        Test the pages redirect to the login page without a logged in user
+        """
+        response = await AsyncClient().get("/tickets/")
+        self.assertEqual(response.status_code, 302)
+
+
+class TestThreadPerRequest(SimpleTestCase):
+    def test_requests_run_in_their_own_threads(self):
+        """
+        Test the synchronous code of concurrent requests runs in separate
+        threads, at the same time
+        """
+        barrier = threading.Barrier(2, timeout=5)
+        threads = []
+
+        def handle_request():
+            threads.append(threading.get_ident())
+            barrier.wait()
+
+        async def application(scope, receive, send):
+            await sync_to_async(handle_request)()
+
+        wrapped_application = thread_per_request(application, 2)
+
+        async def serve_requests():
+            await asyncio.gather(
+                wrapped_application({}, None, None),
+                wrapped_application({}, None, None),
+            )
+
+        async_to_sync(serve_requests)()
+        self.assertEqual(len(set(threads)), 2)
@@ -0,0 +1,183 @@
+"""Test Tickets Application Local Attachment Storage"""
+
+
+import os
+import shutil
+import tempfile
+from io import BytesIO
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase, override_settings
+from django.contrib.auth import get_user_model
+from PIL import Image
+from ..derivatives import derivative_name
+from ..fields import LocalAttachment
+from ..models import Ticket, TicketCategory
+from ..storage import ContentAddressedStorage
+
+
+def make_png(colour="red"):
+    buffer = BytesIO()
+    Image.new("RGB", (20, 20), colour).save(buffer, "PNG")
+    return buffer.getvalue()
+
+
+class TestLocalAttachments(TestCase):
+    def setUp(self):
+        """Store attachments locally in a temporary directory, and create a
+        customer and a ticket category to raise tickets with.
+
+        customer_account: (accounts.models.CustomUser)
+        ticket_category: (tickets.models.TicketCategory)
+        image: (bytes) - PNG image content
+        """
+        root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, root)
+        local_settings = override_settings(
+            LOCAL_ATTACHMENTS=True,
+            ATTACHMENT_ROOT=root,
+            ATTACHMENT_SENDFILE_HEADER=None,
+        )
+        local_settings.enable()
+        self.addCleanup(local_settings.disable)
+        self.password = "testingPa$$w0rd!"
+        self.customer_account = get_user_model().objects.create_user(
+            username="customer_account",
+            password=self.password,
+            role=get_user_model().ROLES.customer,
+        )
+        self.ticket_category = TicketCategory.objects.create(
+            name="Test Category"
+        )
+        self.image = make_png()
+
+    def create_ticket(self, content):
+        ticket = Ticket.objects.create(
+            author=self.customer_account,
+            category=self.ticket_category,
+            title="Test Ticket",
+            description="<p>Non excepteur voluptate incididunt id.</p>",
+            ticket_image=SimpleUploadedFile("Photo.PNG", content),
+        )
+        return Ticket.objects.get(pk=ticket.pk)
+
+    def test_duplicate_uploads_are_stored_once(self):
+        """
+        Test uploading the same image twice stores a single file named after
+        its content
+        """
+        first = self.create_ticket(self.image)
+        second = self.create_ticket(self.image)
+        other = self.create_ticket(make_png("blue"))
+        self.assertIsInstance(first.ticket_image, LocalAttachment)
+        self.assertEqual(first.ticket_image, second.ticket_image)
+        self.assertNotEqual(first.ticket_image, other.ticket_image)
+        self.assertTrue(first.ticket_image.name.endswith(".png"))
+        self.assertTrue(
+            first.ticket_image.url.startswith("/tickets/attachments/")
+        )
+        storage = ContentAddressedStorage()
+        self.assertTrue(storage.exists(first.ticket_image.name))
+        self.assertEqual(
+            sorted(
+                name
+                for _, _, names in os.walk(storage.location)
+                for name in names
+            ),
+            sorted(
+                os.path.basename(ticket.ticket_image.name)
+                for ticket in (first, other)
+            ),
+        )
+
+    def test_attachment_view(self):
+        """
+        Test attachments are served with immutable cache headers, support
+        range and conditional requests and can be handed to the web server
+        """
+        url = self.create_ticket(self.image).ticket_image.url
+        self.client.login(username="customer_account", password=self.password)
+
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(b"".join(response.streaming_content), self.image)
+        self.assertEqual(response["Content-Type"], "image/png")
+        self.assertEqual(response["Accept-Ranges"], "bytes")
+        self.assertIn("immutable", response["Cache-Control"])
+
+        response = self.client.get(url, HTTP_RANGE="bytes=0-7")
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(
+            b"".join(response.streaming_content), self.image[:8]
+        )
+        self.assertEqual(
+            response["Content-Range"], f"bytes 0-7/{len(self.image)}"
+        )
+        response = self.client.get(url, HTTP_RANGE="bytes=-4")
+        self.assertEqual(
+            b"".join(response.streaming_content), self.image[-4:]
+        )
+        response = self.client.get(url, HTTP_RANGE="bytes=100000-")
+        self.assertEqual(response.status_code, 416)
+
+        etag = response["ETag"]
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+        with override_settings(ATTACHMENT_SENDFILE_HEADER="X-Sendfile"):
+            response = self.client.get(url)
+        self.assertEqual(response.content, b"")
+        self.assertTrue(os.path.isfile(response["X-Sendfile"]))
+
+        response = self.client.get("/tickets/attachments/../settings.py")
+        self.assertEqual(response.status_code, 404)
+
+    def test_attachment_is_only_served_to_users_viewing_its_ticket(self):
+        """
+        Test an attachment and its derivatives are only served to users
+        allowed to view a ticket with the image, others get a 404
+        """
+        attachment = self.create_ticket(self.image).ticket_image
+        thumbnail = derivative_name(attachment.name, "thumbnail", "webp")
+        storage = ContentAddressedStorage()
+        with open(storage.path(thumbnail), "wb") as file:
+            file.write(b"thumbnail")
+        thumbnail_url = storage.url(thumbnail)
+        get_user_model().objects.create_user(
+            username="other_customer_account",
+            password=self.password,
+            role=get_user_model().ROLES.customer,
+        )
+        get_user_model().objects.create_user(
+            username="technician_account",
+            password=self.password,
+            role=get_user_model().ROLES.technician,
+        )
+
+        self.client.login(
+            username="other_customer_account", password=self.password
+        )
+        self.assertEqual(self.client.get(attachment.url).status_code, 404)
+        self.assertEqual(self.client.get(thumbnail_url).status_code, 404)
+
+        for username in ("customer_account", "technician_account"):
+            self.client.login(username=username, password=self.password)
+            self.assertEqual(self.client.get(attachment.url).status_code, 200)
+            response = self.client.get(thumbnail_url)
+            self.assertEqual(
+                b"".join(response.streaming_content), b"thumbnail"
+            )
+
+    def test_unused_attachment_is_deleted_with_ticket(self):
+        """
+        Test a stored image is kept while another ticket has it, and deleted
+        with the last ticket that has it
+        """
+        first = self.create_ticket(self.image)
+        second = self.create_ticket(self.image)
+        storage = ContentAddressedStorage()
+        with self.captureOnCommitCallbacks(execute=True):
+            first.delete()
+        self.assertTrue(storage.exists(second.ticket_image.name))
+        with self.captureOnCommitCallbacks(execute=True):
+            second.delete()
+        self.assertFalse(storage.exists(second.ticket_image.name))
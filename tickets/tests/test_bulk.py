@@ -0,0 +1,205 @@
+"""Test Tickets Application Bulk Ticket Updates"""
+
+
+from django.core import mail
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.contrib.auth import get_user_model
+from django.urls import reverse
+from .. import counters
+from ..models import Team, Ticket, TicketCategory
+
+
+@override_settings(
+    EMAIL_BACKEND="django.core.mail.backends.locmem.EmailBackend"
+)
+class TestBulkTicketUpdate(TestCase):
+    def setUp(self):
+        """Create two customers, a technician and a team, and three open
+        tickets: two raised by the first customer and one by the second.
+
+        customer_account: (accounts.models.CustomUser)
+        other_customer_account: (accounts.models.CustomUser)
+        technician_account: (accounts.models.CustomUser)
+        team: (tickets.models.Team)
+        tickets: (list) - tickets.models.Ticket objects
+        """
+        cache.clear()
+        self.password = "testingPa$$w0rd!"
+        users = get_user_model().objects
+        self.customer_account = users.create_user(
+            username="customer_account",
+            email="customer@example.com",
+            password=self.password,
+            role=get_user_model().ROLES.customer,
+        )
+        self.other_customer_account = users.create_user(
+            username="other_customer_account",
+            email="other@example.com",
+            password=self.password,
+            role=get_user_model().ROLES.customer,
+        )
+        self.technician_account = users.create_user(
+            username="technician_account",
+            password=self.password,
+            role=get_user_model().ROLES.technician,
+        )
+        self.team = Team.objects.create(name="Service Desk")
+        category = TicketCategory.objects.create(name="Test Category")
+        self.tickets = [
+            Ticket.objects.create(
+                author=author,
+                category=category,
+                title=f"Test Ticket {number}",
+                description="<p>Non excepteur voluptate incididunt id.</p>",
+            )
+            for number, author in enumerate(
+                [
+                    self.customer_account,
+                    self.customer_account,
+                    self.other_customer_account,
+                ]
+            )
+        ]
+        self.url = reverse("ticket_bulk_update")
+
+    def post(self, **data):
+        return self.client.post(
+            self.url,
+            {"tickets": [ticket.pk for ticket in self.tickets], **data},
+        )
+
+    def test_tickets_are_updated_with_one_query(self):
+        """
+        Test a technician can update several tickets with a single UPDATE,
+        keeping the cached counters in step and sending each author one
+        email
+        """
+        counters.get_counts(self.customer_account)
+        counters.get_counts(self.technician_account)
+        self.client.login(
+            username="technician_account", password=self.password
+        )
+        with CaptureQueriesContext(connection) as queries:
+            response = self.post(
+                status=Ticket.STATUS.inprogress,
+                priority=Ticket.PRIORITY.high,
+                assigned_team=self.team.pk,
+                assigned_technician=self.technician_account.pk,
+            )
+        updates = [
+            query
+            for query in queries
+            if query["sql"].startswith('UPDATE "tickets_ticket"')
+        ]
+        self.assertEqual(len(updates), 1)
+        self.assertRedirects(response, reverse("ticket_list"))
+        for ticket in Ticket.objects.all():
+            self.assertEqual(ticket.status, Ticket.STATUS.inprogress)
+            self.assertEqual(ticket.priority, Ticket.PRIORITY.high)
+            self.assertEqual(ticket.assigned_team, self.team)
+            self.assertEqual(
+                ticket.assigned_technician, self.technician_account
+            )
+
+        customer = counters.get_counts(self.customer_account)
+        self.assertEqual(customer["authored"]["open"], 0)
+        self.assertEqual(customer["authored"]["inprogress"], 2)
+        technician = counters.get_counts(self.technician_account)
+        self.assertEqual(technician["assigned"]["inprogress"], 3)
+
+        self.assertEqual(len(mail.outbox), 2)
+        recipients = {message.to[0]: message for message in mail.outbox}
+        self.assertIn(
+            "2 of your tickets", recipients["customer@example.com"].subject
+        )
+        self.assertIn("Test Ticket 2", recipients["other@example.com"].body)
+
+    def test_tickets_can_be_assigned_to_an_administrator(self):
+        """
+        Test tickets can be assigned in bulk to an administrator, as with
+        the single ticket form, but not to a customer
+        """
+        administrator_account = get_user_model().objects.create_user(
+            username="administrator_account",
+            role=get_user_model().ROLES.administrator,
+        )
+        self.client.login(
+            username="technician_account", password=self.password
+        )
+        response = self.post(assigned_technician=administrator_account.pk)
+        self.assertRedirects(response, reverse("ticket_list"))
+        self.assertEqual(
+            Ticket.objects.filter(
+                assigned_technician=administrator_account
+            ).count(),
+            3,
+        )
+
+        self.post(assigned_technician=self.customer_account.pk)
+        self.assertEqual(
+            Ticket.objects.filter(
+                assigned_technician=self.customer_account
+            ).count(),
+            0,
+        )
+
+    def test_unchanged_tickets_are_skipped(self):
+        """
+        Test tickets that already have the chosen values are not updated or
+        notified
+        """
+        Ticket.objects.filter(pk=self.tickets[0].pk).update(
+            status=Ticket.STATUS.closed
+        )
+        self.client.login(
+            username="technician_account", password=self.password
+        )
+        response = self.post(status=Ticket.STATUS.closed)
+        self.assertEqual(
+            str(list(response.wsgi_request._messages)[0]),
+            "2 of 3 selected tickets updated.",
+        )
+        self.assertEqual(
+            [message.to for message in mail.outbox],
+            [["customer@example.com"], ["other@example.com"]],
+        )
+
+    def test_bulk_update_requires_elevated_role_and_a_change(self):
+        """
+        Test customers cannot update tickets in bulk, and submitting without
+        choosing a change is rejected
+        """
+        self.client.login(username="customer_account", password=self.password)
+        response = self.post(status=Ticket.STATUS.closed)
+        self.assertEqual(response.status_code, 403)
+        self.assertFalse(
+            Ticket.objects.filter(status=Ticket.STATUS.closed).exists()
+        )
+
+        self.client.login(
+            username="technician_account", password=self.password
+        )
+        response = self.post()
+        self.assertEqual(
+            str(list(response.wsgi_request._messages)[0]),
+            "Choose at least one change to make.",
+        )
+
+    def test_ticket_list_shows_bulk_actions_to_technicians(self):
+        """
+        Test the ticket list shows the bulk actions form and ticket
+        checkboxes to technicians only
+        """
+        self.client.login(
+            username="technician_account", password=self.password
+        )
+        response = self.client.get(reverse("ticket_list"))
+        self.assertContains(response, 'id="bulk-update-form"')
+        self.assertContains(response, 'form="bulk-update-form"', count=3)
+
+        self.client.login(username="customer_account", password=self.password)
+        response = self.client.get(reverse("ticket_list"))
+        self.assertNotContains(response, "bulk-update-form")
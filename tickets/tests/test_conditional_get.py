@@ -0,0 +1,182 @@
+"""Test Tickets Application Conditional GET"""
+
+
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.urls import reverse
+from ..models import Comment, Team, Ticket, TicketCategory
+
+
+class TestConditionalGet(TestCase):
+    def setUp(self):
+        """Create a customer and a technician, and a ticket raised by the
+        customer, and log in as the technician.
+
+        customer_account: (accounts.models.CustomUser)
+        technician_account: (accounts.models.CustomUser)
+        ticket: (tickets.models.Ticket)
+        """
+        cache.clear()
+        self.password = "testingPa$$w0rd!"
+        self.customer_account = get_user_model().objects.create_user(
+            username="customer_account",
+            password=self.password,
+            role=get_user_model().ROLES.customer,
+        )
+        self.technician_account = get_user_model().objects.create_user(
+            username="technician_account",
+            password=self.password,
+            role=get_user_model().ROLES.technician,
+        )
+        self.ticket = Ticket.objects.create(
+            author=self.customer_account,
+            category=TicketCategory.objects.create(name="Test Category"),
+            title="Printer is jammed",
+            description="<p>Non excepteur voluptate incididunt id.</p>",
+        )
+        self.client.login(
+            username="technician_account", password=self.password
+        )
+
+    def get(self, url, etag=None, **params):
+        headers = {"HTTP_IF_NONE_MATCH": etag} if etag else {}
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url, params, **headers)
+        ticket_queries = [
+            query
+            for query in queries.captured_queries
+            if '"tickets_ticket"' in query["sql"]
+        ]
+        return response, ticket_queries
+
+    def test_unchanged_list_returns_not_modified(self):
+        """
+        Test the ticket list returns a 304 after a single ticket query while
+        the tickets on the page are unchanged
+        """
+        url = reverse("ticket_list")
+        response, _ = self.get(url)
+        self.assertEqual(response.status_code, 200)
+        etag = response["ETag"]
+        self.assertIn("Last-Modified", response)
+        self.assertIn("no-cache", response["Cache-Control"])
+
+        response, ticket_queries = self.get(url, etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(len(ticket_queries), 1)
+        self.assertEqual(response["ETag"], etag)
+
+        # Other filter parameters are a different page
+        response, _ = self.get(url, etag, filter_by_status="open")
+        self.assertEqual(response.status_code, 200)
+
+        self.ticket.title = "Printer is fixed"
+        self.ticket.save()
+        response, _ = self.get(url, etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, "Printer is fixed")
+
+    def test_list_etag_depends_on_the_viewer(self):
+        """
+        Test another user does not get a 304 for the ETag of a page rendered
+        for someone else
+        """
+        url = reverse("ticket_list")
+        etag = self.get(url)[0]["ETag"]
+        self.client.login(username="customer_account", password=self.password)
+        response, _ = self.get(url, etag)
+        self.assertEqual(response.status_code, 200)
+
+    def test_detail_follows_ticket_and_comments(self):
+        """
+        Test the detail page returns a 304 without any query beyond the
+        ticket fetched for the permission check, until the ticket or its
+        comments change
+        """
+        url = reverse("ticket_detail", kwargs={"pk": self.ticket.pk})
+        etag = self.get(url)[0]["ETag"]
+        response, ticket_queries = self.get(url, etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(len(ticket_queries), 1)
+
+        comment = Comment.objects.create(
+            ticket=self.ticket,
+            author=self.customer_account,
+            body="<p>It is still jammed, please help.</p>",
+        )
+        response = self.get(url, etag)[0]
+        self.assertEqual(response.status_code, 200)
+        etag = response["ETag"]
+        comment.delete()
+        self.assertEqual(self.get(url, etag)[0].status_code, 200)
+
+    def test_new_team_or_technician_changes_the_etag(self):
+        """
+        Test creating a team or a technician, listed in the filter
+        dropdowns, changes the ETag of the ticket list, and creating a
+        customer does not
+        """
+        url = reverse("ticket_list")
+        etag = self.get(url)[0]["ETag"]
+        get_user_model().objects.create_user(
+            username="other_customer_account",
+            role=get_user_model().ROLES.customer,
+        )
+        self.assertEqual(self.get(url, etag)[0].status_code, 304)
+
+        Team.objects.create(name="Field Services")
+        response = self.get(url, etag)[0]
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, "Field Services")
+
+        etag = response["ETag"]
+        get_user_model().objects.create_user(
+            username="other_technician_account",
+            role=get_user_model().ROLES.technician,
+        )
+        response = self.get(url, etag)[0]
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, "other_technician_account")
+
+    def test_deleted_technician_changes_the_etag(self):
+        """
+        Test deleting the technician assigned to a ticket, which unassigns
+        the ticket without changing 'updated_on', changes the ETag of the
+        ticket pages
+        """
+        other_technician = get_user_model().objects.create_user(
+            username="other_technician_account",
+            role=get_user_model().ROLES.technician,
+        )
+        Ticket.objects.filter(pk=self.ticket.pk).update(
+            assigned_technician=other_technician
+        )
+        urls = (
+            reverse("ticket_list"),
+            reverse("ticket_detail", args=[self.ticket.pk]),
+        )
+        etags = [self.get(url)[0]["ETag"] for url in urls]
+        other_technician.delete()
+        for url, etag in zip(urls, etags):
+            response = self.get(url, etag)[0]
+            self.assertEqual(response.status_code, 200)
+            self.assertNotContains(response, "other_technician_account")
+
+    def test_pending_message_is_rendered(self):
+        """
+        Test a page with a flash message to show is rendered even when the
+        ETag matches
+        """
+        url = reverse("ticket_list")
+        etag = self.get(url)[0]["ETag"]
+        self.client.post(
+            reverse("ticket_bulk_update"),
+            {"tickets": [self.ticket.pk], "status": self.ticket.status},
+        )
+        response = self.get(url, etag)[0]
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, "0 of 1 selected tickets updated.")
+        self.assertEqual(self.get(url, etag)[0].status_code, 304)
@@ -0,0 +1,134 @@
+"""Test Tickets Application Ticket Counters"""
+
+
+from io import StringIO
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.contrib.auth import get_user_model
+from django.urls import reverse
+from django.utils import timezone
+from .. import counters
+from ..models import Ticket, TicketCategory, TicketCounter
+
+
+class TestTicketCounters(TestCase):
+    def setUp(self):
+        """Create a customer and a technician, a ticket category and two
+        tickets raised by the customer.
+
+        customer_account: (accounts.models.CustomUser)
+        technician_account: (accounts.models.CustomUser)
+        ticket: (tickets.models.Ticket) - Open ticket raised by the customer
+        """
+        self.password = "testingPa$$w0rd!"
+        self.customer_account = get_user_model().objects.create_user(
+            username="customer_account",
+            password=self.password,
+            role=get_user_model().ROLES.customer,
+        )
+        self.technician_account = get_user_model().objects.create_user(
+            username="technician_account",
+            password=self.password,
+            role=get_user_model().ROLES.technician,
+        )
+        self.ticket_category = TicketCategory.objects.create(
+            name="Test Category"
+        )
+        self.ticket = self.create_ticket()
+        self.create_ticket(status=Ticket.STATUS.closed)
+
+    def create_ticket(self, **kwargs):
+        return Ticket.objects.create(
+            author=self.customer_account,
+            category=self.ticket_category,
+            title="Test Ticket",
+            description="<p>Non excepteur voluptate incididunt id.</p>",
+            **kwargs,
+        )
+
+    def test_counters_follow_ticket_changes(self):
+        """
+        Test counters are adjusted when tickets are created,
+        reassigned, change status or are deleted
+        """
+        customer = counters.get_counts(self.customer_account)
+        self.assertEqual(customer["authored"]["open"], 1)
+        self.assertEqual(customer["authored"]["closed"], 1)
+        counters.get_counts(self.technician_account)
+
+        with CaptureQueriesContext(connection) as queries:
+            self.create_ticket()
+            self.ticket.assigned_technician = self.technician_account
+            self.ticket.status = Ticket.STATUS.inprogress
+            self.ticket.save()
+            customer = counters.get_counts(self.customer_account)
+            technician = counters.get_counts(self.technician_account)
+        # Counters are adjusted and read without counting tickets
+        self.assertFalse(
+            any(
+                "COUNT(" in query["sql"].upper() and
+                '"tickets_ticket"' in query["sql"]
+                for query in queries
+            )
+        )
+        self.assertEqual(customer["authored"]["open"], 1)
+        self.assertEqual(customer["authored"]["inprogress"], 1)
+        self.assertEqual(technician["assigned"]["inprogress"], 1)
+
+        self.ticket.delete()
+        technician = counters.get_counts(self.technician_account)
+        self.assertEqual(technician["assigned"]["inprogress"], 0)
+
+    def test_counters_are_adjusted_atomically(self):
+        """
+        Test counters are adjusted with a single update, without reading
+        them first, and stale counters are recomputed
+        """
+        counters.get_counts(self.customer_account)
+        with CaptureQueriesContext(connection) as queries:
+            counters.adjust(
+                self.customer_account.pk, "authored", Ticket.STATUS.open, 2
+            )
+        self.assertEqual(len(queries), 1)
+        self.assertTrue(queries[0]["sql"].startswith("UPDATE"))
+        customer = counters.get_counts(self.customer_account)
+        self.assertEqual(customer["authored"]["open"], 3)
+
+        TicketCounter.objects.update(
+            counted_on=timezone.now() - counters.COUNTER_MAX_AGE * 2
+        )
+        customer = counters.get_counts(self.customer_account)
+        self.assertEqual(customer["authored"]["open"], 1)
+
+    def test_reconcile_command_corrects_drift(self):
+        """
+        Test the reconcile command recomputes counters changed without
+        signals
+        """
+        counters.get_counts(self.customer_account)
+        Ticket.objects.update(status=Ticket.STATUS.closed)
+        call_command("reconcile_ticket_counters", stdout=StringIO())
+        customer = counters.get_counts(self.customer_account)
+        self.assertEqual(customer["authored"]["open"], 0)
+        self.assertEqual(customer["authored"]["closed"], 2)
+
+    def test_navbar_badges(self):
+        """
+        Test the navbar shows the open ticket count for customers and the
+        assigned open ticket count for technicians
+        """
+        self.client.login(username="customer_account", password=self.password)
+        response = self.client.get(reverse("ticket_list"))
+        self.assertEqual(response.context["my_open_ticket_count"], 1)
+        self.assertContains(response, "1 open tickets raised by me")
+
+        self.ticket.assigned_technician = self.technician_account
+        self.ticket.save()
+        self.client.login(
+            username="technician_account", password=self.password
+        )
+        response = self.client.get(reverse("ticket_list"))
+        self.assertEqual(response.context["assigned_open_ticket_count"], 1)
+        self.assertContains(response, "1 open tickets assigned to me")
@@ -0,0 +1,156 @@
+"""Test Tickets Application Image Derivatives"""
+
+
+import shutil
+import tempfile
+from io import BytesIO
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase, override_settings
+from django.contrib.auth import get_user_model
+from django.urls import reverse
+from PIL import Image
+from .. import derivatives
+from ..models import Ticket, TicketCategory
+from ..storage import ContentAddressedStorage
+
+
+def make_photo():
+    """Return a JPEG photo with EXIF metadata, including an orientation
+    rotating it to portrait.
+    """
+    image = Image.new("RGB", (2000, 1000), "red")
+    exif = Image.Exif()
+    # Orientation, rotated 90 degrees
+    exif[0x0112] = 6
+    # Camera make
+    exif[0x010F] = "Test Camera"
+    buffer = BytesIO()
+    image.save(buffer, "JPEG", exif=exif.tobytes())
+    return buffer.getvalue()
+
+
+class TestImageDerivatives(TestCase):
+    def setUp(self):
+        """Store attachments locally in a temporary directory, generating
+        derivatives in the web process, and create a customer and a ticket
+        category to raise tickets with.
+
+        customer_account: (accounts.models.CustomUser)
+        ticket_category: (tickets.models.TicketCategory)
+        """
+        root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, root)
+        local_settings = override_settings(
+            LOCAL_ATTACHMENTS=True,
+            ATTACHMENT_ROOT=root,
+            DERIVATIVE_WORKERS=0,
+        )
+        local_settings.enable()
+        self.addCleanup(local_settings.disable)
+        self.password = "testingPa$$w0rd!"
+        self.customer_account = get_user_model().objects.create_user(
+            username="customer_account",
+            password=self.password,
+            role=get_user_model().ROLES.customer,
+        )
+        self.ticket_category = TicketCategory.objects.create(
+            name="Test Category"
+        )
+
+    def create_ticket(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            ticket = Ticket.objects.create(
+                author=self.customer_account,
+                category=self.ticket_category,
+                title="Test Ticket",
+                description="<p>Non excepteur voluptate incididunt id.</p>",
+                ticket_image=SimpleUploadedFile("photo.jpg", make_photo()),
+            )
+        return Ticket.objects.get(pk=ticket.pk)
+
+    def test_derivatives_are_resized_and_stripped(self):
+        """
+        Test derivatives are generated in each size and format when a ticket
+        is saved, oriented and without EXIF metadata
+        """
+        name = self.create_ticket().ticket_image.name
+        storage = ContentAddressedStorage()
+        for derivative, (max_size, image_format) in (
+            derivatives.derivative_names(name).items()
+        ):
+            with storage.open(derivative) as file:
+                image = Image.open(file)
+                self.assertEqual(image.format, image_format)
+                self.assertEqual(max(image.size), max_size)
+                # Rotated by the EXIF orientation
+                self.assertGreater(image.height, image.width)
+                self.assertEqual(len(image.getexif()), 0)
+
+    def test_derivatives_are_shown_once_ready(self):
+        """
+        Test the list and detail pages show the derivatives once they exist,
+        and missing derivatives are generated again
+        """
+        ticket = self.create_ticket()
+        self.client.login(username="customer_account", password=self.password)
+        response = self.client.get(reverse("ticket_list"))
+        self.assertContains(response, ".thumbnail.webp")
+        response = self.client.get(
+            reverse("ticket_detail", kwargs={"pk": ticket.pk})
+        )
+        self.assertContains(response, ".preview.jpeg")
+
+        storage = ContentAddressedStorage()
+        thumbnail = derivatives.derivative_name(
+            ticket.ticket_image.name, "thumbnail", "webp"
+        )
+        storage.delete(thumbnail)
+        with self.settings(DERIVATIVE_WORKERS=1):
+            response = self.client.get(reverse("ticket_list"))
+            self.assertNotContains(response, ".thumbnail.webp")
+            # Generated again in the process pool
+            derivatives.schedule_derivatives(ticket.ticket_image).result(
+                timeout=60
+            )
+        self.assertTrue(storage.exists(thumbnail))
+
+        response = self.client.get(
+            ContentAddressedStorage().url(thumbnail)
+        )
+        self.assertEqual(response["Content-Type"], "image/webp")
+
+    def test_etag_changes_once_derivatives_are_ready(self):
+        """
+        Test the list and detail pages rendered while the derivatives were
+        being generated are not answered with a 304 once they are ready
+        """
+        ticket = self.create_ticket()
+        self.client.login(username="customer_account", password=self.password)
+        storage = ContentAddressedStorage()
+        for name in derivatives.derivative_names(ticket.ticket_image.name):
+            storage.delete(name)
+        urls = (
+            reverse("ticket_list"),
+            reverse("ticket_detail", kwargs={"pk": ticket.pk}),
+        )
+        with self.settings(DERIVATIVE_WORKERS=1):
+            etags = [self.client.get(url)["ETag"] for url in urls]
+            derivatives.schedule_derivatives(ticket.ticket_image).result(
+                timeout=60
+            )
+        for url, etag in zip(urls, etags):
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+            self.assertEqual(response.status_code, 200)
+            self.assertContains(response, "<picture")
+
+    def test_cloudinary_images_use_transformations(self):
+        """
+        Test images stored in Cloudinary are resized with URL
+        transformations
+        """
+        image = Ticket._meta.get_field("ticket_image").to_python(
+            "image/upload/v1/ticket.png"
+        )
+        urls = derivatives.get_derivative_urls(image, "thumbnail")
+        self.assertIn("w_320", urls["webp"])
+        self.assertTrue(urls["webp"].endswith("ticket.webp"))
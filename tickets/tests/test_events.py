@@ -0,0 +1,267 @@
+"""Test Tickets Application Live Events"""
+
+
+import asyncio
+import json
+import threading
+from asgiref.sync import async_to_sync
+from django.conf import settings
+from django.test import TestCase, override_settings
+from django.contrib.auth import get_user_model
+from django.urls import reverse
+from .. import events, sse
+from ..bulk import bulk_update_tickets
+from ..models import Comment, Ticket, TicketCategory
+
+
+class RecordingBroker(events.InProcessBroker):
+    """In-process broker also keeping the published events in
+    'published'.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.published = []
+
+    def publish(self, event):
+        self.published.append(event)
+        super().publish(event)
+
+
+@override_settings(
+    TICKET_EVENT_BROKER="tickets.tests.test_events.RecordingBroker"
+)
+class TestTicketEvents(TestCase):
+    def setUp(self):
+        """Create two customers and a technician, and a ticket raised by
+        each customer, and start from an empty recording broker.
+
+        customer_account: (accounts.models.CustomUser)
+        technician_account: (accounts.models.CustomUser)
+        ticket: (tickets.models.Ticket) - Ticket raised by customer_account
+        other_ticket: (tickets.models.Ticket) - Ticket raised by the other
+        customer
+        broker: (RecordingBroker)
+        """
+        self.password = "testingPa$$w0rd!"
+        self.customer_account = get_user_model().objects.create_user(
+            username="customer_account",
+            password=self.password,
+            role=get_user_model().ROLES.customer,
+        )
+        other_customer_account = get_user_model().objects.create_user(
+            username="other_customer_account",
+            password=self.password,
+            role=get_user_model().ROLES.customer,
+        )
+        self.technician_account = get_user_model().objects.create_user(
+            username="technician_account",
+            password=self.password,
+            role=get_user_model().ROLES.technician,
+        )
+        category = TicketCategory.objects.create(name="Test Category")
+        self.ticket, self.other_ticket = [
+            Ticket.objects.create(
+                author=author,
+                category=category,
+                title="Printer is jammed",
+                description="<p>Non excepteur voluptate incididunt id.</p>",
+            )
+            for author in (self.customer_account, other_customer_account)
+        ]
+        self.broker = events.get_broker()
+        self.broker.published.clear()
+
+    def test_events_are_published_on_commit(self):
+        """
+        Test saving a ticket, posting a comment and updating tickets in bulk
+        publish events once the changes are committed
+        """
+        with self.captureOnCommitCallbacks(execute=True):
+            self.ticket.status = Ticket.STATUS.inprogress
+            self.ticket.save()
+            self.assertEqual(self.broker.published, [])
+        event = self.broker.published.pop()
+        self.assertEqual(event.event_type, "ticket-changed")
+        self.assertEqual(event.data["status_display"], "In Progress")
+
+        with self.captureOnCommitCallbacks(execute=True):
+            comment = Comment.objects.create(
+                ticket=self.ticket,
+                author=self.technician_account,
+                body="<p>The printer has been cleared.</p>",
+            )
+        event = self.broker.published.pop()
+        self.assertEqual(event.event_type, "comment-added")
+        self.assertEqual(event.data["comment_id"], comment.pk)
+        self.assertIn("technician_account", event.data["html"])
+        self.assertIn("The printer has been cleared.", event.data["html"])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            bulk_update_tickets(
+                Ticket.objects.all(),
+                {"status": Ticket.STATUS.closed},
+                self.technician_account,
+                site_url="testserver",
+            )
+        self.assertEqual(
+            [
+                (event.ticket_id, event.data["status"])
+                for event in self.broker.published
+            ],
+            [
+                (self.ticket.pk, Ticket.STATUS.closed),
+                (self.other_ticket.pk, Ticket.STATUS.closed),
+            ],
+        )
+
+    def test_brokers_must_implement_publish_and_subscribe(self):
+        """
+        Test a broker missing one of the BaseBroker methods cannot be
+        created
+        """
+        class PublishOnlyBroker(events.BaseBroker):
+            def publish(self, event):
+                pass
+
+        with self.assertRaises(TypeError):
+            PublishOnlyBroker()
+
+    def test_wsgi_fallback_tells_browsers_not_to_reconnect(self):
+        """
+        Test the events path answers 204 when served by Django, under the
+        same path as the ASGI stream
+        """
+        self.assertEqual(reverse("ticket_events"), sse.EVENTS_PATH)
+        self.client.login(username="customer_account", password=self.password)
+        response = self.client.get(reverse("ticket_events"))
+        self.assertEqual(response.status_code, 204)
+
+
+class TestEventStream(TestCase):
+    def setUp(self):
+        """Create a customer and log them in.
+
+        customer_account: (accounts.models.CustomUser)
+        session_cookie: (bytes) - Cookie header of the customer's session
+        """
+        self.customer_account = get_user_model().objects.create_user(
+            username="customer_account",
+            password="testingPa$$w0rd!",
+            role=get_user_model().ROLES.customer,
+        )
+        self.client.force_login(self.customer_account)
+        session_id = self.client.cookies[settings.SESSION_COOKIE_NAME].value
+        self.session_cookie = (
+            f"{settings.SESSION_COOKIE_NAME}={session_id}".encode()
+        )
+
+    def stream(self, publish, headers=None, query_string=b"", shared=False):
+        """Run the events application with an in-process broker, calling
+        'publish(broker)' from another thread once the stream has started,
+        then disconnecting. 'shared' marks the broker as shared between
+        processes.
+
+        Returns:
+            tuple: Response status and the body sent
+        """
+        broker = events.InProcessBroker()
+        broker.shared = shared
+        sent = []
+        disconnect = asyncio.Event()
+
+        async def receive():
+            await disconnect.wait()
+            return {"type": "http.disconnect"}
+
+        async def send(message):
+            sent.append(message)
+            if message.get("more_body") and len(sent) == 2:
+                # Stream started, publish from a thread as a view would and
+                # disconnect once the events have been delivered
+                threading.Thread(target=publish, args=(broker,)).start()
+                asyncio.get_running_loop().call_later(0.2, disconnect.set)
+
+        scope = {
+            "type": "http",
+            "method": "GET",
+            "path": sse.EVENTS_PATH,
+            "query_string": query_string,
+            "headers": (
+                [(b"cookie", self.session_cookie)]
+                if headers is None
+                else headers
+            ),
+        }
+        with override_settings(TICKET_EVENT_BROKER="test.broker"):
+            events._brokers["test.broker"] = broker
+            try:
+                async_to_sync(sse.events_application)(scope, receive, send)
+            finally:
+                del events._brokers["test.broker"]
+        body = b"".join(message.get("body", b"") for message in sent[1:])
+        return sent[0]["status"], body.decode()
+
+    def test_stream_sends_visible_events_only(self):
+        """
+        Test the stream sends the events of the user's tickets only,
+        limited to one ticket when asked
+        """
+        def publish(broker):
+            for ticket_id, author_id in (
+                (1, self.customer_account.pk),
+                (2, self.customer_account.pk + 100),
+                (3, self.customer_account.pk),
+            ):
+                broker.publish(
+                    events.TicketEvent(
+                        "ticket-changed",
+                        ticket_id,
+                        author_id,
+                        {"id": ticket_id},
+                    )
+                )
+
+        status, body = self.stream(publish)
+        self.assertEqual(status, 200)
+        self.assertTrue(body.startswith("retry: "))
+        sent_ids = [
+            json.loads(line[len("data: "):])["id"]
+            for line in body.splitlines()
+            if line.startswith("data: ")
+        ]
+        self.assertEqual(sent_ids, [1, 3])
+        self.assertIn("event: ticket-changed", body)
+
+        status, body = self.stream(publish, query_string=b"ticket=3")
+        self.assertNotIn('"id": 1', body)
+        self.assertIn('"id": 3', body)
+
+    def test_stream_requires_login(self):
+        """
+        Test requests without a logged in session are refused
+        """
+        status, _ = self.stream(lambda broker: None, headers=[])
+        self.assertEqual(status, 403)
+
+    def test_stream_needs_a_shared_broker_with_several_processes(self):
+        """
+        Test the stream answers 204, telling browsers not to reconnect, when
+        several processes serve the site with an in-process broker, and is
+        served with a shared broker
+        """
+        def publish(broker):
+            broker.publish(
+                events.TicketEvent(
+                    "ticket-changed", 1, self.customer_account.pk, {"id": 1}
+                )
+            )
+
+        with override_settings(WEB_CONCURRENCY=2):
+            status, body = self.stream(publish)
+            self.assertEqual(status, 204)
+            self.assertEqual(body, "")
+
+            status, body = self.stream(publish, shared=True)
+            self.assertEqual(status, 200)
+            self.assertIn('"id": 1', body)
@@ -0,0 +1,220 @@
+"""Test Tickets Application Ticket Export"""
+
+
+import csv
+import json
+import os
+import tempfile
+from io import StringIO
+from asgiref.testing import ApplicationCommunicator
+from django.conf import settings
+from django.core.management import call_command
+from django.test import TestCase, TransactionTestCase
+from django.contrib.auth import get_user_model
+from django.urls import reverse
+from .. import export
+from ..models import Ticket, TicketCategory
+
+
+class TestTicketExport(TestCase):
+    def setUp(self):
+        """Create a customer, a technician and five tickets raised by the
+        customer, the first two of them closed.
+
+        customer_account: (accounts.models.CustomUser)
+        technician_account: (accounts.models.CustomUser)
+        """
+        self.password = "testingPa$$w0rd!"
+        self.customer_account = get_user_model().objects.create_user(
+            username="customer_account",
+            password=self.password,
+            role=get_user_model().ROLES.customer,
+        )
+        self.technician_account = get_user_model().objects.create_user(
+            username="technician_account",
+            password=self.password,
+            role=get_user_model().ROLES.technician,
+        )
+        category = TicketCategory.objects.create(name="Test Category")
+        for number in range(5):
+            Ticket.objects.create(
+                author=self.customer_account,
+                category=category,
+                title=f"Test Ticket, number {number}",
+                description="<p>Non excepteur <b>voluptate</b> id.</p>",
+                status=(
+                    Ticket.STATUS.closed if number < 2 else Ticket.STATUS.open
+                ),
+            )
+
+    def test_export_view_streams_filtered_tickets(self):
+        """
+        Test the export view streams the tickets matching the filter as CSV
+        and JSON Lines
+        """
+        self.client.login(
+            username="technician_account", password=self.password
+        )
+        response = self.client.get(
+            reverse("ticket_export"),
+            {"format": "csv", "filter_by_status": "open"},
+        )
+        self.assertTrue(response.streaming)
+        self.assertIn(".csv", response["Content-Disposition"])
+        rows = list(
+            csv.DictReader(
+                StringIO(b"".join(response.streaming_content).decode())
+            )
+        )
+        self.assertEqual(len(rows), 3)
+        self.assertEqual(rows[0]["author"], "customer_account")
+        self.assertEqual(rows[0]["category"], "Test Category")
+        self.assertEqual(rows[0]["description"], "Non excepteur voluptate id.")
+
+        response = self.client.get(
+            reverse("ticket_export"),
+            {"format": "jsonl", "filter_by_status": "closed"},
+        )
+        lines = b"".join(response.streaming_content).decode().splitlines()
+        self.assertEqual(len(lines), 2)
+        self.assertEqual(json.loads(lines[0])["status"], "closed")
+
+    def test_invalid_filter_is_refused(self):
+        """
+        Test the export view answers 400 to an invalid filter instead of
+        exporting every ticket
+        """
+        self.client.login(
+            username="technician_account", password=self.password
+        )
+        response = self.client.get(
+            reverse("ticket_export"), {"filter_by_status": "unknown"}
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertContains(response, "filter_by_status", status_code=400)
+
+    def test_csv_formulas_are_escaped(self):
+        """
+        Test CSV values that spreadsheets would read as formulas are
+        prefixed with a quote
+        """
+        Ticket.objects.filter(status=Ticket.STATUS.open).update(
+            title="=HYPERLINK(\"https://example.com\")"
+        )
+        export_csv = "".join(
+            export.stream_export(
+                Ticket.objects.filter(status=Ticket.STATUS.open), "csv"
+            )
+        )
+        rows = list(csv.DictReader(StringIO(export_csv)))
+        self.assertEqual(
+            rows[0]["title"], "'=HYPERLINK(\"https://example.com\")"
+        )
+        self.assertEqual(rows[0]["description"], "Non excepteur voluptate id.")
+
+    def test_export_requires_elevated_role(self):
+        """
+        Test customers cannot export tickets
+        """
+        self.client.login(username="customer_account", password=self.password)
+        response = self.client.get(reverse("ticket_export"))
+        self.assertEqual(response.status_code, 403)
+
+    def test_export_is_written_in_chunks(self):
+        """
+        Test the export is yielded in chunks of rows rather than all at once
+        """
+        chunks = list(
+            export.stream_export(Ticket.objects.all(), "jsonl", chunk_size=2)
+        )
+        self.assertEqual([chunk.count("\n") for chunk in chunks], [2, 2, 1])
+
+    def test_export_command(self):
+        """
+        Test the export command writes the filtered tickets to a file
+        """
+        directory = tempfile.mkdtemp()
+        path = os.path.join(directory, "tickets.csv")
+        self.addCleanup(os.rmdir, directory)
+        self.addCleanup(os.remove, path)
+        call_command(
+            "export_tickets",
+            "--output", path,
+            "--filter", "filter_by_status=closed",
+            stderr=StringIO(),
+        )
+        with open(path, newline="") as file:
+            rows = list(csv.DictReader(file))
+        self.assertEqual(len(rows), 2)
+        self.assertEqual(rows[0]["title"], "Test Ticket, number 1")
+
+        output = StringIO()
+        call_command("export_tickets", "--format", "jsonl", stdout=output)
+        self.assertEqual(len(output.getvalue().splitlines()), 5)
+
+
+class TestTicketExportUnderASGI(TransactionTestCase):
+    def setUp(self):
+        """Create a technician and three tickets, committed so the ASGI
+        application's request threads can read them, and log in as the
+        technician.
+
+        technician_account: (accounts.models.CustomUser)
+        """
+        self.technician_account = get_user_model().objects.create_user(
+            username="technician_account",
+            role=get_user_model().ROLES.technician,
+        )
+        category = TicketCategory.objects.create(name="Test Category")
+        for number in range(3):
+            Ticket.objects.create(
+                author=self.technician_account,
+                category=category,
+                title=f"Test Ticket, number {number}",
+                description="<p>Non excepteur voluptate id.</p>",
+            )
+        self.client.force_login(self.technician_account)
+
+    async def test_export_is_streamed_by_the_asgi_application(self):
+        """
+        Test the deployed ASGI application streams the export, whose rows
+        are read from the database while the response is sent
+        """
+        from support_hub.asgi import application
+
+        session = self.client.cookies[settings.SESSION_COOKIE_NAME].value
+        communicator = ApplicationCommunicator(
+            application,
+            {
+                "type": "http",
+                "asgi": {"version": "3.0"},
+                "http_version": "1.1",
+                "method": "GET",
+                "scheme": "http",
+                "path": reverse("ticket_export"),
+                "raw_path": reverse("ticket_export").encode(),
+                "query_string": b"format=csv",
+                "root_path": "",
+                "headers": [
+                    (b"host", b"testserver"),
+                    (
+                        b"cookie",
+                        f"{settings.SESSION_COOKIE_NAME}={session}".encode(),
+                    ),
+                ],
+                "client": ("127.0.0.1", 50000),
+                "server": ("testserver", 80),
+            },
+        )
+        await communicator.send_input({"type": "http.request"})
+        start = await communicator.receive_output(timeout=10)
+        self.assertEqual(start["status"], 200)
+        body = b""
+        while True:
+            message = await communicator.receive_output(timeout=10)
+            body += message.get("body", b"")
+            if not message.get("more_body"):
+                break
+        rows = list(csv.DictReader(StringIO(body.decode())))
+        self.assertEqual(len(rows), 3)
+        self.assertEqual(rows[0]["category"], "Test Category")
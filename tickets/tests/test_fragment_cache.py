@@ -0,0 +1,100 @@
+"""Test Tickets Application Fragment Cache"""
+
+
+from django.core.cache import cache
+from django.test import TestCase
+from django.contrib.auth import get_user_model
+from django.urls import reverse
+from .. import fragment_cache
+from ..models import Team, Ticket, TicketCategory
+
+
+class TestTicketFragmentCache(TestCase):
+    def setUp(self):
+        """Create a technician, a team and a ticket assigned to both, and
+        start from an empty cache.
+
+        technician_account: (accounts.models.CustomUser)
+        team: (tickets.models.Team)
+        ticket: (tickets.models.Ticket)
+        """
+        cache.clear()
+        fragment_cache.get_fragment_cache().clear()
+        fragment_cache.reset_stats()
+        self.password = "testingPa$$w0rd!"
+        self.technician_account = get_user_model().objects.create_user(
+            username="technician_account",
+            password=self.password,
+            role=get_user_model().ROLES.technician,
+        )
+        self.team = Team.objects.create(name="Service Desk")
+        self.ticket = Ticket.objects.create(
+            author=self.technician_account,
+            category=TicketCategory.objects.create(name="Test Category"),
+            title="Printer is jammed",
+            description="<p>Non excepteur voluptate incididunt id.</p>",
+            assigned_technician=self.technician_account,
+            assigned_team=self.team,
+        )
+        self.client.login(
+            username="technician_account", password=self.password
+        )
+
+    def test_repeated_requests_hit_the_cache(self):
+        """
+        Test rendering the list and detail pages again serves the ticket
+        fragments from the cache
+        """
+        for _ in range(2):
+            self.client.get(reverse("ticket_list"))
+            self.client.get(
+                reverse("ticket_detail", kwargs={"pk": self.ticket.pk})
+            )
+        stats = fragment_cache.get_stats()
+        self.assertEqual(stats["misses"], 3)
+        self.assertEqual(stats["hits"], 3)
+        self.assertEqual(stats["hit_rate"], 0.5)
+
+    def test_updated_ticket_is_rendered_again(self):
+        """
+        Test saving a ticket or renaming a team shown on it replaces the
+        cached fragments
+        """
+        self.client.get(reverse("ticket_list"))
+        self.ticket.title = "Printer is fixed"
+        self.ticket.save()
+        response = self.client.get(reverse("ticket_list"))
+        self.assertContains(response, "Printer is fixed")
+
+        self.team.name = "Field Services"
+        self.team.save()
+        response = self.client.get(reverse("ticket_list"))
+        self.assertContains(response, "Field Services")
+
+    def test_restarted_generation_replaces_cached_fragments(self):
+        """
+        Test fragments cached under a generation that was evicted from the
+        shared cache are not served under the generation started after it
+        """
+        self.client.get(reverse("ticket_list"))
+        cache.delete(fragment_cache.GENERATION_KEY)
+        # Changed without a new 'updated_on', as the backfill command does
+        Ticket.objects.filter(pk=self.ticket.pk).update(
+            title="Printer is fixed"
+        )
+        response = self.client.get(reverse("ticket_list"))
+        self.assertContains(response, "Printer is fixed")
+
+    def test_uncached_blocks_are_rendered_per_request(self):
+        """
+        Test the search snippet inside a cached card follows the current
+        search
+        """
+        response = self.client.get(reverse("ticket_list"))
+        self.assertContains(response, "Non excepteur voluptate")
+        self.assertNotContains(response, "<mark>")
+        response = self.client.get(
+            reverse("ticket_list"), {"search": "excepteur"}
+        )
+        self.assertContains(response, "<mark>excepteur</mark>")
+        self.assertEqual(fragment_cache.get_stats()["hits"], 1)
@@ -0,0 +1,136 @@
+"""Test Tickets Application Deferred Image Deletion"""
+
+
+from django.db import transaction
+from django.test import TestCase
+from django.utils import timezone
+from django.contrib.auth import get_user_model
+from ..image_deletion import delete_pending_images
+from ..models import PendingImageDeletion, Ticket, TicketCategory
+
+
+class FakeCloudinaryAPI:
+    """Local stand-in for cloudinary.api recording the public ids deleted.
+    Public ids in 'failing' are reported as errors.
+    """
+
+    def __init__(self, existing=(), failing=()):
+        self.existing = set(existing)
+        self.failing = set(failing)
+        self.calls = []
+
+    def delete_resources(self, public_ids, **options):
+        self.calls.append(list(public_ids))
+        deleted = {}
+        for public_id in public_ids:
+            if public_id in self.failing:
+                deleted[public_id] = "error"
+            elif public_id in self.existing:
+                self.existing.remove(public_id)
+                deleted[public_id] = "deleted"
+            else:
+                deleted[public_id] = "not_found"
+        return {"deleted": deleted, "partial": False}
+
+
+class TestImageDeletion(TestCase):
+    def setUp(self):
+        """Create a customer and a ticket category to raise tickets with.
+
+        customer_account: (accounts.models.CustomUser)
+        ticket_category: (tickets.models.TicketCategory)
+        """
+        self.customer_account = get_user_model().objects.create_user(
+            username="customer_account",
+            password="testingPa$$w0rd!",
+            role=get_user_model().ROLES.customer,
+        )
+        self.ticket_category = TicketCategory.objects.create(
+            name="Test Category"
+        )
+
+    def create_ticket(self, public_id=""):
+        ticket = Ticket.objects.create(
+            author=self.customer_account,
+            category=self.ticket_category,
+            title="Test Ticket",
+            description="<p>Non excepteur voluptate incididunt id.</p>",
+            ticket_image=public_id,
+        )
+        # Load the image as a CloudinaryResource, as views and the admin do
+        return Ticket.objects.get(pk=ticket.pk)
+
+    def test_deleted_ticket_images_are_deleted_in_batches(self):
+        """
+        Test deleting tickets queues their images, which the worker deletes
+        with one API call per batch
+        """
+        public_ids = [f"ticket_image_{number}" for number in range(5)]
+        for public_id in public_ids:
+            self.create_ticket(public_id)
+        self.create_ticket()
+        api = FakeCloudinaryAPI(existing=public_ids)
+
+        Ticket.objects.all().delete()
+        self.assertEqual(PendingImageDeletion.objects.count(), 5)
+        self.assertEqual(api.calls, [])
+
+        self.assertEqual(delete_pending_images(api, batch_size=2), 5)
+        self.assertEqual([len(call) for call in api.calls], [2, 2, 1])
+        self.assertEqual(api.existing, set())
+        self.assertFalse(PendingImageDeletion.objects.exists())
+
+    def test_rolled_back_deletion_keeps_image(self):
+        """
+        Test an image is not queued when the ticket deletion is rolled back
+        """
+        ticket = self.create_ticket("ticket_image")
+        try:
+            with transaction.atomic():
+                ticket.delete()
+                raise RuntimeError
+        except RuntimeError:
+            pass
+        self.assertFalse(PendingImageDeletion.objects.exists())
+
+    def test_failed_deletion_is_retried_later(self):
+        """
+        Test images Cloudinary fails to delete stay queued for a retry
+        """
+        self.create_ticket("ticket_image").delete()
+        api = FakeCloudinaryAPI(failing=["ticket_image"])
+        self.assertEqual(delete_pending_images(api), 0)
+        pending = PendingImageDeletion.objects.get()
+        self.assertEqual(pending.attempts, 1)
+        self.assertEqual(pending.last_error, "error")
+        self.assertGreater(pending.next_attempt_on, pending.created_on)
+
+        # Not due yet, so a second run does not call the API
+        delete_pending_images(api)
+        self.assertEqual(len(api.calls), 1)
+
+    def test_deletion_backs_off_then_fails(self):
+        """
+        Test the delay before each retry doubles, and an image still not
+        deleted after MAX_ATTEMPTS is marked as failed and no longer tried
+        """
+        self.create_ticket("ticket_image").delete()
+        api = FakeCloudinaryAPI(failing=["ticket_image"])
+        delays = []
+        for _ in range(PendingImageDeletion.MAX_ATTEMPTS):
+            PendingImageDeletion.objects.update(next_attempt_on=timezone.now())
+            before = timezone.now()
+            delete_pending_images(api)
+            pending = PendingImageDeletion.objects.get()
+            delays.append(pending.next_attempt_on - before)
+        self.assertAlmostEqual(
+            delays[1].total_seconds(),
+            2 * delays[0].total_seconds(),
+            delta=1,
+        )
+        self.assertEqual(pending.status, PendingImageDeletion.STATUS.failed)
+        self.assertEqual(pending.attempts, PendingImageDeletion.MAX_ATTEMPTS)
+
+        PendingImageDeletion.objects.update(next_attempt_on=timezone.now())
+        delete_pending_images(api)
+        self.assertEqual(len(api.calls), PendingImageDeletion.MAX_ATTEMPTS)
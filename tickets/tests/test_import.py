@@ -0,0 +1,250 @@
+"""Test Tickets Application Ticket Import"""
+
+
+import datetime as dt
+import json
+import os
+import tempfile
+from io import StringIO
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import TestCase
+from .. import counters, importer
+from ..models import Comment, Team, Ticket, TicketCategory
+from ..search import get_search_backend
+
+
+class TestTicketImport(TestCase):
+    def setUp(self):
+        """Create a customer and a technician, and a directory for the files
+        to import.
+
+        customer_account: (accounts.models.CustomUser)
+        technician_account: (accounts.models.CustomUser)
+        directory: (str) - Temporary directory removed after each test
+        """
+        self.customer_account = get_user_model().objects.create_user(
+            username="customer_account",
+            password="testingPa$$w0rd!",
+            role=get_user_model().ROLES.customer,
+        )
+        self.technician_account = get_user_model().objects.create_user(
+            username="technician_account",
+            password="testingPa$$w0rd!",
+            role=get_user_model().ROLES.technician,
+        )
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = directory.name
+
+    def write(self, name, content):
+        path = os.path.join(self.directory, name)
+        with open(path, "w") as file:
+            file.write(content)
+        return path
+
+    def ticket_row(self, **kwargs):
+        return {
+            "title": "Printer is jammed",
+            "description": "<p>Non excepteur voluptate incididunt id.</p>",
+            "category": "Hardware",
+            "author": "customer_account",
+            "created_on": "2021-03-01T09:30:00+00:00",
+            "updated_on": "2021-03-02T10:00:00+00:00",
+            **kwargs,
+        }
+
+    def import_tickets(self, path, *args):
+        stdout, stderr = StringIO(), StringIO()
+        call_command(
+            "import_tickets", path, *args, stdout=stdout, stderr=stderr
+        )
+        return stdout.getvalue(), stderr.getvalue()
+
+    def test_csv_import_keeps_dates_and_resolves_names(self):
+        """
+        Test tickets are imported from CSV with their original dates,
+        rendered description and related objects, creating missing teams
+        and categories
+        """
+        path = self.write(
+            "tickets.csv",
+            "id,title,description,status,category,author,assigned_team,"
+            "assigned_technician,created_on,updated_on\n"
+            "501,Printer is jammed,"
+            "<p>Paper is stuck <script>x</script> inside</p>,"
+            "inprogress,Hardware,customer_account,Service Desk,"
+            "technician_account,2021-03-01T09:30:00+00:00,"
+            "2021-03-02T10:00:00+00:00\n"
+            "502,Screen is flickering,<p>Flickers when it is cold.</p>,,"
+            "Hardware,customer_account,,,2021-04-01T08:00:00,\n",
+        )
+        stdout, stderr = self.import_tickets(path, "--workers", "0")
+        self.assertIn("Imported 2 tickets, skipped 0 rows.", stdout)
+        self.assertEqual(stderr, "")
+
+        ticket = Ticket.objects.get(pk=501)
+        self.assertEqual(ticket.author, self.customer_account)
+        self.assertEqual(ticket.assigned_technician, self.technician_account)
+        self.assertEqual(ticket.assigned_team.name, "Service Desk")
+        self.assertEqual(ticket.status, Ticket.STATUS.inprogress)
+        self.assertNotIn("<script>", ticket.description_html)
+        self.assertEqual(
+            ticket.created_on,
+            dt.datetime(2021, 3, 1, 9, 30, tzinfo=dt.timezone.utc),
+        )
+        self.assertEqual(
+            ticket.updated_on,
+            dt.datetime(2021, 3, 2, 10, 0, tzinfo=dt.timezone.utc),
+        )
+        # Missing values use the model default or the creation date
+        other = Ticket.objects.get(pk=502)
+        self.assertEqual(other.status, Ticket.STATUS.open)
+        self.assertEqual(other.updated_on, other.created_on)
+        self.assertEqual(TicketCategory.objects.count(), 1)
+        self.assertEqual(Team.objects.count(), 1)
+
+        # Imported tickets are searchable and counted
+        results = get_search_backend().search(
+            Ticket.objects.all(), "flickering"
+        )
+        self.assertEqual([result.pk for result in results], [502])
+        customer = counters.get_counts(self.customer_account)
+        self.assertEqual(customer["authored"]["open"], 1)
+        self.assertEqual(customer["authored"]["inprogress"], 1)
+
+        # Saving later still sets 'updated_on' automatically
+        other.save()
+        self.assertGreater(
+            other.updated_on, dt.datetime(2022, 1, 1, tzinfo=dt.timezone.utc)
+        )
+
+    def test_invalid_rows_are_reported_and_skipped(self):
+        """
+        Test rows failing validation or naming unknown users are skipped
+        and reported by line, without stopping the import
+        """
+        rows = [
+            self.ticket_row(),
+            self.ticket_row(title="Short"),
+            self.ticket_row(author="unknown_account"),
+            self.ticket_row(priority="urgent"),
+            self.ticket_row(created_on="yesterday"),
+        ]
+        path = self.write(
+            "tickets.jsonl", "".join(json.dumps(row) + "\n" for row in rows)
+        )
+        stdout, stderr = self.import_tickets(path, "--workers", "0")
+        self.assertIn("Imported 1 tickets, skipped 4 rows.", stdout)
+        errors = stderr.splitlines()
+        self.assertEqual(len(errors), 4)
+        self.assertTrue(errors[0].startswith(f"{path}:2: title:"))
+        self.assertIn("Unknown user 'unknown_account'", errors[1])
+        self.assertTrue(errors[2].startswith(f"{path}:4: priority:"))
+        self.assertIn("Invalid date 'yesterday'", errors[3])
+
+        self.import_tickets(path, "--workers", "0", "--create-users")
+        self.assertTrue(
+            Ticket.objects.filter(author__username="unknown_account").exists()
+        )
+
+    def test_taken_ids_are_reported_and_skipped(self):
+        """
+        Test rows with the id of an existing ticket, or of an earlier row in
+        the same or an earlier batch, are skipped and reported by line
+        """
+        self.import_tickets(
+            self.write("existing.jsonl", json.dumps(self.ticket_row(id=1))),
+            "--workers", "0",
+        )
+        rows = [
+            self.ticket_row(id=1),
+            self.ticket_row(id=2),
+            self.ticket_row(id=2),
+            self.ticket_row(id=3),
+            self.ticket_row(id=2),
+        ]
+        path = self.write(
+            "tickets.jsonl", "".join(json.dumps(row) + "\n" for row in rows)
+        )
+        stdout, stderr = self.import_tickets(
+            path, "--workers", "0", "--batch-size", "3"
+        )
+        self.assertIn("Imported 2 tickets, skipped 3 rows.", stdout)
+        errors = stderr.splitlines()
+        self.assertEqual(len(errors), 3)
+        for error, line_number, ticket_id in zip(
+            errors, (1, 3, 5), (1, 2, 2)
+        ):
+            self.assertEqual(
+                error,
+                f"{path}:{line_number}: Ticket id '{ticket_id}' is already "
+                "taken.",
+            )
+        self.assertEqual(
+            list(Ticket.objects.order_by("id").values_list("id", flat=True)),
+            [1, 2, 3],
+        )
+
+    def test_worker_pool_imports_batches_and_comments(self):
+        """
+        Test rows validated in worker processes are imported in batches,
+        along with comments referring to the imported tickets
+        """
+        rows = [
+            self.ticket_row(id=index, title=f"Printer {index} is jammed")
+            for index in range(1, 8)
+        ]
+        path = self.write(
+            "tickets.jsonl", "".join(json.dumps(row) + "\n" for row in rows)
+        )
+        comments = self.write(
+            "comments.jsonl",
+            json.dumps(
+                {
+                    "ticket": 3,
+                    "author": "technician_account",
+                    "body": "<p>The printer has been cleared.</p>",
+                    "created_on": "2021-03-01T11:00:00+00:00",
+                }
+            ) + "\n" + json.dumps({"ticket": 99, "body": "<p>Lost.</p>"})
+            + "\n",
+        )
+        stdout, stderr = self.import_tickets(
+            path,
+            "--comments", comments,
+            "--workers", "2",
+            "--batch-size", "3",
+        )
+        self.assertIn("Imported 7 tickets", stdout)
+        self.assertIn("Imported 1 comments, skipped 1 rows.", stdout)
+        self.assertIn("Unknown ticket '99'", stderr)
+        self.assertEqual(
+            list(Ticket.objects.order_by("id").values_list("id", flat=True)),
+            list(range(1, 8)),
+        )
+        comment = Comment.objects.get()
+        self.assertEqual(comment.ticket_id, 3)
+        self.assertEqual(comment.body_text, "The printer has been cleared.")
+        self.assertEqual(
+            comment.created_on,
+            dt.datetime(2021, 3, 1, 11, 0, tzinfo=dt.timezone.utc),
+        )
+
+    def test_timestamps_are_restored_after_import(self):
+        """
+        Test preserve_timestamps restores the automatic date fields
+        """
+        with importer.preserve_timestamps(Ticket):
+            self.assertFalse(Ticket._meta.get_field("updated_on").auto_now)
+        self.assertTrue(Ticket._meta.get_field("updated_on").auto_now)
+        self.assertTrue(Ticket._meta.get_field("created_on").auto_now_add)
+
+    def test_invalid_json_stops_the_import(self):
+        """
+        Test a line that is not JSON stops the import with its line number
+        """
+        path = self.write("tickets.jsonl", "{not json\n")
+        with self.assertRaisesMessage(CommandError, f"{path}:1:"):
+            self.import_tickets(path, "--workers", "0")
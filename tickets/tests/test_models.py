@@ -1,9 +1,11 @@
 """Test Tickets Application Models"""
 
 
+from io import StringIO
+from django.core.management import call_command
 from django.test import TestCase
 from django.contrib.auth import get_user_model
-from ..models import Ticket, TicketCategory
+from ..models import Comment, Ticket, TicketCategory
 
 
 class TestTicketDefaults(TestCase):
@@ -47,3 +49,89 @@ class TestTicketDefaults(TestCase):
         )
 
         self.assertEquals(ticket.type, "request")
+
+    def test_ticket_preview_is_plain_text(self):
+        """
+        Test the ticket preview is the description without HTML, truncated
+        to the preview length
+        """
+        ticket = Ticket.objects.create(
+            author=self.test_user_account,
+            category=self.ticket_category,
+            title="Test Ticket",
+            description=(
+                "<p>Printer&nbsp;<b>offline</b></p><p>" + "x" * 200 + "</p>"
+            ),
+        )
+        self.assertTrue(ticket.preview.startswith("Printer offline xxx"))
+        self.assertEqual(len(ticket.preview), Ticket.PREVIEW_LENGTH)
+
+        # Saving only the description also refreshes the preview
+        ticket.description = "<p>Updated description of the request</p>"
+        ticket.save(update_fields=["description"])
+        ticket.refresh_from_db()
+        self.assertEqual(ticket.preview, "Updated description of the request")
+
+    def test_rich_text_is_sanitized_on_save(self):
+        """
+        Test scripts, event handler attributes and disallowed elements are
+        removed from the stored HTML of descriptions and comment bodies
+        while formatting is kept
+        """
+        ticket = Ticket.objects.create(
+            author=self.test_user_account,
+            category=self.ticket_category,
+            title="Test Ticket",
+            description=(
+                "<p onclick='steal()'><b>Printer</b> offline</p>"
+                "<script>steal()</script><img src=x onerror=steal()>"
+            ),
+        )
+        self.assertEqual(
+            ticket.description_html,
+            "<p><b>Printer</b> offline</p>steal()",
+        )
+        self.assertEqual(ticket.description_text, "Printer offline steal()")
+
+        comment = Comment.objects.create(
+            ticket=ticket,
+            author=self.test_user_account,
+            body="<p>Restarted <a href='javascript:steal()'>it</a></p>",
+        )
+        self.assertEqual(comment.body_html, "<p>Restarted it</p>")
+        self.assertEqual(comment.body_without_tags, "Restarted it")
+
+    def test_backfill_rendered_fields_command(self):
+        """
+        Test the backfill command recomputes the rendered fields of tickets
+        and comments
+        """
+        ticket = Ticket.objects.create(
+            author=self.test_user_account,
+            category=self.ticket_category,
+            title="Test Ticket",
+            description="<p>Non excepteur voluptate incididunt id.</p>",
+        )
+        comment = Comment.objects.create(
+            ticket=ticket,
+            author=self.test_user_account,
+            body="<p>Sint <em>incididunt</em></p>",
+        )
+        Ticket.objects.filter(pk=ticket.pk).update(
+            preview="", description_html="", description_text=""
+        )
+        Comment.objects.filter(pk=comment.pk).update(
+            body_html="", body_text=""
+        )
+        call_command("backfill_rendered_fields", stdout=StringIO())
+        ticket.refresh_from_db()
+        comment.refresh_from_db()
+        self.assertEqual(
+            ticket.preview, "Non excepteur voluptate incididunt id."
+        )
+        self.assertEqual(
+            ticket.description_html,
+            "<p>Non excepteur voluptate incididunt id.</p>",
+        )
+        self.assertEqual(comment.body_html, "<p>Sint <em>incididunt</em></p>")
+        self.assertEqual(comment.body_text, "Sint incididunt")
@@ -0,0 +1,116 @@
+"""Test Tickets Application Comment Notification Digests"""
+
+
+import datetime as dt
+from django.core import mail
+from django.test import TestCase, override_settings
+from django.contrib.auth import get_user_model
+from django.urls import reverse
+from django.utils import timezone
+from outbox.models import OutboxMessage
+from ..models import CommentNotification, Ticket, TicketCategory
+from ..notifications import send_comment_digests
+
+
+@override_settings(
+    EMAIL_BACKEND="django.core.mail.backends.locmem.EmailBackend"
+)
+class TestCommentNotifications(TestCase):
+    def setUp(self):
+        """Create a customer, a technician and a ticket raised by the
+        customer.
+
+        customer_account: (accounts.models.CustomUser)
+        technician_account: (accounts.models.CustomUser)
+        ticket: (tickets.models.Ticket)
+        """
+        self.password = "testingPa$$w0rd!"
+        self.customer_account = get_user_model().objects.create_user(
+            username="customer_account",
+            email="customer@example.com",
+            password=self.password,
+            role=get_user_model().ROLES.customer,
+        )
+        self.technician_account = get_user_model().objects.create_user(
+            username="technician_account",
+            password=self.password,
+            role=get_user_model().ROLES.technician,
+        )
+        self.ticket = Ticket.objects.create(
+            author=self.customer_account,
+            category=TicketCategory.objects.create(name="Test Category"),
+            title="Printer is jammed",
+            description="<p>Non excepteur voluptate incididunt id.</p>",
+        )
+        self.url = reverse("ticket_detail", kwargs={"pk": self.ticket.pk})
+
+    def post_comment(self, body):
+        return self.client.post(self.url, {"body": f"<p>{body}</p>"})
+
+    def after_window(self):
+        return timezone.now() + dt.timedelta(hours=1)
+
+    def test_comments_within_window_are_sent_in_one_digest(self):
+        """
+        Test several comments posted within the window are sent to the
+        ticket author as a single email, and only once the window closes
+        """
+        self.client.login(
+            username="technician_account", password=self.password
+        )
+        for body in ("First update", "Second update", "Third update"):
+            self.post_comment(body)
+        self.assertEqual(CommentNotification.objects.count(), 3)
+        self.assertEqual(
+            CommentNotification.objects.values("send_after")
+            .distinct()
+            .count(),
+            1,
+        )
+        self.assertEqual(len(mail.outbox), 0)
+
+        # The window is still open
+        self.assertEqual(send_comment_digests(), 0)
+        self.assertEqual(send_comment_digests(self.after_window()), 1)
+        self.assertEqual(len(mail.outbox), 1)
+        message = mail.outbox[0]
+        self.assertEqual(message.to, ["customer@example.com"])
+        self.assertIn("3 updates", message.body)
+        self.assertLess(
+            message.body.index("First update"),
+            message.body.index("Third update"),
+        )
+        self.assertIn("<p>Second update</p>", message.alternatives[0][0])
+        self.assertFalse(CommentNotification.objects.exists())
+
+        # Nothing left to send
+        self.assertEqual(send_comment_digests(self.after_window()), 0)
+
+    def test_author_comment_is_not_notified(self):
+        """
+        Test the ticket author is not notified of their own comments
+        """
+        self.client.login(username="customer_account", password=self.password)
+        self.post_comment("Any update?")
+        self.assertFalse(CommentNotification.objects.exists())
+
+    @override_settings(
+        EMAIL_BACKEND="outbox.backends.OutboxEmailBackend",
+        DEFAULT_FROM_EMAIL="support@example.com",
+    )
+    def test_worker_queues_due_digests(self):
+        """
+        Test the outbox worker queues the digests that are due
+        """
+        self.client.login(
+            username="technician_account", password=self.password
+        )
+        self.post_comment("First update")
+        CommentNotification.objects.update(send_after=timezone.now())
+        send_comment_digests()
+        self.assertEqual(
+            OutboxMessage.objects.filter(
+                to=["customer@example.com"]
+            ).count(),
+            1,
+        )
@@ -0,0 +1,118 @@
+"""Test Tickets Application Pagination"""
+
+
+from django.test import TestCase
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from ..models import Ticket, TicketCategory
+from ..pagination import InvalidCursor, KeysetPaginator
+
+
+class TestKeysetPaginator(TestCase):
+    def setUp(self):
+        """Create a test user, ticket category and 25 tickets, with some
+        tickets sharing the same 'updated_on' value to exercise the primary
+        key tie-breaker.
+
+        test_user_account: (accounts.models.CustomUser)
+        ticket_category: (tickets.models.TicketCategory)
+        """
+        self.password = "testingPa$$w0rd!"
+        self.test_user_account = get_user_model().objects.create_user(
+            username="test-user",
+            password=self.password,
+            role=get_user_model().ROLES.technician,
+        )
+        self.ticket_category = TicketCategory.objects.create(
+            name="Test Category"
+        )
+        for number in range(25):
+            Ticket.objects.create(
+                author=self.test_user_account,
+                category=self.ticket_category,
+                title=f"Test Ticket {number}",
+                description=(
+                    "Non excepteur voluptate incididunt id cupidatat nostrud."
+                ),
+            )
+        tickets = list(Ticket.objects.order_by("id"))
+        Ticket.objects.filter(id__lte=tickets[12].id).update(
+            updated_on=tickets[5].updated_on
+        )
+
+    def walk(self, queryset, per_page=7):
+        """Return the pk of every object visited walking forward through all
+        pages, along with the pages themselves.
+        """
+        paginator = KeysetPaginator(queryset, per_page)
+        pages = [paginator.page()]
+        while pages[-1].has_next():
+            pages.append(paginator.page(pages[-1].next_cursor))
+        return [obj.pk for page in pages for obj in page], pages
+
+    def test_forward_walk_matches_offset_ordering(self):
+        """
+        Test walking every ordering option visits each ticket exactly once
+        in the same order as the unpaginated queryset
+        """
+        for ordering in (
+            "-updated_on",
+            "updated_on",
+            "-created_on",
+            "created_on",
+        ):
+            queryset = Ticket.objects.order_by(ordering)
+            tie_breaker = "-id" if ordering.startswith("-") else "id"
+            expected = list(
+                queryset.order_by(ordering, tie_breaker).values_list(
+                    "pk", flat=True
+                )
+            )
+            visited, pages = self.walk(queryset)
+            self.assertEqual(visited, expected)
+            self.assertEqual(len(pages), 4)
+
+    def test_previous_cursor_returns_previous_page(self):
+        """
+        Test the previous cursor of a page returns the page before it
+        """
+        paginator = KeysetPaginator(Ticket.objects.all(), 7)
+        first = paginator.page()
+        second = paginator.page(first.next_cursor)
+        third = paginator.page(second.next_cursor)
+        self.assertEqual(
+            list(paginator.page(third.previous_cursor)), list(second)
+        )
+        self.assertEqual(
+            list(paginator.page(second.previous_cursor)), list(first)
+        )
+        self.assertFalse(first.has_previous())
+
+    def test_page_uses_single_query_without_count(self):
+        """
+        Test fetching a deep page is a single query with no COUNT(*)
+        """
+        paginator = KeysetPaginator(Ticket.objects.all(), 7)
+        cursor = paginator.page(paginator.page().next_cursor).next_cursor
+        with CaptureQueriesContext(connection) as queries:
+            list(paginator.page(cursor))
+        self.assertEqual(len(queries), 1)
+        self.assertNotIn("COUNT", queries[0]["sql"].upper())
+        self.assertNotIn("OFFSET", queries[0]["sql"].upper())
+
+    def test_invalid_cursor_raises(self):
+        """
+        Test a malformed cursor raises InvalidCursor and the list view
+        responds with a 404
+        """
+        paginator = KeysetPaginator(Ticket.objects.all(), 7)
+        with self.assertRaises(InvalidCursor):
+            paginator.page("not-a-cursor")
+
+        self.assertTrue(
+            self.client.login(username="test-user", password=self.password)
+        )
+        response = self.client.get(reverse("ticket_list"), {"cursor": "x"})
+        self.assertEqual(response.status_code, 404)
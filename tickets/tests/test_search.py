@@ -0,0 +1,189 @@
+"""Test Tickets Application Search"""
+
+
+from django.test import TestCase
+from django.contrib.auth import get_user_model
+from django.http import QueryDict
+from django.urls import reverse
+from ..filters import ElevatedUserTicketFilter
+from ..models import Comment, Ticket, TicketCategory
+from ..search import get_search_backend
+
+
+class TestTicketSearch(TestCase):
+    def setUp(self):
+        """Create a technician, a ticket category and tickets matching the
+        search terms in different fields.
+
+        technician_account: (accounts.models.CustomUser)
+        title_ticket: (tickets.models.Ticket) - Search terms in the title
+        description_ticket: (tickets.models.Ticket) - Search terms in the
+        description
+        comment_ticket: (tickets.models.Ticket) - Search terms in a comment
+        """
+        self.shared_password = "testingPa$$w0rd!"
+        self.technician_username = "technician_account"
+        self.technician_account = get_user_model().objects.create_user(
+            username=self.technician_username,
+            password=self.shared_password,
+            role=get_user_model().ROLES.technician,
+        )
+        ticket_category = TicketCategory.objects.create(name="Test Category")
+        shared_description = (
+            "<p>Non excepteur voluptate incididunt id cupidatat nostrud.</p>"
+        )
+
+        def create_ticket(title, description=shared_description):
+            return Ticket.objects.create(
+                author=self.technician_account,
+                category=ticket_category,
+                title=title,
+                description=description,
+            )
+
+        self.title_ticket = create_ticket("Printer is jammed again")
+        self.description_ticket = create_ticket(
+            "Office equipment fault",
+            "<p>The <b>printer</b> on floor two&nbsp;keeps jamming.</p>",
+        )
+        self.comment_ticket = create_ticket("Cannot log in to email")
+        Comment.objects.create(
+            ticket=self.comment_ticket,
+            author=self.technician_account,
+            body="<p>Looks related to the printer outage.</p>",
+        )
+        create_ticket("Unrelated request title")
+
+    def search(self, terms):
+        return ElevatedUserTicketFilter(
+            QueryDict(f"search={terms}"),
+            user=self.technician_account,
+            queryset=Ticket.objects.all(),
+        ).qs
+
+    def test_search_matches_title_description_and_comments(self):
+        """
+        Test search returns tickets matching in the title, description or a
+        comment, with title matches ranked first
+        """
+        results = list(self.search("printer"))
+        self.assertEqual(
+            set(results),
+            {self.title_ticket, self.description_ticket, self.comment_ticket},
+        )
+        self.assertEqual(results[0], self.title_ticket)
+
+    def test_search_is_restricted_before_ranking(self):
+        """
+        Test a restricted queryset finds its matching tickets however many
+        better ranked tickets outside of it match as well
+        """
+        customer_account = get_user_model().objects.create_user(
+            username="customer_account",
+            role=get_user_model().ROLES.customer,
+        )
+        customer_ticket = Ticket.objects.create(
+            author=customer_account,
+            title="Laptop will not charge",
+            description="<p>The printer icon shows an error.</p>",
+        )
+        Ticket.objects.bulk_create(
+            Ticket(
+                author=self.technician_account,
+                title=f"Printer printer {number}",
+                description="<p>Printer printer printer.</p>",
+            )
+            for number in range(20)
+        )
+        get_search_backend().rebuild()
+        results = get_search_backend().search(
+            Ticket.objects.filter(author=customer_account), "printer"
+        )
+        self.assertEqual(list(results), [customer_ticket])
+        self.assertGreater(results[0].search_rank, 0)
+
+    def test_search_stems_and_ignores_markup(self):
+        """
+        Test search matches word stems and ignores HTML in the description
+        """
+        self.assertIn(self.description_ticket, self.search("jam"))
+        self.assertNotIn(self.description_ticket, self.search("nbsp"))
+
+    def test_search_index_kept_in_sync(self):
+        """
+        Test the index is updated when a ticket is edited or deleted
+        """
+        self.title_ticket.title = "Scanner is jammed again"
+        self.title_ticket.save()
+        self.assertNotIn(self.title_ticket, self.search("printer"))
+        self.assertIn(self.title_ticket, self.search("scanner"))
+
+        ticket_id = self.comment_ticket.pk
+        self.comment_ticket.delete()
+        self.assertNotIn(
+            ticket_id, self.search("printer").values_list("pk", flat=True)
+        )
+
+    def test_highlighted_snippets(self):
+        """
+        Test snippets highlight the search terms and escape ticket content
+        """
+        snippets = get_search_backend().highlight(
+            [self.description_ticket.pk, self.comment_ticket.pk], "printer"
+        )
+        self.assertIn(
+            "<mark>printer</mark>", snippets[self.description_ticket.pk]
+        )
+        self.assertNotIn("<b>", snippets[self.description_ticket.pk])
+        self.assertIn(
+            "<mark>printer</mark>", snippets[self.comment_ticket.pk]
+        )
+
+    def test_ticket_list_search(self):
+        """
+        Test the ticket list renders highlighted search results
+        """
+        self.assertTrue(
+            self.client.login(
+                username=self.technician_username,
+                password=self.shared_password,
+            )
+        )
+        response = self.client.get(reverse("ticket_list"), {"search": "jam"})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.context["tickets"]), 2)
+        self.assertContains(response, "<mark>jamming</mark>")
+
+    def test_ticket_list_search_paginates_by_rank(self):
+        """
+        Test search results ordered by relevance can be paged through with
+        the list's cursors
+        """
+        for number in range(12):
+            Ticket.objects.create(
+                author=self.technician_account,
+                title=f"Printer queue number {number}",
+                description="<p>Printer queue is not processing jobs.</p>",
+            )
+        self.assertTrue(
+            self.client.login(
+                username=self.technician_username,
+                password=self.shared_password,
+            )
+        )
+        first_page = self.client.get(
+            reverse("ticket_list"), {"search": "printer"}
+        )
+        page_obj = first_page.context["page_obj"]
+        self.assertTrue(page_obj.has_next())
+        second_page = self.client.get(
+            reverse("ticket_list"),
+            {"search": "printer", "cursor": page_obj.next_cursor},
+        )
+        visited = [
+            ticket.pk
+            for response in (first_page, second_page)
+            for ticket in response.context["tickets"]
+        ]
+        self.assertEqual(len(visited), 15)
+        self.assertEqual(len(set(visited)), 15)
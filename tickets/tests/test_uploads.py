@@ -0,0 +1,143 @@
+"""Test Tickets Application Upload Handling and Image Validation"""
+
+
+from io import BytesIO
+from django.core.exceptions import ValidationError
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.files.uploadhandler import StopUpload
+from django.test import RequestFactory, TestCase, override_settings
+from django.contrib.auth import get_user_model
+from django.urls import reverse
+from PIL import Image
+from ..models import Ticket, TicketCategory
+from ..upload_handlers import MaxSizeUploadHandler, OversizedUploadedFile
+from ..validators import PNG_SIGNATURE, sniff_image, validate_image
+
+
+def make_image(image_format, size=(30, 20)):
+    buffer = BytesIO()
+    Image.new("RGB", size, "red").save(buffer, image_format)
+    return buffer.getvalue()
+
+
+def make_upload(content, name="image.png"):
+    return SimpleUploadedFile(name, content)
+
+
+class TestImageValidation(TestCase):
+    def test_image_header_is_sniffed(self):
+        """
+        Test the format and dimensions of PNG and JPEG images are read from
+        their headers
+        """
+        self.assertEqual(
+            sniff_image(BytesIO(make_image("PNG"))), ("png", 30, 20)
+        )
+        self.assertEqual(
+            sniff_image(BytesIO(make_image("JPEG"))), ("jpeg", 30, 20)
+        )
+        self.assertIsNone(sniff_image(BytesIO(make_image("GIF"))))
+        validate_image(make_upload(make_image("JPEG")))
+
+    def test_invalid_images_are_rejected(self):
+        """
+        Test other formats, truncated headers and oversized uploads are
+        rejected
+        """
+        invalid_uploads = {
+            "Invalid file type": make_upload(make_image("GIF")),
+            "Upload a valid image": make_upload(make_image("PNG")[:12]),
+            "Maximum file size exceeded (3MB maximum)": OversizedUploadedFile(
+                "image.png", "image/png", 4 * 1024 * 1024
+            ),
+        }
+        for message, upload in invalid_uploads.items():
+            with self.assertRaisesMessage(ValidationError, message):
+                validate_image(upload)
+
+    def test_decompression_bomb_is_rejected(self):
+        """
+        Test an image whose header declares huge dimensions is rejected
+        without decoding it
+        """
+        header = (
+            PNG_SIGNATURE
+            + (13).to_bytes(4, "big")
+            + b"IHDR"
+            + (50000).to_bytes(4, "big")
+            + (50000).to_bytes(4, "big")
+        )
+        with self.assertRaisesMessage(
+            ValidationError, "Image dimensions too large"
+        ):
+            validate_image(make_upload(header))
+
+
+@override_settings(MAX_UPLOAD_SIZE=1024)
+class TestMaxSizeUploadHandler(TestCase):
+    def setUp(self):
+        """Create a customer and a ticket category to raise tickets with.
+
+        customer_account: (accounts.models.CustomUser)
+        ticket_category: (tickets.models.TicketCategory)
+        """
+        self.password = "testingPa$$w0rd!"
+        self.customer_account = get_user_model().objects.create_user(
+            username="customer_account",
+            password=self.password,
+            role=get_user_model().ROLES.customer,
+        )
+        self.ticket_category = TicketCategory.objects.create(
+            name="Test Category"
+        )
+
+    @override_settings(MAX_DISCARDED_UPLOAD_SIZE=3000)
+    def test_upload_is_discarded_beyond_limit(self):
+        """
+        Test the handler drops the chunks of a file beyond the limit,
+        replacing it with a placeholder, and stops the upload, resetting the
+        connection, once too much has been dropped
+        """
+        handler = MaxSizeUploadHandler(RequestFactory().post("/"))
+        handler.new_file("ticket_image", "image.png", "image/png", None)
+        self.assertEqual(
+            handler.receive_data_chunk(b"x" * 1000, 0), b"x" * 1000
+        )
+        self.assertIsNone(handler.receive_data_chunk(b"x" * 1000, 1000))
+        upload = handler.file_complete(2000)
+        self.assertIsInstance(upload, OversizedUploadedFile)
+        self.assertEqual(upload.size, 2000)
+
+        handler.new_file("ticket_image", "image.png", "image/png", None)
+        self.assertIsNone(handler.receive_data_chunk(b"x" * 2000, 0))
+        with self.assertRaises(StopUpload) as stopped:
+            handler.receive_data_chunk(b"x" * 2000, 2000)
+        self.assertTrue(stopped.exception.connection_reset)
+
+        # Parts declaring a larger size are stopped before any chunk
+        with self.assertRaises(StopUpload):
+            handler.new_file(
+                "ticket_image", "image.png", "image/png", 4096
+            )
+
+        handler.new_file("ticket_image", "image.png", "image/png", None)
+        handler.receive_data_chunk(b"x" * 10, 0)
+        self.assertIsNone(handler.file_complete(10))
+
+    def test_oversized_upload_is_rejected_by_form(self):
+        """
+        Test raising a ticket with an oversized image shows the size error
+        """
+        self.client.login(username="customer_account", password=self.password)
+        response = self.client.post(
+            reverse("ticket_create"),
+            data={
+                "type": Ticket.TYPE.request,
+                "category": self.ticket_category.id,
+                "title": "Printer is jammed",
+                "description": "<p>Non excepteur voluptate incididunt.</p>",
+                "ticket_image": make_upload(b"x" * 4096),
+            },
+        )
+        self.assertFalse(Ticket.objects.exists())
+        self.assertContains(response, "Maximum file size exceeded")
@@ -1,12 +1,31 @@
 """Test Tickets Application Views"""
 
 
+from django.conf import settings
 from django.test import TestCase, Client
 from django.contrib.auth import get_user_model
-from ..models import Ticket, TicketCategory
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from ..models import Comment, Team, Ticket, TicketCategory
 from django.urls import reverse
 
 
+def page_queries(queries):
+    """Return the captured queries that are not reads or writes of the
+    database cache (or the savepoints of its writes), whose number depends
+    on what is already cached.
+    """
+    cache_table = connection.ops.quote_name(
+        settings.CACHES["default"]["LOCATION"]
+    )
+    return [
+        query
+        for query in queries
+        if cache_table not in query["sql"] and
+        "SAVEPOINT" not in query["sql"]
+    ]
+
+
 class TestUrlsAuthenticated(TestCase):
     def setUp(self):
         """Create test users encompassing all roles, a ticket category and 2
@@ -159,3 +178,225 @@ class TestUrlsAuthenticated(TestCase):
             str(list(response.wsgi_request._messages)[0]),
             expected_message,
         )
+
+
+class TestTicketListQueries(TestCase):
+    def setUp(self):
+        """Create a technician, a team and a ticket category used to build
+        assigned tickets.
+
+        technician_account: (accounts.models.CustomUser)
+        team: (tickets.models.Team)
+        ticket_category: (tickets.models.TicketCategory)
+        """
+        self.shared_password = "testingPa$$w0rd!"
+        self.technician_username = "technician_account"
+        self.technician_account = get_user_model().objects.create_user(
+            username=self.technician_username,
+            password=self.shared_password,
+            role=get_user_model().ROLES.technician,
+        )
+        self.team = Team.objects.create(name="Test Team")
+        self.ticket_category = TicketCategory.objects.create(
+            name="test category"
+        )
+
+    def create_tickets(self, number_of_tickets):
+        """Create assigned tickets so each card renders its technician and
+        team.
+        """
+        for number in range(number_of_tickets):
+            Ticket.objects.create(
+                author=self.technician_account,
+                category=self.ticket_category,
+                title=f"Test Ticket Number {number}",
+                description=(
+                    "Non excepteur voluptate incididunt id cupidatat nostrud."
+                ),
+                assigned_technician=self.technician_account,
+                assigned_team=self.team,
+            )
+
+    def count_list_queries(self, params=None):
+        """Return the number of queries used to render the ticket list."""
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse("ticket_list"), params or {})
+        self.assertEqual(response.status_code, 200)
+        return len(page_queries(queries))
+
+    def test_ticket_list_query_count_is_constant(self):
+        """
+        Test the number of queries to render the ticket list does not grow
+        with the number of tickets on the page
+        """
+        self.assertTrue(
+            self.client.login(
+                username=self.technician_username,
+                password=self.shared_password,
+            )
+        )
+        # The first page computes the navbar counters of the user
+        self.count_list_queries()
+        self.create_tickets(1)
+        single_ticket_queries = self.count_list_queries()
+        self.create_tickets(9)
+        full_page_queries = self.count_list_queries()
+        self.assertEqual(single_ticket_queries, full_page_queries)
+
+        # Applying filters must not add a second evaluation of the filter
+        self.assertEqual(
+            self.count_list_queries({"filter_by_status": "open"}),
+            full_page_queries,
+        )
+
+
+class TestTicketObjectQueries(TestCase):
+    def setUp(self):
+        """Create a customer, a second customer and a ticket raised by the
+        first customer.
+
+        customer_account: (accounts.models.CustomUser)
+        ticket: (tickets.models.Ticket) - Ticket object with the
+        'customer_account' as it's author
+        """
+        self.shared_password = "testingPa$$w0rd!"
+        self.customer_account = get_user_model().objects.create_user(
+            username="customer_account",
+            password=self.shared_password,
+            role=get_user_model().ROLES.customer,
+        )
+        get_user_model().objects.create_user(
+            username="other_customer_account",
+            password=self.shared_password,
+            role=get_user_model().ROLES.customer,
+        )
+        self.ticket = Ticket.objects.create(
+            author=self.customer_account,
+            category=TicketCategory.objects.create(name="test category"),
+            title="Test Customer Ticket",
+            description="Non excepteur voluptate incididunt id cupidatat.",
+        )
+
+    def ticket_queries(self, method, url, data=None):
+        """Return the response and the queries reading the ticket table."""
+        with CaptureQueriesContext(connection) as queries:
+            response = getattr(self.client, method)(url, data or {})
+        return response, [
+            query["sql"]
+            for query in queries
+            if query["sql"].startswith("SELECT") and
+            'FROM "tickets_ticket"' in query["sql"]
+        ]
+
+    def test_ticket_is_fetched_once_with_permission_check(self):
+        """
+        Test the detail and update views fetch the ticket and check access
+        with a single query
+        """
+        self.client.login(
+            username="customer_account", password=self.shared_password
+        )
+        # The first page computes the navbar counters of the user
+        self.client.get(reverse("ticket_list"))
+        for url_name in ("ticket_detail", "ticket_update"):
+            response, queries = self.ticket_queries(
+                "get", reverse(url_name, kwargs={"pk": self.ticket.pk})
+            )
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(len(queries), 1)
+
+    def test_other_customers_ticket(self):
+        """
+        Test another customer gets a 403 for the detail page and a 404 when
+        posting a comment to the ticket
+        """
+        self.client.login(
+            username="other_customer_account", password=self.shared_password
+        )
+        url = reverse("ticket_detail", kwargs={"pk": self.ticket.pk})
+        self.assertEqual(self.client.get(url).status_code, 403)
+        response = self.client.post(url, {"body": "<p>Hello</p>"})
+        self.assertEqual(response.status_code, 404)
+        self.assertFalse(self.ticket.comments.exists())
+
+
+class TestTicketCommentThread(TestCase):
+    def setUp(self):
+        """Create a customer and a ticket raised by the customer.
+
+        customer_account: (accounts.models.CustomUser)
+        ticket: (tickets.models.Ticket) - Ticket object with the
+        'customer_account' as it's author
+        """
+        self.shared_password = "testingPa$$w0rd!"
+        self.customer_account = get_user_model().objects.create_user(
+            username="customer_account",
+            password=self.shared_password,
+            role=get_user_model().ROLES.customer,
+        )
+        self.ticket = Ticket.objects.create(
+            author=self.customer_account,
+            category=TicketCategory.objects.create(name="test category"),
+            title="Test Customer Ticket",
+            description="Non excepteur voluptate incididunt id cupidatat.",
+        )
+        self.client.login(
+            username="customer_account", password=self.shared_password
+        )
+
+    def create_comments(self, number_of_comments):
+        for _ in range(number_of_comments):
+            number = Comment.objects.count()
+            Comment.objects.create(
+                ticket=self.ticket,
+                author=get_user_model().objects.create_user(
+                    username=f"commenter_{number}"
+                ),
+                body=f"<p>Comment number {number}</p>",
+            )
+
+    def count_detail_queries(self):
+        """Return the detail page response and its number of queries."""
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(
+                reverse("ticket_detail", kwargs={"pk": self.ticket.pk})
+            )
+        self.assertEqual(response.status_code, 200)
+        return response, len(page_queries(queries))
+
+    def test_detail_query_count_is_constant(self):
+        """
+        Test the number of queries to render the detail page does not grow
+        with the number of comments
+        """
+        # The first page computes the navbar counters of the user
+        self.client.get(reverse("ticket_list"))
+        self.create_comments(1)
+        _, single_comment_queries = self.count_detail_queries()
+        self.create_comments(24)
+        response, many_comment_queries = self.count_detail_queries()
+        self.assertEqual(single_comment_queries, many_comment_queries)
+
+        # Newest comments are shown in posting order
+        comments = response.context["comments"]
+        self.assertEqual(len(comments), 10)
+        self.assertEqual(comments[-1].body, "<p>Comment number 24</p>")
+        self.assertContains(response, "Load older comments")
+
+    def test_load_older_comments_fragment(self):
+        """
+        Test the fragment endpoint returns the page of older comments
+        """
+        self.create_comments(15)
+        response, _ = self.count_detail_queries()
+        cursor = response.context["comment_page"].next_cursor
+        response = self.client.get(
+            reverse("ticket_comments", kwargs={"pk": self.ticket.pk}),
+            {"comments": cursor},
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertNotContains(response, "<html")
+        self.assertContains(response, "Comment number 0")
+        self.assertContains(response, "Comment number 4")
+        self.assertNotContains(response, "Comment number 5<")
+        self.assertNotContains(response, "Load older comments")
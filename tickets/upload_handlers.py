@@ -0,0 +1,79 @@
+"""Upload handlers for tickets application"""
+
+
+from django.conf import settings
+from django.core.files.uploadedfile import UploadedFile
+from django.core.files.uploadhandler import FileUploadHandler, StopUpload
+
+
+class OversizedUploadedFile(UploadedFile):
+    """Placeholder for an uploaded file larger than MAX_UPLOAD_SIZE, whose
+    upload was stopped by MaxSizeUploadHandler.
+
+    Only the name and size of the file are known, so validators (see
+    tickets.validators.validate_image) can reject it with a useful message.
+    """
+
+    def __init__(self, name, content_type, size, charset=None,
+                 content_type_extra=None):
+        super().__init__(
+            None, name, content_type, size, charset, content_type_extra
+        )
+
+    def open(self, mode=None):
+        raise ValueError("The content of an oversized upload is discarded.")
+
+
+class MaxSizeUploadHandler(FileUploadHandler):
+    """Upload handler discarding files as soon as they exceed
+    MAX_UPLOAD_SIZE.
+
+    Must be listed first in FILE_UPLOAD_HANDLERS. Chunks are passed on to
+    the next handlers (which buffer them in memory or a temporary file) only
+    while the file is within the limit, so an oversized upload is never
+    held in full. The rest of the file is read and dropped chunk by chunk,
+    so the form can report the size error to the browser, and is replaced
+    by an OversizedUploadedFile.
+
+    Reading stops once MAX_DISCARDED_UPLOAD_SIZE bytes of a file have been
+    dropped (or a larger size is declared): StopUpload then resets the
+    connection, so an upload of any size is never received in full. The
+    browser shows a connection error instead of the form.
+    """
+
+    def __init__(self, request=None):
+        super().__init__(request)
+        self.max_size = settings.MAX_UPLOAD_SIZE
+        self.max_discarded_size = settings.MAX_DISCARDED_UPLOAD_SIZE
+        self.oversized = False
+
+    def new_file(self, *args, **kwargs):
+        super().new_file(*args, **kwargs)
+        # Reject straight away if the part declares its size
+        self.oversized = (
+            self.content_length is not None
+            and self.content_length > self.max_size
+        )
+        if self.oversized and self.content_length > self.max_discarded_size:
+            raise StopUpload(connection_reset=True)
+
+    def receive_data_chunk(self, raw_data, start):
+        size = start + len(raw_data)
+        if size > self.max_size:
+            self.oversized = True
+        if self.oversized:
+            if size > self.max_discarded_size:
+                raise StopUpload(connection_reset=True)
+            return None
+        return raw_data
+
+    def file_complete(self, file_size):
+        if self.oversized:
+            return OversizedUploadedFile(
+                self.file_name,
+                self.content_type,
+                file_size,
+                self.charset,
+                self.content_type_extra,
+            )
+        return None
@@ -1,20 +1,56 @@
 """URLs for tickets application"""
 
 
+from django.conf import settings
 from django.urls import path
+from .api import TicketApiDetailView, TicketApiListView
+from .async_views import AsyncTicketListView, AsyncTicketView
 from .views import (
+    AttachmentView,
+    EventsUnavailableView,
+    TicketBulkUpdateView,
+    TicketExportView,
     TicketListView,
     TicketCreateView,
     TicketView,
+    TicketCommentsView,
     TicketUpdateView,
     TicketDeleteView,
 )
 
 
+# The coroutine versions of the busiest pages are served under ASGI
+if settings.ASYNC_VIEWS:
+    ticket_list_view = AsyncTicketListView.as_view()
+    ticket_view = AsyncTicketView.as_view()
+else:
+    ticket_list_view = TicketListView.as_view()
+    ticket_view = TicketView.as_view()
+
 urlpatterns = [
-    path("", TicketListView.as_view(), name="ticket_list"),
+    path("", ticket_list_view, name="ticket_list"),
     path("create/", TicketCreateView.as_view(), name="ticket_create"),
-    path("<slug:pk>/", TicketView.as_view(), name="ticket_detail"),
+    path("bulk/", TicketBulkUpdateView.as_view(), name="ticket_bulk_update"),
+    path("export/", TicketExportView.as_view(), name="ticket_export"),
+    path("api/", TicketApiListView.as_view(), name="ticket_api_list"),
+    path(
+        "api/<int:pk>/",
+        TicketApiDetailView.as_view(),
+        name="ticket_api_detail",
+    ),
+    # Served by tickets.sse under ASGI, see support_hub.asgi
+    path("events/", EventsUnavailableView.as_view(), name="ticket_events"),
+    path("<slug:pk>/", ticket_view, name="ticket_detail"),
+    path(
+        "<slug:pk>/comments",
+        TicketCommentsView.as_view(),
+        name="ticket_comments",
+    ),
     path("<slug:pk>/edit", TicketUpdateView.as_view(), name="ticket_update"),
     path("<slug:pk>/delete", TicketDeleteView.as_view(), name="ticket_delete"),
+    path(
+        "attachments/<path:name>",
+        AttachmentView.as_view(),
+        name="ticket_attachment",
+    ),
 ]
@@ -1,6 +1,37 @@
 """Custom utility functions for tickets application"""
 
 
+import html
+import bleach
+from django.utils.html import strip_tags
+
+
+# HTML elements produced by the django-summernote toolbar (see
+# SUMMERNOTE_CONFIG in settings) that are kept when sanitizing rich text.
+# Attributes (including inline styles) are always removed.
+ALLOWED_RICH_TEXT_TAGS = [
+    "b",
+    "br",
+    "div",
+    "em",
+    "i",
+    "li",
+    "ol",
+    "p",
+    "s",
+    "span",
+    "strike",
+    "strong",
+    "u",
+    "ul",
+]
+
+
+# Roles of the users tickets can be assigned to, offered in the technician
+# fields of the ticket forms and matched by the technician filter
+ASSIGNABLE_ROLES = ("technician", "administrator")
+
+
 def is_user_elevated_role(user):
     """
     Return boolean value based on user objects role attribute
@@ -15,3 +46,46 @@ def is_user_elevated_role(user):
         return True
     else:
         return False
+
+
+def html_to_text(html_string):
+    """
+    Return the plain text content of a HTML string (such as the output of the
+    django-summernote WYSIWYG editor)
+
+    Tags are replaced with whitespace (so text in adjacent paragraphs does not
+    run together), HTML entities (including '&nbsp;') are decoded and runs of
+    whitespace are collapsed to a single space.
+
+    Args:
+        html_string (str): HTML to convert
+
+    Returns:
+        str: Plain text content
+    """
+    text = html.unescape(strip_tags((html_string or "").replace("<", " <")))
+    return " ".join(text.split())
+
+
+def sanitize_html(html_string):
+    """
+    Return a HTML string (such as the output of the django-summernote WYSIWYG
+    editor) with only the elements in ALLOWED_RICH_TEXT_TAGS, safe to render
+    without escaping
+
+    Disallowed elements are removed (keeping their text, which is escaped)
+    along with all attributes and comments.
+
+    Args:
+        html_string (str): HTML to sanitize
+
+    Returns:
+        str: Sanitized HTML
+    """
+    return bleach.clean(
+        html_string or "",
+        tags=ALLOWED_RICH_TEXT_TAGS,
+        attributes={},
+        strip=True,
+        strip_comments=True,
+    )
@@ -1,66 +1,147 @@
 """Custom validators for tickets application"""
 
 
+from django.conf import settings
 from django.core.exceptions import ValidationError
 from django.utils.deconstruct import deconstructible
-from django.core.files.uploadedfile import (
-    InMemoryUploadedFile,
-    TemporaryUploadedFile,
-)
+from django.core.files.uploadedfile import UploadedFile
 from django.utils.html import strip_tags
-from PIL import Image
+
+
+# Signatures (magic bytes) of the allowed image formats
+PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+JPEG_SIGNATURE = b"\xff\xd8\xff"
+
+# JPEG Start Of Frame markers, whose segment holds the image dimensions
+# (0xC4, 0xC8 and 0xCC are other segments in the same range)
+JPEG_SOF_MARKERS = set(range(0xC0, 0xD0)) - {0xC4, 0xC8, 0xCC}
+
+
+def read_png_header(file):
+    """Return the width and height of a PNG image from its IHDR chunk, which
+    must directly follow the signature.
+    """
+    file.seek(len(PNG_SIGNATURE))
+    chunk = file.read(16)
+    if len(chunk) < 16 or chunk[4:8] != b"IHDR":
+        raise ValueError("Missing PNG header")
+    return (
+        int.from_bytes(chunk[8:12], "big"),
+        int.from_bytes(chunk[12:16], "big"),
+    )
+
+
+def read_jpeg_header(file):
+    """Return the width and height of a JPEG image from its Start Of Frame
+    segment, skipping over the segments before it without reading them.
+    """
+    file.seek(2)
+    while True:
+        byte = file.read(1)
+        # Markers may be padded with any number of 0xFF fill bytes
+        while byte == b"\xff":
+            marker = file.read(1)
+            if marker != b"\xff":
+                break
+            byte = marker
+        else:
+            raise ValueError("Invalid JPEG marker")
+        if not marker:
+            raise ValueError("Missing JPEG header")
+        marker = marker[0]
+        if marker == 0x01 or 0xD0 <= marker <= 0xD8:
+            # Markers without a segment
+            continue
+        if marker in (0xD9, 0xDA):
+            # End of image or start of scan reached without a frame
+            raise ValueError("Missing JPEG header")
+        length = int.from_bytes(file.read(2), "big")
+        if length < 2:
+            raise ValueError("Invalid JPEG segment")
+        if marker in JPEG_SOF_MARKERS:
+            segment = file.read(5)
+            if len(segment) < 5:
+                raise ValueError("Missing JPEG header")
+            return (
+                int.from_bytes(segment[3:5], "big"),
+                int.from_bytes(segment[1:3], "big"),
+            )
+        file.seek(length - 2, 1)
+
+
+def sniff_image(file):
+    """Identify an image from its signature and read its dimensions from its
+    header, without decoding any pixel data.
+
+    Args:
+        file (File): Image file to sniff
+
+    Returns:
+        tuple: Image format ("png" or "jpeg"), width and height, or None if
+        the file does not start with the signature of an allowed format
+
+    Raises:
+        ValueError: If the file has an allowed signature but its header is
+        truncated or malformed
+    """
+    file.seek(0)
+    start = file.read(len(PNG_SIGNATURE))
+    if start == PNG_SIGNATURE:
+        return ("png", *read_png_header(file))
+    if start.startswith(JPEG_SIGNATURE):
+        return ("jpeg", *read_jpeg_header(file))
+    return None
 
 
 def validate_image(image_obj):
-    """Validator to check image context type and file size"""
+    """Validator to check image context type, file size and dimensions"""
+
+    # Maximum permitted file size in MB (uploads are discarded as soon as
+    # they exceed it, see tickets.upload_handlers)
+    maximum_file_size = settings.MAX_UPLOAD_SIZE / (1024 * 1024)
 
-    # Allowed image file types (based on image MIME types)
-    allowed_MIME_types = ["jpeg", "png"]
+    # Maximum permitted image size in pixels, guarding against images that
+    # are small files but decompress to huge bitmaps ("decompression bombs")
+    maximum_pixels = settings.MAX_IMAGE_PIXELS
 
-    # Maximum permitted file size in MB
-    maximum_file_size = 3
+    # Newly uploaded files (including oversized uploads whose content has
+    # been discarded). Existing images are not checked again.
+    if isinstance(image_obj, UploadedFile):
 
-    # CREDIT: PIL image opening code adapted from Brian - Stack Overflow
-    # URL: https://stackoverflow.com/a/266731
-    def is_valid_image(obj):
-        """Return bool value or raise ValidationErrors based on result of using
-        the Pillow package to check if the image format is one of the one of
-        the allowed_MIME_types and is a valid image file.
-        """
+        # Check image file doesn't exceed maximum file size
+        if image_obj.size > settings.MAX_UPLOAD_SIZE:
+            raise ValidationError(
+                "Maximum file size exceeded "
+                f"({maximum_file_size:g}MB maximum)."
+            )
+
+        # Check the image is of an allowed type by its signature, and read
+        # its dimensions from its header.
         try:
-            # Check each image to see if its format is one of the allowed
-            # types.
-            image = Image.open(obj)
-            for allowed_image_format in allowed_MIME_types:
-                if image.format == allowed_image_format.upper():
-                    return True
-            else:
-                # If the file is not an allowed type, a ValidationError is
-                # raised to feed this back to the user.
-                raise ValidationError(
-                    "Invalid file type (only valid 'jpg' and 'png' files "
-                    "permitted)."
-                )
-        # If the file cannot be read an OSError exception with is thrown,
-        # caught and a ValidationError raised in its place to notify the user.
-        except OSError:
+            header = sniff_image(image_obj.file)
+        except (ValueError, OSError):
             raise ValidationError(
                 "Upload a valid image. The file you uploaded was either not "
                 "an image or a corrupted image."
             )
-
-    # InMemoryUploadedFile - Used for small files
-    # TemporaryUploadedFile - Used for larger files
-    if isinstance(image_obj, InMemoryUploadedFile) or isinstance(
-        image_obj, TemporaryUploadedFile
-    ):
-
-        # Check image file doesn't exceed maximum file size
-        if image_obj.size > (maximum_file_size * 1024 * 1024):
-            raise ValidationError("Maximum file size exceeded (3MB maximum).")
-
-        # Check if image is of an allowed type an is a valid image
-        is_valid_image(image_obj.file)
+        finally:
+            image_obj.file.seek(0)
+        if header is None:
+            raise ValidationError(
+                "Invalid file type (only valid 'jpg' and 'png' files "
+                "permitted)."
+            )
+        image_format, width, height = header
+        if not width or not height:
+            raise ValidationError(
+                "Upload a valid image. The file you uploaded was either not "
+                "an image or a corrupted image."
+            )
+        if width * height > maximum_pixels:
+            raise ValidationError(
+                f"Image dimensions too large ({width} x {height} pixels, "
+                f"{maximum_pixels // 1000000} megapixels maximum)."
+            )
 
 
 @deconstructible
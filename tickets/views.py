@@ -1,90 +1,228 @@
 """Views for tickets application"""
 
 
+import mimetypes
 from django.conf import settings
 from django.contrib import messages
 from django.contrib.auth.mixins import LoginRequiredMixin, UserPassesTestMixin
 from django.contrib.messages.views import SuccessMessageMixin
+from django.core.exceptions import FieldDoesNotExist
 from django.core.mail import send_mail
-from django.http import Http404
+from django.db.models import Count, OuterRef, Subquery
+from django.http import (
+    FileResponse,
+    Http404,
+    HttpResponse,
+    HttpResponseBadRequest,
+    HttpResponseNotModified,
+    StreamingHttpResponse,
+)
 from django.shortcuts import redirect
 from django.urls import reverse
+from django.utils import timezone
+from django.utils.http import url_has_allowed_host_and_scheme
 from django.views import View, generic
 from django.views.generic.detail import SingleObjectMixin
-from smtplib import SMTPException
-from common.utils import is_slug_a_number
+from common.mixins import ConditionalGetMixin, MemoizedObjectMixin
+from common.utils import is_slug_a_number, iter_file_range, parse_byte_range
+from . import counters, export
+from .bulk import bulk_update_tickets
+from .derivatives import derivatives_ready
 from .filters import CustomerTicketFilter, ElevatedUserTicketFilter
 from .forms import (
+    BulkTicketUpdateForm,
     CommentForm,
     CustomerTicketCreationForm,
     CustomerTicketUpdateForm,
     ElevatedUserTicketForm,
 )
-from .models import Ticket
+from .fragment_cache import get_generation
+from .models import Comment, Ticket
+from .notifications import queue_comment_notification
+from .pagination import InvalidCursor, KeysetPaginator
+from .search import get_search_backend
+from .storage import NAME_RE, ContentAddressedStorage
 from .utils import is_user_elevated_role
 
 
-class TicketListView(LoginRequiredMixin, generic.ListView):
+def viewer_validators(user):
+    """Return the values every ticket page depends on besides the tickets
+    it shows: the viewer's role, the navbar badge counters and the fragment
+    cache generation (bumped when names shown on tickets change, and when
+    teams, categories or technicians listed in the dropdowns are added).
+
+    Args:
+        user (accounts.models.CustomUser): User viewing the page
+
+    Returns:
+        tuple: Values to build the ETag of the page with
+    """
+    return (user.role, counters.get_counts(user), get_generation())
+
+
+class TicketListView(
+    LoginRequiredMixin, ConditionalGetMixin, generic.ListView
+):
     """ListView - Used to show a list of ticket objects"""
 
     template_name = "ticket_list.html"
     context_object_name = "tickets"
     paginate_by = 10
+    page_kwarg = "cursor"
 
-    def get_queryset(self):
-        """Get different queryset based on user role.
+    def get_filterset(self):
+        """Get the filter to apply based on user role.
 
-        User role determines the queryset that is returned. Elevated users will
-        see an unfiltered list of all tickets in the database whereas
-        non-elevated users see only tickets they have authored.
+        User role determines the queryset and filter that are used. Elevated
+        users will see an unfiltered list of all tickets in the database with
+        a greater set of filter fields whereas non-elevated users see only
+        tickets they have authored and limited filter options.
 
         Returns:
-            QuerySet: QuerySet filtered based on user role
+            FilterSet: ElevatedUserTicketFilter or CustomerTicketFilter bound
+            to the request parameters
         """
+        queryset = Ticket.objects.visible_to(self.request.user)
         if is_user_elevated_role(self.request.user):
-            queryset = Ticket.objects.all()
-        else:
-            queryset = Ticket.objects.filter(author=self.request.user)
+            return ElevatedUserTicketFilter(
+                self.request.GET, user=self.request.user, queryset=queryset
+            )
+        return CustomerTicketFilter(self.request.GET, queryset=queryset)
+
+    def get_queryset(self):
+        """Get the filtered queryset for the current user.
+
+        The filter is built once per request and kept on the view so the same
+        instance renders the filter form in get_context_data. Related objects
+        shown on each ticket card are joined in the same query and only the
+        columns rendered by the template are fetched (the stored preview is
+        rendered in place of the description, which is never loaded).
+
+        Returns:
+            QuerySet: QuerySet filtered based on user role and form input
+        """
         # Combining filter and pagination
         # CREDIT: arash ataei solut - Stack Overflow
         # URL: https://stackoverflow.com/a/64618901
-        return ElevatedUserTicketFilter(
-            self.request.GET, user=self.request.user, queryset=queryset
-        ).qs
+        if not hasattr(self, "filterset"):
+            self.filterset = self.get_filterset()
+        return self.filterset.qs.select_related(
+            "assigned_technician", "assigned_team"
+        ).only(
+            "id",
+            "title",
+            "preview",
+            "status",
+            "created_on",
+            "updated_on",
+            "assigned_technician__username",
+            "assigned_team__name",
+            "ticket_image",
+        )
+
+    def get_page_keys(self, queryset, page_size):
+        """Return the page of the queryset requested by the cursor, reading
+        only the pagination key, 'updated_on' and 'ticket_image' columns.
+
+        Used to tell whether a page has changed without loading its tickets.
+
+        Returns:
+            KeysetPage: Page of tickets with only the key columns loaded
+
+        Raises:
+            InvalidCursor: If the cursor is not valid
+        """
+        paginator = KeysetPaginator(queryset, page_size)
+        key_fields = ["updated_on", "ticket_image"]
+        for name, _ in paginator.ordering:
+            try:
+                Ticket._meta.get_field(name)
+            except FieldDoesNotExist:
+                # Annotations such as the search rank
+                continue
+            key_fields.append(name)
+        paginator.queryset = queryset.only(*key_fields)
+        return paginator.page(self.request.GET.get(self.page_kwarg))
+
+    def get_validators(self):
+        """Return the validators of the page: the ids and 'updated_on' values
+        of the tickets on it, whether their thumbnails are ready, and its
+        cursors, read with one query on the pagination key, along with the
+        viewer's validators.
+
+        Returns:
+            tuple: ETag parts and the latest 'updated_on' of the page, or
+            None if the cursor is not valid
+        """
+        try:
+            self.filterset = self.get_filterset()
+            page = self.get_page_keys(
+                self.filterset.qs, self.get_paginate_by(None)
+            )
+        except InvalidCursor:
+            return None
+        keys = [(ticket.pk, ticket.updated_on) for ticket in page]
+        thumbnails = [
+            derivatives_ready(ticket.ticket_image, "thumbnail")
+            for ticket in page
+        ]
+        parts = (
+            *viewer_validators(self.request.user),
+            keys,
+            thumbnails,
+            page.next_cursor,
+            page.previous_cursor,
+        )
+        return parts, max((updated_on for _, updated_on in keys), default=None)
+
+    def paginate_queryset(self, queryset, page_size):
+        """Paginate the queryset using keyset pagination.
+
+        The position in the results is carried in an opaque cursor (see
+        tickets.pagination) rather than a page number so that deep pages cost
+        the same as the first and no COUNT(*) query is run.
+
+        Returns:
+            tuple: paginator, page, object list and is_paginated flag
+        """
+        paginator = KeysetPaginator(queryset, page_size)
+        try:
+            page = paginator.page(self.request.GET.get(self.page_kwarg))
+        except InvalidCursor as e:
+            raise Http404(f"Invalid cursor: {e}")
+        return (paginator, page, page.object_list, page.has_other_pages())
 
     # CREDIT: Filtering adapted from The Dumbfounds: Django Filtering System
     #         with django-filter
     # URL: https://www.youtube.com/watch?v=nle3u6Ww6Xk
     def get_context_data(self, **kwargs):
-        """Add data to the context based on user role so it can be rendered in
-        the template.
+        """Add data to the context so it can be rendered in the template.
 
-        User role determines the filter that is added to the context. Elevated
-        users will see an a greater set of filter fields whereas non-elevated
-        user options will be limited.
+        The filter built by get_queryset is added to the context so the form
+        reflects the same (already validated) filter that produced the list.
 
         Returns:
             dict: Context data with the filter added
         """
         context = super().get_context_data(**kwargs)
-        # Present different filter based on user role
-        if is_user_elevated_role(self.request.user):
-            context["filter"] = ElevatedUserTicketFilter(
-                self.request.GET,
-                user=self.request.user,
-                queryset=self.get_queryset(),
-            )
-        else:
-            context["filter"] = CustomerTicketFilter(
-                self.request.GET, queryset=self.get_queryset()
+        context["filter"] = self.filterset
+        # Highlight the search terms in the tickets shown on this page
+        search_terms = self.filterset.search_terms
+        if search_terms:
+            snippets = get_search_backend().highlight(
+                [ticket.pk for ticket in context["tickets"]], search_terms
             )
+            for ticket in context["tickets"]:
+                ticket.search_snippet = snippets.get(ticket.pk)
         # Combining filter and pagination in URL
         # CREDIT: Jon - Stack Overflow
         # URL: https://stackoverflow.com/a/59973868
         get_copy = self.request.GET.copy()
-        if get_copy.get("page"):
-            get_copy.pop("page")
+        if get_copy.get(self.page_kwarg):
+            get_copy.pop(self.page_kwarg)
         context["get_copy"] = get_copy
+        if is_user_elevated_role(self.request.user):
+            context["bulk_form"] = BulkTicketUpdateForm()
         return context
 
 
@@ -166,17 +304,92 @@ class TicketCreateView(
         return super(TicketCreateView, self).form_valid(form)
 
 
+class CommentThreadMixin:
+    """Mixin adding a page of a ticket's comment thread to the context.
+
+    The newest 'comments_per_page' comments are shown, with their authors
+    loaded in the same query, so rendering the thread costs one query however
+    long it is. Older comments are fetched a page at a time with the keyset
+    cursor in the 'comments' query parameter (see TicketCommentsView).
+
+    Context:
+        comment_page (KeysetPage): Page of comments, newest first
+        comments (list): Comments of the page in posting order
+    """
+
+    comments_per_page = 10
+    comments_page_kwarg = "comments"
+
+    def get_comment_page(self, ticket):
+        """Return the page of comments requested by the 'comments' cursor.
+
+        Raises:
+            Http404: If the cursor is not valid
+        """
+        paginator = KeysetPaginator(
+            Comment.objects.filter(ticket=ticket).select_related("author"),
+            self.comments_per_page,
+            ordering=("-created_on",),
+        )
+        try:
+            return paginator.page(
+                self.request.GET.get(self.comments_page_kwarg)
+            )
+        except InvalidCursor:
+            raise Http404("Invalid comments cursor.")
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        comment_page = self.get_comment_page(self.object)
+        context["comment_page"] = comment_page
+        context["comments"] = list(reversed(comment_page))
+        return context
+
+
 # Ticket DetailView to display individual tickets with comment form
 # CREDIT: Adapted from Django Documentation
 # URL: https://docs.djangoproject.com/en/4.0/topics/class-based-views/mixins/
 class TicketDetailView(
-    LoginRequiredMixin, UserPassesTestMixin, generic.DetailView
+    LoginRequiredMixin,
+    UserPassesTestMixin,
+    MemoizedObjectMixin,
+    ConditionalGetMixin,
+    CommentThreadMixin,
+    generic.DetailView,
 ):
     """DetailView - Used to display individual tickets."""
 
     model = Ticket
     template_name = "ticket_detail.html"
 
+    def get_queryset(self):
+        """Get the ticket queryset annotated with the current user's access,
+        so that fetching the ticket and checking permissions in test_func is
+        a single query.
+
+        The time of the latest comment and the number of comments are
+        annotated as well, for the validators of the page.
+
+        Returns:
+            QuerySet: Tickets annotated with 'is_visible',
+            'latest_comment_on' and 'comment_count'
+        """
+        comments = Comment.objects.filter(ticket=OuterRef("pk")).order_by()
+        return Ticket.objects.with_visibility(
+            self.request.user
+        ).select_related(
+            "author", "category", "assigned_technician", "assigned_team"
+        ).annotate(
+            latest_comment_on=Subquery(
+                comments.order_by("-created_on").values("created_on")[:1]
+            ),
+            comment_count=Subquery(
+                comments.values("ticket")
+                .annotate(count=Count("id"))
+                .values("count")
+            ),
+        )
+
     def dispatch(self, request, *args, **kwargs):
         """Take in the request and determine if able to proceed with the slug
         provided.
@@ -193,6 +406,28 @@ class TicketDetailView(
         else:
             return redirect("home")
 
+    def get_validators(self):
+        """Return the validators of the page, read with the ticket by the
+        memoized (already fetched) object: the ticket's 'updated_on', the
+        latest comment time, the number of comments and whether the preview
+        of its image is ready, along with the viewer's validators.
+
+        Returns:
+            tuple: ETag parts and the time of the latest change
+        """
+        ticket = self.get_object()
+        parts = (
+            *viewer_validators(self.request.user),
+            ticket.pk,
+            ticket.updated_on,
+            ticket.latest_comment_on,
+            ticket.comment_count,
+            derivatives_ready(ticket.ticket_image, "preview"),
+        )
+        return parts, max(
+            filter(None, (ticket.updated_on, ticket.latest_comment_on))
+        )
+
     def get_context_data(self, **kwargs):
         """Add comment form to the context so it can be rendered in the
         template.
@@ -211,29 +446,33 @@ class TicketDetailView(
             bool: Result of a conditional statement to determine if the user
             can view the object
         """
-        logged_in_user = self.request.user
-        current_ticket = self.get_object()
-
-        # Conditional statement to check if the currently logged on user is the
-        # author of the ticket or has the elevated permissions required to view
-        # any ticket. Uses the custom application util 'is_user_elevated_role'
-        if current_ticket.author == logged_in_user or is_user_elevated_role(
-            logged_in_user
-        ):
-            return True
-        else:
-            return False
+        # The ticket is annotated by the queryset with whether the currently
+        # logged on user is the author of the ticket or has the elevated
+        # permissions required to view any ticket (Ticket.objects
+        # .with_visibility). The object is memoized, so the view reuses it.
+        return self.get_object().is_visible
 
 
 # CREDIT: Adapted from Django Documentation
 # URL: https://docs.djangoproject.com/en/4.0/topics/class-based-views/mixins/
-class CommentFormView(SingleObjectMixin, generic.FormView):
+class CommentFormView(
+    CommentThreadMixin, SingleObjectMixin, generic.FormView
+):
     """FormView - Used to handle form validation and post requests"""
 
     model = Ticket
     form_class = CommentForm
     template_name = "ticket_detail.html"
 
+    def get_queryset(self):
+        """Get the tickets the current user can comment on (those they are
+        allowed to view), so comments cannot be posted to other tickets.
+
+        Returns:
+            QuerySet: Tickets visible to the current user
+        """
+        return Ticket.objects.visible_to(self.request.user)
+
     def form_valid(self, form):
         """Check form is valid and insert data in to the form before saving the
         model object.
@@ -252,44 +491,19 @@ class CommentFormView(SingleObjectMixin, generic.FormView):
         # to the current time
         comment.ticket.set_ticket_updated_now()
 
-        # If the user posting a comment to the ticket is not the author, send
-        # an email to the author notifying them a comment has been left.
+        # If the user posting a comment to the ticket is not the author,
+        # queue a notification for the author. Comments posted within the
+        # digest window are sent together in one email by the outbox worker
+        # (see tickets.notifications).
         if comment.ticket.author != comment.author:
-            try:
-                send_mail(
-                    subject=f"Support Hub - {comment.ticket}",
-                    message=(
-                        "Your Ticket has an update!\n\n"
-                        f"Update posted by '{comment.author}':\n"
-                        f"'{comment.body_without_tags}'\n\n"
-                        f"Current ticket status is '{comment.ticket.status}'\n"
-                        "Use this link to view this ticket in Support Hub "
-                        f"'{self.request.META['HTTP_HOST']}"
-                        f"{comment.ticket.get_absolute_url()}'"
-                    ),
-                    html_message=(
-                        "<h2>Your Ticket has an update!</h2>"
-                        f"<p>Update posted by '{comment.author}':</p>"
-                        f"<p>'{comment.body_without_tags}'</p>"
-                        "<br>"
-                        "<p>Current ticket status is "
-                        f"'{comment.ticket.status}'</p>"
-                        "<p>Click the link to view this ticket in Support Hub "
-                        f"<a href='{self.request.META['HTTP_HOST']}"
-                        f"{comment.ticket.get_absolute_url()}'>Ticket Link</a>"
-                        "</p>"
-                    ),
-                    from_email=settings.DEFAULT_FROM_EMAIL,
-                    recipient_list=[comment.ticket.author.email],
-                    fail_silently=False,
-                )
-            # Notify users of any errors sending the email.
-            except SMTPException as e:
-                messages.error(
-                    self.request,
-                    "Error sending email update to ticket owner - "
-                    f"'{comment.ticket.author}'{e}",
-                )
+            queue_comment_notification(
+                comment,
+                comment.ticket.author,
+                ticket_url=(
+                    f"{self.request.get_host()}"
+                    f"{comment.ticket.get_absolute_url()}"
+                ),
+            )
         return super().form_valid(comment)
 
     def post(self, request, *args, **kwargs):
@@ -324,18 +538,72 @@ class TicketView(View):
         return view(request, *args, **kwargs)
 
 
+class TicketCommentsView(
+    LoginRequiredMixin,
+    UserPassesTestMixin,
+    MemoizedObjectMixin,
+    CommentThreadMixin,
+    generic.DetailView,
+):
+    """DetailView - Used to render a page of older comments of a ticket as a
+    HTML fragment, loaded by the 'Load older comments' button.
+    """
+
+    template_name = "comment_thread.html"
+    context_object_name = "ticket"
+
+    def dispatch(self, request, *args, **kwargs):
+        """Take in the request and determine if able to proceed with the slug
+        provided.
+        """
+        if is_slug_a_number(request, kwargs["pk"]):
+            return super().dispatch(request, *args, **kwargs)
+        else:
+            return redirect("home")
+
+    def get_queryset(self):
+        """Get the ticket queryset annotated with the current user's access.
+        Only the columns needed to check access are fetched.
+
+        Returns:
+            QuerySet: Tickets annotated with 'is_visible'
+        """
+        return Ticket.objects.with_visibility(self.request.user).only(
+            "id", "author"
+        )
+
+    def test_func(self):
+        """Determine if a user has permissions to view a resource
+
+        Returns:
+            bool: Result of a conditional statement to determine if the user
+            can view the object
+        """
+        return self.get_object().is_visible
+
+
 class TicketUpdateView(
     LoginRequiredMixin,
     UserPassesTestMixin,
     SuccessMessageMixin,
+    MemoizedObjectMixin,
     generic.UpdateView,
 ):
     """UpdateView - Used to update a the ticket"""
 
-    queryset = Ticket.objects.all()
     template_name = "ticket_update.html"
     success_message = "Ticket updated successfully."
 
+    def get_queryset(self):
+        """Get the ticket queryset annotated with the current user's access,
+        so that fetching the ticket and checking permissions in test_func is
+        a single query.
+
+        Returns:
+            QuerySet: Tickets annotated with 'is_visible'
+        """
+        return Ticket.objects.with_visibility(self.request.user)
+
     def dispatch(self, request, *args, **kwargs):
         """Take in the request and determine if able to proceed with the slug
         provided.
@@ -408,21 +676,16 @@ class TicketUpdateView(
             bool: Result of a conditional statement to determine if the user
             can view the object
         """
-        logged_in_user = self.request.user
-        current_ticket = self.get_object()
-
-        # Conditional statement to check if the currently logged on user is the
-        # author of the ticket or has the elevated permissions required to view
-        # any ticket. Uses the custom application util 'is_user_elevated_role'
-        if current_ticket.author == logged_in_user or is_user_elevated_role(
-            logged_in_user
-        ):
-            return True
-        else:
-            return False
+        # The ticket is annotated by the queryset with whether the currently
+        # logged on user is the author of the ticket or has the elevated
+        # permissions required to view any ticket (Ticket.objects
+        # .with_visibility). The object is memoized, so the view reuses it.
+        return self.get_object().is_visible
 
 
-class TicketDeleteView(LoginRequiredMixin, generic.DeleteView):
+class TicketDeleteView(
+    LoginRequiredMixin, MemoizedObjectMixin, generic.DeleteView
+):
     """DeleteView - Used to delete an object"""
 
     model = Ticket
@@ -453,44 +716,37 @@ class TicketDeleteView(LoginRequiredMixin, generic.DeleteView):
             )
             return redirect("ticket_detail", pk=kwargs["pk"])
         else:
-            # Retrieve the ticket being deleted
-            ticket = Ticket.objects.get(pk=kwargs["pk"])
-            # Send an email to the author of the ticket to inform them of this
-            # activity. If there is a problem sending the email info the
-            # technician deleting the request with a message.
-            try:
-                send_mail(
-                    subject=f"Support Hub - {ticket}",
-                    message=(
-                        f"Your Ticket, '{ticket}' has been deleted.\n\n"
-                        "Please raise a ticket to report this if it "
-                        "was not expected.\n\n"
-                        "Use the link to visit Support Hub - "
-                        f"{self.request.META['HTTP_HOST']}."
-                    ),
-                    html_message=(
-                        "<h2>Your Ticket has been deleted.</h2>"
-                        f"<p>Your Ticket, '{ticket}' has been deleted.</p>"
-                        "<br>"
-                        "<p>Please raise a ticket to report this if it "
-                        "was not expected.</p>"
-                        "<br>"
-                        "<p>Click the link to visit Support Hub and "
-                        f"<a href='{self.request.META['HTTP_HOST']}'>"
-                        "raise a request</a>."
-                        "</p>"
-                    ),
-                    from_email=settings.DEFAULT_FROM_EMAIL,
-                    recipient_list=[ticket.author.email],
-                    fail_silently=False,
-                )
-            # Notify users of any errors sending the email.
-            except SMTPException as e:
-                messages.error(
-                    self.request,
-                    "Error sending email update to ticket owner - "
-                    f"'{ticket.author}'{e}",
-                )
+            # Retrieve the ticket being deleted (memoized, so it is not
+            # fetched again when it is deleted)
+            ticket = self.get_object()
+            # Queue an email to the author of the ticket to inform them of
+            # this activity. It is delivered by the outbox worker, which
+            # retries failed attempts, so nothing is sent from this request.
+            send_mail(
+                subject=f"Support Hub - {ticket}",
+                message=(
+                    f"Your Ticket, '{ticket}' has been deleted.\n\n"
+                    "Please raise a ticket to report this if it "
+                    "was not expected.\n\n"
+                    "Use the link to visit Support Hub - "
+                    f"{self.request.META['HTTP_HOST']}."
+                ),
+                html_message=(
+                    "<h2>Your Ticket has been deleted.</h2>"
+                    f"<p>Your Ticket, '{ticket}' has been deleted.</p>"
+                    "<br>"
+                    "<p>Please raise a ticket to report this if it "
+                    "was not expected.</p>"
+                    "<br>"
+                    "<p>Click the link to visit Support Hub and "
+                    f"<a href='{self.request.META['HTTP_HOST']}'>"
+                    "raise a request</a>."
+                    "</p>"
+                ),
+                from_email=settings.DEFAULT_FROM_EMAIL,
+                recipient_list=[ticket.author.email],
+                fail_silently=False,
+            )
 
             # Provide a success message and delete the object
             messages.info(
@@ -508,3 +764,227 @@ class TicketDeleteView(LoginRequiredMixin, generic.DeleteView):
             str: URL of current ticket
         """
         return reverse("ticket_list")
+
+
+class TicketBulkUpdateView(
+    LoginRequiredMixin, UserPassesTestMixin, generic.FormView
+):
+    """FormView - Used to update many tickets at once from the ticket list.
+
+    Only accepts POST requests, made by the bulk actions form of the list.
+    """
+
+    form_class = BulkTicketUpdateForm
+    http_method_names = ["post"]
+
+    def form_valid(self, form):
+        """Apply the chosen changes to the selected tickets
+
+        Args:
+            form (BulkTicketUpdateForm): Validated form
+        """
+        updated = bulk_update_tickets(
+            form.cleaned_data["tickets"],
+            form.get_changes(),
+            self.request.user,
+            site_url=self.request.get_host(),
+        )
+        messages.success(
+            self.request,
+            f"{updated} of {len(form.cleaned_data['tickets'])} selected "
+            "tickets updated.",
+        )
+        return redirect(self.get_success_url())
+
+    def form_invalid(self, form):
+        """Return to the ticket list with the form errors as a message"""
+        messages.error(
+            self.request,
+            " ".join(
+                error for errors in form.errors.values() for error in errors
+            ),
+        )
+        return redirect(self.get_success_url())
+
+    def get_success_url(self):
+        """Url to be returned to, the ticket list page the form was posted
+        from
+
+        Returns:
+            str: URL of the ticket list
+        """
+        next_url = self.request.POST.get("next", "")
+        if url_has_allowed_host_and_scheme(
+            next_url, allowed_hosts={self.request.get_host()}
+        ):
+            return next_url
+        return reverse("ticket_list")
+
+    def test_func(self):
+        """Determine if a user has permissions to update tickets in bulk
+
+        Returns:
+            bool: Whether the user has an elevated role, required to change
+            the status, priority and assignment of tickets
+        """
+        return is_user_elevated_role(self.request.user)
+
+
+class TicketExportView(LoginRequiredMixin, UserPassesTestMixin, View):
+    """View - Used to export the tickets matching the ticket list filter as
+    CSV or JSON Lines.
+
+    The export is streamed as the tickets are read from the database (see
+    tickets.export), so it can be as large as the ticket table.
+    """
+
+    def get(self, request, *args, **kwargs):
+        """Handle GET requests
+
+        The 'format' parameter selects the export format ('csv' or 'jsonl'),
+        all other parameters are the filter parameters of the ticket list.
+
+        Returns:
+            StreamingHttpResponse: Export of the filtered tickets, or
+            HttpResponseBadRequest listing the errors of an invalid filter
+        """
+        export_format = request.GET.get("format", "csv")
+        if export_format not in export.FORMATS:
+            raise Http404(f"Unknown export format: {export_format}")
+        filterset = ElevatedUserTicketFilter(
+            request.GET, user=request.user, queryset=Ticket.objects.all()
+        )
+        if not filterset.is_valid():
+            return HttpResponseBadRequest(
+                f"Invalid filter: {filterset.errors.as_text()}",
+                content_type="text/plain",
+            )
+        response = StreamingHttpResponse(
+            export.stream_export(filterset.qs, export_format),
+            content_type=export.FORMATS[export_format],
+        )
+        filename = timezone.now().strftime("tickets-%Y%m%d-%H%M%S")
+        response["Content-Disposition"] = (
+            f'attachment; filename="{filename}.{export_format}"'
+        )
+        # Do not let a proxy buffer the whole export before sending it
+        response["X-Accel-Buffering"] = "no"
+        return response
+
+    def test_func(self):
+        """Determine if a user has permissions to export tickets
+
+        Returns:
+            bool: Whether the user has an elevated role, required to view
+            every ticket
+        """
+        return is_user_elevated_role(self.request.user)
+
+
+class AttachmentView(LoginRequiredMixin, View):
+    """View - Used to serve ticket attachments stored locally (see
+    tickets.storage).
+
+    Attachments (and their derivatives) are only served to users allowed to
+    view a ticket with the image, other users get a 404 as for a missing
+    file. Attachment names are content hashes, so responses are cacheable
+    forever (privately) and the name is a strong ETag. Range requests are
+    supported, and serving the file can be handed to the web server with
+    ATTACHMENT_SENDFILE_HEADER.
+    """
+
+    cache_control = "private, max-age=31536000, immutable"
+
+    def get(self, request, name):
+        """Handle GET (and HEAD) requests
+
+        Args:
+            request (WSGIRequest): Request object
+            name (str): Storage name of the attachment
+
+        Returns:
+            HttpResponse: Attachment content, part of it or a Not Modified
+            response
+        """
+        if not NAME_RE.match(name):
+            raise Http404
+        if not (
+            Ticket.objects.visible_to(request.user)
+            .with_attachment(name)
+            .exists()
+        ):
+            raise Http404
+        storage = ContentAddressedStorage()
+        try:
+            size = storage.size(name)
+        except OSError:
+            raise Http404
+        etag = f'"{name.rsplit("/", 1)[1]}"'
+        if_none_match = request.META.get("HTTP_IF_NONE_MATCH", "")
+        if etag in if_none_match or if_none_match.strip() == "*":
+            response = HttpResponseNotModified()
+        else:
+            response = self.file_response(request, storage, name, size, etag)
+        response["ETag"] = etag
+        response["Cache-Control"] = self.cache_control
+        return response
+
+    def file_response(self, request, storage, name, size, etag):
+        """Return the response serving the attachment, or the requested range
+        of it.
+        """
+        content_type = (
+            mimetypes.guess_type(name)[0] or "application/octet-stream"
+        )
+        sendfile_header = getattr(settings, "ATTACHMENT_SENDFILE_HEADER", None)
+        if sendfile_header:
+            # The web server serves the file, including any range requested
+            response = HttpResponse(content_type=content_type)
+            if sendfile_header.lower() == "x-accel-redirect":
+                response[sendfile_header] = (
+                    f"{settings.ATTACHMENT_SENDFILE_URL}{name}"
+                )
+            else:
+                response[sendfile_header] = storage.path(name)
+            return response
+
+        byte_range = None
+        if request.META.get("HTTP_IF_RANGE", etag) == etag:
+            try:
+                byte_range = parse_byte_range(
+                    request.META.get("HTTP_RANGE"), size
+                )
+            except ValueError:
+                response = HttpResponse(status=416)
+                response["Content-Range"] = f"bytes */{size}"
+                return response
+        if byte_range is None:
+            response = FileResponse(
+                storage.open(name, "rb"), content_type=content_type
+            )
+        else:
+            start, end = byte_range
+            response = StreamingHttpResponse(
+                iter_file_range(
+                    storage.open(name, "rb"), start, end - start + 1
+                ),
+                status=206,
+                content_type=content_type,
+            )
+            response["Content-Range"] = f"bytes {start}-{end}/{size}"
+            response["Content-Length"] = end - start + 1
+        response["Accept-Ranges"] = "bytes"
+        return response
+
+
+class EventsUnavailableView(View):
+    """View - Answers requests for the live ticket events stream when the
+    site is served with WSGI.
+
+    Under ASGI the stream is served by tickets.sse before requests reach
+    Django. The 204 No Content response tells browsers to stop reconnecting,
+    so pages simply stay without live updates.
+    """
+
+    def get(self, request, *args, **kwargs):
+        return HttpResponse(status=204)